@@ -0,0 +1,144 @@
+"""
+Materialized analytics snapshot
+
+The analytics overview and summary stats are served from a single
+AnalyticsSnapshot row instead of running their aggregates on every request.
+The snapshot is built with SQL aggregates during the database bootstrap (or on
+rebuild) and then updated incrementally from the rows approve_upload inserts,
+so reading it is one primary-key lookup.
+"""
+import json
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Sum, Min, Max, Q
+from .models import Dataset, Publication, AnalyticsSnapshot
+
+SNAPSHOT_ID = 1
+
+# Snapshot distribution name -> Dataset field it counts
+DATASET_DISTRIBUTIONS = {
+    'disease_distribution': 'disease_type',
+    'data_accessibility': 'data_accessibility',
+    'wgs_availability': 'wgs_available',
+}
+
+
+def compute_snapshot():
+    """Build the snapshot payload from SQL aggregates"""
+    # Zero sample sizes are treated as unknown, as the overview always did
+    known_size = ~Q(sample_size=0)
+    counters = Dataset.objects.aggregate(
+        total_datasets=Count('id'),
+        sample_size_count=Count('id', filter=known_size),
+        sample_size_sum=Sum('sample_size', filter=known_size),
+        sample_size_min=Min('sample_size', filter=known_size),
+        sample_size_max=Max('sample_size', filter=known_size),
+    )
+    payload = {
+        'total_datasets': counters['total_datasets'],
+        'sample_size_count': counters['sample_size_count'],
+        'sample_size_sum': counters['sample_size_sum'] or 0,
+        'sample_size_min': counters['sample_size_min'],
+        'sample_size_max': counters['sample_size_max'],
+    }
+    for name, field in DATASET_DISTRIBUTIONS.items():
+        payload[name] = {
+            row[field]: row['count']
+            for row in Dataset.objects.order_by().values(field).annotate(count=Count('id'))
+        }
+    # Publication totals come from the per-year counts, saving a COUNT(*)
+    years = {
+        str(row['year']): row['count']
+        for row in Publication.objects.order_by().values('year').annotate(count=Count('id'))
+    }
+    payload['publication_years'] = years
+    payload['total_publications'] = sum(years.values())
+    return payload
+
+
+def rebuild_snapshot():
+    """Recompute the snapshot from scratch and store it; returns the payload"""
+    payload = compute_snapshot()
+    with transaction.atomic():
+        snapshot, created = AnalyticsSnapshot.objects.select_for_update().get_or_create(
+            id=SNAPSHOT_ID, defaults={'payload': json.dumps(payload), 'version': 1}
+        )
+        if not created:
+            snapshot.payload = json.dumps(payload)
+            snapshot.version += 1
+            snapshot.save(update_fields=['payload', 'version', 'updated_at'])
+    return payload
+
+
+def ensure_snapshot():
+    """Build the snapshot unless it exists (run by the database bootstrap)"""
+    if not AnalyticsSnapshot.objects.filter(id=SNAPSHOT_ID).exists():
+        rebuild_snapshot()
+        print("[OK] Built analytics snapshot")
+
+
+def get_snapshot():
+    """Current snapshot payload, building it if the bootstrap did not"""
+    snapshot = AnalyticsSnapshot.objects.filter(id=SNAPSHOT_ID).only('payload').first()
+    if snapshot is not None:
+        return json.loads(snapshot.payload)
+    try:
+        return rebuild_snapshot()
+    except DatabaseError:
+        # Another request is building it (SQLite: "database is locked"); the
+        # aggregates alone answer this one without writing
+        return compute_snapshot()
+
+
+def record_datasets(datasets):
+    """Fold newly inserted datasets into the snapshot (call after they are saved)"""
+    if not datasets:
+        return
+    with transaction.atomic():
+        snapshot = AnalyticsSnapshot.objects.select_for_update().filter(id=SNAPSHOT_ID).first()
+        if snapshot is None:
+            # Nothing materialized yet; aggregate everything (the new rows are
+            # already saved) so the catalog version still moves
+            rebuild_snapshot()
+            return
+        payload = json.loads(snapshot.payload)
+        for d in datasets:
+            payload['total_datasets'] += 1
+            for name, field in DATASET_DISTRIBUTIONS.items():
+                value = getattr(d, field)
+                payload[name][value] = payload[name].get(value, 0) + 1
+            if d.sample_size:
+                payload['sample_size_count'] += 1
+                payload['sample_size_sum'] += d.sample_size
+                current_min = payload['sample_size_min']
+                current_max = payload['sample_size_max']
+                payload['sample_size_min'] = d.sample_size if current_min is None else min(current_min, d.sample_size)
+                payload['sample_size_max'] = d.sample_size if current_max is None else max(current_max, d.sample_size)
+        snapshot.payload = json.dumps(payload)
+        snapshot.version += 1
+        snapshot.save(update_fields=['payload', 'version', 'updated_at'])
+
+
+def _distribution(counts, key):
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [{key: value, 'count': count} for value, count in ordered]
+
+
+def overview(payload):
+    """Shape a snapshot payload as the analytics overview response"""
+    count = payload['sample_size_count']
+    return {
+        'overview': {
+            'total_datasets': payload['total_datasets'],
+            'total_publications': payload['total_publications'],
+            'avg_sample_size': payload['sample_size_sum'] / count if count else 0,
+            'min_sample_size': payload['sample_size_min'] or 0,
+            'max_sample_size': payload['sample_size_max'] or 0
+        },
+        'disease_distribution': _distribution(payload['disease_distribution'], 'disease_type'),
+        'publication_years': [
+            {'year': int(year), 'count': count}
+            for year, count in sorted(payload['publication_years'].items(), key=lambda item: -int(item[0]))
+        ],
+        'data_accessibility': _distribution(payload['data_accessibility'], 'accessibility'),
+        'wgs_availability': _distribution(payload['wgs_availability'], 'availability')
+    }
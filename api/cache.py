@@ -0,0 +1,213 @@
+"""
+Versioned response cache for read endpoints
+
+The catalog only changes when approve_upload runs, so read endpoints cache
+their JSON bodies under a key made of the view name, its URL arguments, the
+normalized query string and the catalog version. Approving an upload bumps
+the version (stored on the analytics snapshot row), which makes every older
+entry unreachable; TTL and size-bounded eviction clean them up.
+
+Backends (RESPONSE_CACHE):
+- local: in-process LRU with TTL (default, no extra services)
+- redis: shared Django cache via django-redis at REDIS_URL
+- off:   disable caching
+"""
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from django.http import HttpResponse
+
+CACHE_BACKEND = os.environ.get('RESPONSE_CACHE', 'redis' if os.environ.get('REDIS_URL') else 'local')
+CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+
+# How long a process trusts its last read of the catalog version (seconds).
+# Writes made by this process invalidate immediately; other processes within this window.
+VERSION_TTL = float(os.environ.get('RESPONSE_CACHE_VERSION_TTL', 2))
+
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    name = 'local'
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=CACHE_TTL):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class RedisResponseCache:
+    """Django cache (django-redis) shared by all workers; hit/miss counts are per process"""
+
+    name = 'redis'
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self._cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=CACHE_TTL):
+        self._cache.set(key, value, ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        stats = {'backend': self.name, 'hits': self.hits, 'misses': self.misses}
+        try:
+            from django_redis import get_redis_connection
+            info = get_redis_connection('default').info()
+            stats['evictions'] = info.get('evicted_keys')
+            stats['expirations'] = info.get('expired_keys')
+        except Exception:
+            stats['evictions'] = None
+        return stats
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The configured cache backend, or None when caching is off"""
+    global _backend
+    if _backend is None and CACHE_BACKEND != 'off':
+        with _backend_lock:
+            if _backend is None:
+                if CACHE_BACKEND == 'redis':
+                    try:
+                        from django.core.cache import caches
+                        _backend = RedisResponseCache(caches['default'])
+                    except Exception as e:
+                        print(f"Redis response cache unavailable, using local LRU: {e}")
+                        _backend = LocalLRUCache()
+                else:
+                    _backend = LocalLRUCache()
+    return _backend
+
+
+_version = {'value': None, 'read_at': 0.0}
+
+
+def catalog_version():
+    """Current catalog version (analytics snapshot version), re-read at most every VERSION_TTL seconds"""
+    now = time.monotonic()
+    if _version['value'] is None or now - _version['read_at'] > VERSION_TTL:
+        from .models import AnalyticsSnapshot
+        from .analytics import SNAPSHOT_ID
+        _version['value'] = AnalyticsSnapshot.objects.filter(id=SNAPSHOT_ID).values_list(
+            'version', flat=True
+        ).first() or 0
+        _version['read_at'] = now
+    return _version['value']
+
+
+def note_catalog_change():
+    """Forget the memoized catalog version after this process changed the catalog"""
+    _version['value'] = None
+
+
+def make_key(view_name, view_kwargs, params, version):
+    """Cache key from endpoint, URL arguments, normalized query params and catalog version"""
+    query = urlencode(sorted((k, v) for k in params for v in params.getlist(k)))
+    args = ','.join(f'{k}={view_kwargs[k]}' for k in sorted(view_kwargs))
+    return f'resp:v{version}:{view_name}:{args}:{query}'
+
+
+def cached_response(view=None, ttl=CACHE_TTL):
+    """Cache successful JSON responses of a GET view (use below @require_http_methods)"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            backend = get_backend()
+            # Profiled requests (api/profiling.py) must do the real work
+            if backend is None or request.method != 'GET' or getattr(request, 'profiled', False):
+                return view(request, *args, **kwargs)
+
+            key = make_key(view.__name__, kwargs, request.GET, catalog_version())
+            cached = backend.get(key)
+            if cached is not None:
+                content_type, body = cached
+                response = HttpResponse(body, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                backend.set(key, (response['Content-Type'], response.content), ttl)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+
+    if view is not None:
+        return decorator(view)
+    return decorator
+
+
+def cache_stats():
+    """Hit/miss/eviction statistics for the configured backend"""
+    backend = get_backend()
+    if backend is None:
+        return {'backend': 'off'}
+    stats = backend.stats()
+    stats['ttl'] = CACHE_TTL
+    stats['catalog_version'] = _version['value']
+    return stats
@@ -0,0 +1,63 @@
+"""
+Database connection lifecycle for the ADRD Knowledge Graph API
+
+Views never open or close connections themselves. Django's WSGI handler
+already runs ``close_old_connections`` on ``request_started`` and
+``request_finished``; with ``CONN_MAX_AGE`` > 0 and ``CONN_HEALTH_CHECKS``
+enabled that turns each worker thread's connection into a pooled,
+health-checked, periodically recycled connection:
+
+- reused across requests while it is younger than ``CONN_MAX_AGE`` seconds
+- pinged before the first query of a request and replaced if it went stale
+- dropped at the end of a request that raised an unrecoverable DB error
+
+Gunicorn threads each hold one such connection, so the effective pool size
+is ``workers * threads``. Put PgBouncer in front of Postgres if that exceeds
+the server's connection limit.
+"""
+import os
+import dj_database_url
+
+# Seconds a connection may be reused before it is recycled (0 = per request)
+CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+# Managed Postgres (Neon) requires TLS; set DB_SSL_REQUIRE=false for a local server
+SSL_REQUIRE = os.environ.get('DB_SSL_REQUIRE', 'true').lower() not in ('0', 'false', 'no')
+
+# SQLite file used when DATABASE_URL is not set (Vercel only allows /tmp)
+SQLITE_PATH = os.environ.get('SQLITE_PATH', '/tmp/adrd_kg.db')
+
+
+def database_config(database_url=None):
+    """Build the default DATABASES entry from DATABASE_URL or fall back to SQLite"""
+    if database_url:
+        config = dj_database_url.parse(
+            database_url,
+            conn_max_age=CONN_MAX_AGE,
+            conn_health_checks=True,
+            ssl_require=SSL_REQUIRE,
+        )
+    else:
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'OPTIONS': {
+                'timeout': 20,
+            },
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    return config
+
+
+def connection_status():
+    """Describe the current thread's connection (used by the debug endpoint)"""
+    from django.db import connection
+
+    return {
+        'vendor': connection.vendor,
+        'open': connection.connection is not None,
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        'close_at': connection.close_at,
+    }
@@ -4,33 +4,37 @@ Vercel entry point - Minimal Django without django.setup()
 import os
 import sys
 from pathlib import Path
-import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from api.db import database_config
+
 # Determine database settings (Neon/Postgres via DATABASE_URL or fallback to SQLite)
 DATABASE_URL = os.environ.get('DATABASE_URL')
-if DATABASE_URL:
-    default_db_config = dj_database_url.parse(
-        DATABASE_URL,
-        conn_max_age=600,
-        ssl_require=True,
-    )
-else:
-    default_db_config = {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': '/tmp/adrd_kg.db',
-        'OPTIONS': {
-            'timeout': 20,
-        },
-        'CONN_MAX_AGE': 0,
-    }
+default_db_config = database_config(DATABASE_URL)
 
 DB_IS_SQLITE = default_db_config['ENGINE'] == 'django.db.backends.sqlite3'
 
+# A fresh serverless instance has no SQLite file yet: start from the catalog
+# snapshot shipped with the deployment (api/snapshot.py) instead of an empty one
+if DB_IS_SQLITE:
+    from api.snapshot import restore_snapshot
+    restore_snapshot(default_db_config['NAME'])
+
+# Shared cache for read responses when Redis is available (see api/cache.py)
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    cache_config = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+        'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+    }
+else:
+    cache_config = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
 # Import Django and configure manually
 # DO NOT set DJANGO_SETTINGS_MODULE - we'll configure directly
 from django.conf import settings
@@ -49,7 +53,12 @@ if not settings.configured:
         DATABASES={
             'default': default_db_config,
         },
+        CACHES={
+            'default': cache_config,
+        },
         MIDDLEWARE=[
+            'api.metrics.RequestMetricsMiddleware',
+            'api.profiling.ProfilingMiddleware',
             'django.middleware.common.CommonMiddleware',
         ],
         ROOT_URLCONF='api.urls_root',
@@ -69,6 +78,13 @@ if not settings.configured:
 if not apps.ready:
     apps.populate(settings.INSTALLED_APPS)
 
+# Version of the migrations, seed data and backfills that init_database
+# applies. Bump it with every new migration in api/migrations and whenever
+# init_database changes; databases marked with an older version run the full
+# bootstrap (including migrate) once on next start.
+SCHEMA_VERSION = 3
+SCHEMA_MARKER_ID = 1
+
 # Initialize admin users
 def init_admin_users():
     """Ensure initial admin users exist"""
@@ -90,12 +106,90 @@ def init_admin_users():
     except Exception as e:
         print(f"Admin user init warning: {e}")
 
-# Initialize database
+# Databases created before api/migrations existed
+def migrations_recorded(connection, existing_tables):
+    """Whether migrate has run on this database before"""
+    from django.db.migrations.recorder import MigrationRecorder
+    
+    if MigrationRecorder.Migration._meta.db_table not in existing_tables:
+        return False
+    return MigrationRecorder(connection).migration_qs.filter(app='api').exists()
+
+def adopt_unmigrated_schema(connection, existing_tables):
+    """
+    Bring tables built by create_model (before migrations) to the 0001_initial state.
+    
+    Missing tables are created and old ones get the columns and indexes added
+    since, all from the historical models of 0001, so migrate --fake-initial
+    can record 0001 and apply the later migrations for real.
+    """
+    from django.db.migrations.loader import MigrationLoader
+    
+    historical = MigrationLoader(connection).project_state(('api', '0001_initial')).apps
+    with connection.schema_editor() as schema_editor:
+        for model in historical.get_app_config('api').get_models():
+            if model._meta.db_table not in existing_tables:
+                schema_editor.create_model(model)
+                print(f"Created {model._meta.db_table} table")
+    upgrade_schema(connection, historical)
+
+def add_missing_index(connection, schema_editor, model, name):
+    """Create the model's index called name unless the table already has it"""
+    with connection.cursor() as cursor:
+        if name in connection.introspection.get_constraints(cursor, model._meta.db_table):
+            return
+    schema_editor.add_index(model, next(i for i in model._meta.indexes if i.name == name))
+    print(f"Added {name} index")
+
+def upgrade_schema(connection, historical):
+    """Add columns and indexes introduced after the tables were first created (historical models)"""
+    Dataset = historical.get_model('api', 'Dataset')
+    Publication = historical.get_model('api', 'Publication')
+    PendingUpload = historical.get_model('api', 'PendingUpload')
+    ApprovalJob = historical.get_model('api', 'ApprovalJob')
+    from api.links import link_publications
+    from api.staging import stage_legacy_uploads
+    
+    with connection.cursor() as cursor:
+        pub_columns = {c.name for c in connection.introspection.get_table_description(cursor, 'api_publication')}
+        upload_columns = {c.name for c in connection.introspection.get_table_description(cursor, 'api_pendingupload')}
+        dataset_columns = {c.name for c in connection.introspection.get_table_description(cursor, 'api_dataset')}
+        job_columns = {c.name for c in connection.introspection.get_table_description(cursor, 'api_approvaljob')}
+    
+    with connection.schema_editor() as schema_editor:
+        for field in ('row_count', 'column_stats'):
+            if field not in upload_columns:
+                schema_editor.add_field(PendingUpload, PendingUpload._meta.get_field(field))
+                print(f"Added api_pendingupload.{field} column")
+        if 'dataset_id' not in pub_columns:
+            schema_editor.add_field(Publication, Publication._meta.get_field('dataset'))
+            print("Added api_publication.dataset_id column")
+        if 'fingerprint' not in dataset_columns:
+            schema_editor.add_field(Dataset, Dataset._meta.get_field('fingerprint'))
+            print("Added api_dataset.fingerprint column")
+        for field in ('updated_count', 'unchanged_count'):
+            if field not in job_columns:
+                schema_editor.add_field(ApprovalJob, ApprovalJob._meta.get_field(field))
+                print(f"Added api_approvaljob.{field} column")
+        
+        # After the columns: on SQLite add_field rebuilds the table, which
+        # already creates the model's indexes
+        add_missing_index(connection, schema_editor, PendingUpload, 'api_pendingupload_status_idx')
+        add_missing_index(connection, schema_editor, Dataset, 'api_dataset_name_idx')
+    
+    if 'dataset_id' not in pub_columns:
+        print(f"[OK] Linked {link_publications()} publications to their datasets")
+    
+    # Uploads stored before the row table hold their rows in file_content
+    if 'row_count' not in upload_columns:
+        stage_legacy_uploads()
+
+
 def init_database():
     """Initialize database with tables and sample data"""
     try:
         from django.db import connection
-        from api.models import Dataset, Publication, PendingUpload, AdminUser as AdminUserModel
+        from api.models import Dataset, Publication, SchemaVersion
         
         db_settings = settings.DATABASES['default']
         if DB_IS_SQLITE:
@@ -112,123 +206,125 @@ def init_database():
         
         connection.ensure_connection()
         existing_tables = set(connection.introspection.table_names())
-        dataset_table_exists = 'api_dataset' in existing_tables
-        pending_table_exists = 'api_pendingupload' in existing_tables
-        admin_table_exists = 'api_adminuser' in existing_tables
-        pub_table_exists = 'api_publication' in existing_tables
         
-        if not dataset_table_exists or not pending_table_exists or not admin_table_exists or not pub_table_exists:
-            print("Creating tables...")
-            # Create tables manually
-            with connection.schema_editor() as schema_editor:
-                if not dataset_table_exists:
-                    schema_editor.create_model(Dataset)
-                    print("Created api_dataset table")
-                if not pending_table_exists:
-                    schema_editor.create_model(PendingUpload)
-                    print("Created api_pendingupload table")
-                if not admin_table_exists:
-                    schema_editor.create_model(AdminUserModel)
-                    print("Created api_adminuser table")
-                if not pub_table_exists:
-                    schema_editor.create_model(Publication)
-                    print("Created api_publication table")
+        # Databases created before api/migrations have the tables but no migration history
+        if 'api_dataset' in existing_tables and not migrations_recorded(connection, existing_tables):
+            print("Adopting a database created before migrations...")
+            adopt_unmigrated_schema(connection, existing_tables)
+        
+        # Create or upgrade every table; 0001 is only recorded for adopted databases
+        from django.core.management import call_command
+        call_command('migrate', interactive=False, fake_initial=True, verbosity=1)
+        
+        # Only create sample data if database is truly empty (no existing data)
+        # Use a try-except to handle cases where the connection might not be ready
+        try:
+            existing_datasets_count = Dataset.objects.count()
+            existing_publications_count = Publication.objects.count()
+            print(f"Existing data check: {existing_datasets_count} datasets, {existing_publications_count} publications")
+        except Exception as count_error:
+            print(f"Error checking existing data: {count_error}")
+            existing_datasets_count = 0
+            existing_publications_count = 0
+        
+        if existing_datasets_count == 0 and existing_publications_count == 0:
+            print("Database is empty, creating sample data...")
+            # Create sample data
+            datasets = [
+                Dataset(
+                    name="Alzheimer's Disease Neuroimaging Initiative (ADNI)",
+                    description="A large-scale study to validate biomarkers for Alzheimer's disease clinical trials",
+                    disease_type="Alzheimer's Disease",
+                    sample_size=2500,
+                    data_accessibility="Open with application",
+                    wgs_available="Yes",
+                    imaging_types="MRI, PET, DTI",
+                    modalities="MRI, PET, DTI, Clinical, Genetic"
+                ),
+                Dataset(
+                    name="UK Biobank",
+                    description="Large-scale biomedical database with genetic and health information",
+                    disease_type="Multiple Dementia Types",
+                    sample_size=500000,
+                    data_accessibility="Open with application",
+                    wgs_available="Yes",
+                    imaging_types="MRI, fMRI",
+                    modalities="MRI, fMRI, Genetic, EHR"
+                ),
+                Dataset(
+                    name="Religious Orders Study (ROS)",
+                    description="Longitudinal clinical-pathologic cohort study of aging and dementia",
+                    disease_type="Alzheimer's Disease",
+                    sample_size=1200,
+                    data_accessibility="Open",
+                    wgs_available="Yes",
+                    imaging_types="MRI",
+                    modalities="MRI, Clinical, Genetic, Neuropathology"
+                ),
+            ]
+            Dataset.objects.bulk_create(datasets)
+            
+            publications = [
+                Publication(
+                    title="Imaging and biomarkers in Alzheimer's disease",
+                    authors="Mueller SG, et al.",
+                    journal="Neurobiology of Aging",
+                    year=2020,
+                    pmid="32145678",
+                    doi="10.1016/j.neurobiolaging.2020.01.001",
+                    dataset_name="Alzheimer's Disease Neuroimaging Initiative (ADNI)"
+                ),
+                Publication(
+                    title="Genetic risk factors for dementia",
+                    authors="Smith J, et al.",
+                    journal="Nature Genetics",
+                    year=2021,
+                    pmid="33456789",
+                    doi="10.1038/ng.2021.001",
+                    dataset_name="UK Biobank"
+                ),
+                Publication(
+                    title="Neuropathology of aging brain",
+                    authors="Bennett DA, et al.",
+                    journal="Annals of Neurology",
+                    year=2019,
+                    pmid="31234567",
+                    doi="10.1002/ana.25678",
+                    dataset_name="Religious Orders Study (ROS)"
+                ),
+            ]
+            Publication.objects.bulk_create(publications)
             
-            # Only create sample data if database is truly empty (no existing data)
-            # Use a try-except to handle cases where the connection might not be ready
-            try:
-                existing_datasets_count = Dataset.objects.count()
-                existing_publications_count = Publication.objects.count()
-                print(f"Existing data check: {existing_datasets_count} datasets, {existing_publications_count} publications")
-            except Exception as count_error:
-                print(f"Error checking existing data: {count_error}")
-                existing_datasets_count = 0
-                existing_publications_count = 0
+            from api.links import link_publications
+            link_publications()
             
-            if existing_datasets_count == 0 and existing_publications_count == 0:
-                print("Database is empty, creating sample data...")
-                # Create sample data
-                datasets = [
-                    Dataset(
-                        name="Alzheimer's Disease Neuroimaging Initiative (ADNI)",
-                        description="A large-scale study to validate biomarkers for Alzheimer's disease clinical trials",
-                        disease_type="Alzheimer's Disease",
-                        sample_size=2500,
-                        data_accessibility="Open with application",
-                        wgs_available="Yes",
-                        imaging_types="MRI, PET, DTI",
-                        modalities="MRI, PET, DTI, Clinical, Genetic"
-                    ),
-                    Dataset(
-                        name="UK Biobank",
-                        description="Large-scale biomedical database with genetic and health information",
-                        disease_type="Multiple Dementia Types",
-                        sample_size=500000,
-                        data_accessibility="Open with application",
-                        wgs_available="Yes",
-                        imaging_types="MRI, fMRI",
-                        modalities="MRI, fMRI, Genetic, EHR"
-                    ),
-                    Dataset(
-                        name="Religious Orders Study (ROS)",
-                        description="Longitudinal clinical-pathologic cohort study of aging and dementia",
-                        disease_type="Alzheimer's Disease",
-                        sample_size=1200,
-                        data_accessibility="Open",
-                        wgs_available="Yes",
-                        imaging_types="MRI",
-                        modalities="MRI, Clinical, Genetic, Neuropathology"
-                    ),
-                ]
-                Dataset.objects.bulk_create(datasets)
-                
-                publications = [
-                    Publication(
-                        title="Imaging and biomarkers in Alzheimer's disease",
-                        authors="Mueller SG, et al.",
-                        journal="Neurobiology of Aging",
-                        year=2020,
-                        pmid="32145678",
-                        doi="10.1016/j.neurobiolaging.2020.01.001",
-                        dataset_name="Alzheimer's Disease Neuroimaging Initiative (ADNI)"
-                    ),
-                    Publication(
-                        title="Genetic risk factors for dementia",
-                        authors="Smith J, et al.",
-                        journal="Nature Genetics",
-                        year=2021,
-                        pmid="33456789",
-                        doi="10.1038/ng.2021.001",
-                        dataset_name="UK Biobank"
-                    ),
-                    Publication(
-                        title="Neuropathology of aging brain",
-                        authors="Bennett DA, et al.",
-                        journal="Annals of Neurology",
-                        year=2019,
-                        pmid="31234567",
-                        doi="10.1002/ana.25678",
-                        dataset_name="Religious Orders Study (ROS)"
-                    ),
-                ]
-                Publication.objects.bulk_create(publications)
-                
-                print(f"[OK] Created {len(datasets)} datasets and {len(publications)} publications")
-            else:
-                print(f"[OK] Database already has data ({existing_datasets_count} datasets, {existing_publications_count} publications), skipping sample data creation")
+            print(f"[OK] Created {len(datasets)} datasets and {len(publications)} publications")
         else:
-            # Tables exist, check if we need to ensure admin users exist
-            try:
-                existing_datasets_count = Dataset.objects.count()
-                existing_publications_count = Publication.objects.count()
-                print(f"[OK] Database tables already exist ({existing_datasets_count} datasets, {existing_publications_count} publications)")
-            except Exception as e:
-                print(f"Error counting existing data: {e}")
-                print("[OK] Database tables already exist")
+            print(f"[OK] Database already has data ({existing_datasets_count} datasets, {existing_publications_count} publications), skipping sample data creation")
+        
+        # Full-text search index (no-op when it already exists)
+        from api.search import ensure_search_index
+        ensure_search_index()
+        
+        # Fingerprints of datasets saved without one (sample data, older rows)
+        from api.ingest import backfill_fingerprints
+        backfill_fingerprints()
+        
+        # Modality / imaging / disease tag index for rows that predate it
+        from api.tags import backfill_tags
+        backfill_tags()
+        
+        # Materialize the analytics snapshot so first reads never race to build it
+        from api.analytics import ensure_snapshot
+        ensure_snapshot()
         
         # Always ensure admin users exist (even if tables already existed)
         init_admin_users()
         
+        # Later cold starts skip everything above while the version matches
+        SchemaVersion.objects.update_or_create(id=SCHEMA_MARKER_ID, defaults={'version': SCHEMA_VERSION})
+        print(f"[OK] Database bootstrapped at schema version {SCHEMA_VERSION}")
+        
     except Exception as e:
         print(f"DB init warning: {e}")
         import traceback
@@ -237,26 +333,40 @@ def init_database():
 # Initialize database - but only once, use a flag to prevent multiple initializations
 _db_initialized = False
 
+def schema_is_current():
+    """Whether this database was bootstrapped at SCHEMA_VERSION (one primary-key lookup)"""
+    from django.db import DatabaseError
+    from api.models import SchemaVersion
+    
+    if os.environ.get('FORCE_DB_BOOTSTRAP', '').lower() in ('1', 'true', 'yes'):
+        return False
+    try:
+        version = SchemaVersion.objects.filter(id=SCHEMA_MARKER_ID).values_list('version', flat=True).first()
+    except DatabaseError:
+        # Marker table missing: a database from before the marker, or an empty one
+        return False
+    return version is not None and version >= SCHEMA_VERSION
+
 def ensure_database_initialized():
-    """Ensure database is initialized, but only do it once per process"""
+    """Bootstrap the database once per process, skipping it when the schema marker is current"""
     global _db_initialized
     if _db_initialized:
         return
     
     try:
-        init_database()
-        # Also ensure admin users exist (in case database was already initialized)
-        init_admin_users()
+        if schema_is_current():
+            print(f"[OK] Schema version {SCHEMA_VERSION} is current, skipping database bootstrap")
+        else:
+            init_database()
+        
+        # Approvals left queued (or orphaned) by a previous process
+        from api.jobs import resume_queued
+        resume_queued()
         _db_initialized = True
     except Exception as e:
         print(f"DB init error: {e}")
         import traceback
         traceback.print_exc()
-        # Try to initialize admin users even if database init failed
-        try:
-            init_admin_users()
-        except:
-            pass
 
 # Initialize database on module load (only runs once per serverless function instance)
 ensure_database_initialized()
@@ -0,0 +1,332 @@
+"""
+Batched upsert pipeline for approved uploads
+
+Spreadsheet headers are matched to Dataset fields once per upload
+(resolve_columns), and the mapping is applied to each chunk of staged rows
+at once with pandas (mapped_rows). upsert_datasets then validates every row
+up front and writes the valid ones in chunks of APPROVE_BATCH_SIZE.
+
+Each dataset carries a content fingerprint (normalized name and disease
+type) in a unique column. A chunk's fingerprints are looked up in one
+query to classify rows as new, changed or unchanged, and the new and
+changed ones are written with a single
+``bulk_create(update_conflicts=True)``, so approving the same file twice
+adds nothing. A chunk the database rejects is retried row by row under
+savepoints, so one bad row is reported as an error instead of aborting
+the batch.
+
+pandas is imported by the functions that use it, so importing this module
+(as every web process does through api.jobs) stays cheap.
+"""
+import hashlib
+import os
+import time
+from django.db import DatabaseError, transaction
+from .models import Dataset
+
+# Rows per bulk INSERT
+APPROVE_BATCH_SIZE = int(os.environ.get('APPROVE_BATCH_SIZE', 1000))
+
+DATASET_FIELDS = [
+    'name', 'description', 'disease_type', 'sample_size',
+    'data_accessibility', 'wgs_available', 'imaging_types', 'modalities',
+]
+
+# Dataset field -> spreadsheet headers that may hold it, in order of preference
+FIELD_ALIASES = {
+    'name': ['Dataset Name', 'name', 'dataset_name', 'Dataset', 'Title'],
+    'description': ['Description', 'description', 'desc', 'Summary'],
+    'disease_type': ['Disease Type', 'disease_type', 'disease', 'Disease', 'Type'],
+    'sample_size': ['Sample Size', 'sample_size', 'n', 'N', 'size'],
+    'data_accessibility': ['Data Accessibility', 'data_accessibility', 'Accessibility', 'access', 'Access'],
+    'wgs_available': ['WGS Available', 'wgs_available', 'WGS', 'wgs', 'WGS Available?'],
+    'imaging_types': ['Imaging Types', 'imaging_types', 'Imaging', 'imaging'],
+    'modalities': ['Modalities', 'modalities', 'Modality', 'modality', 'Data Types'],
+}
+
+# Fields that identify a dataset across uploads (see fingerprint); their
+# first spelling is kept, later uploads only update the other fields
+FINGERPRINT_FIELDS = ('name', 'disease_type')
+UPSERT_FIELDS = [field for field in DATASET_FIELDS if field not in FINGERPRINT_FIELDS]
+
+# Value used when a field has no column or the cell is empty
+FIELD_DEFAULTS = {'sample_size': '0'}
+
+# First number in a cell, after thousands separators are removed ("2,500.0" -> 2500.0)
+_NUMBER = r'(-?\d+(?:\.\d+)?)'
+
+# IntegerField range on Postgres (SQLite would accept more, but keep data portable)
+INTEGER_MIN = -2 ** 31
+INTEGER_MAX = 2 ** 31 - 1
+
+_MAX_LENGTHS = {
+    field.name: field.max_length
+    for field in Dataset._meta.concrete_fields
+    if field.name in DATASET_FIELDS and getattr(field, 'max_length', None)
+}
+
+
+def _normalize_header(header):
+    return str(header).lower().replace(' ', '').replace('_', '').replace('-', '').replace('.', '').strip()
+
+
+def resolve_columns(columns):
+    """
+    Map each Dataset field to the source column holding it (None if absent).
+
+    Every field is tried by exact header match first, then by normalized
+    header (case, spaces, underscores, hyphens and dots ignored), then by
+    normalized substring in either direction. Looser passes only consider
+    columns no other field has claimed.
+    """
+    mapping = dict.fromkeys(FIELD_ALIASES)
+    normalized = {}
+    for column in columns:
+        key = _normalize_header(column)
+        if key:
+            normalized.setdefault(key, column)
+
+    for field, aliases in FIELD_ALIASES.items():
+        mapping[field] = next((alias for alias in aliases if alias in columns), None)
+
+    def unclaimed(column):
+        return column not in mapping.values()
+
+    for field, aliases in FIELD_ALIASES.items():
+        if mapping[field] is None:
+            mapping[field] = next(
+                (normalized[key] for key in map(_normalize_header, aliases)
+                 if key in normalized and unclaimed(normalized[key])),
+                None,
+            )
+    for field, aliases in FIELD_ALIASES.items():
+        if mapping[field] is None:
+            mapping[field] = next(
+                (column for alias in map(_normalize_header, aliases)
+                 for key, column in normalized.items()
+                 if (alias in key or key in alias) and unclaimed(column)),
+                None,
+            )
+    return mapping
+
+
+def _text_column(series, default):
+    """Stripped text of a column; empty cells (None, NaN, '', 0) become default"""
+    blank = series.isna() | series.isin(['', 0])
+    return series.astype(str).str.strip().where(~blank, default)
+
+
+def _sample_sizes(text):
+    """Parse sample sizes as whole numbers ("2500.0" -> 2500, "1,200" -> 1200, "n/a" -> 0)"""
+    import pandas as pd
+
+    numbers = pd.to_numeric(
+        text.str.replace(',', '', regex=False).str.extract(_NUMBER, expand=False),
+        errors='coerce',
+    )
+    return numbers.fillna(0).round().astype('int64')
+
+
+def mapped_rows(records, mapping, start=1):
+    """(row_number, Dataset field values) for every record, using a resolve_columns mapping"""
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records)
+    fields = {}
+    for field in FIELD_ALIASES:
+        default = FIELD_DEFAULTS.get(field, '')
+        column = mapping.get(field)
+        if column is None or column not in frame:
+            fields[field] = pd.Series(default, index=frame.index, dtype=object)
+        else:
+            fields[field] = _text_column(frame[column], default)
+    fields['sample_size'] = _sample_sizes(fields['sample_size'])
+    return list(enumerate(pd.DataFrame(fields).to_dict('records'), start=start))
+
+
+def validate(values):
+    """Problems that would stop one row's values from being inserted (empty if none)"""
+    problems = []
+    if not values.get('name'):
+        problems.append('Missing dataset name')
+    for field, limit in _MAX_LENGTHS.items():
+        if len(values.get(field) or '') > limit:
+            problems.append(f'{field} is longer than {limit} characters')
+    if not INTEGER_MIN <= values.get('sample_size', 0) <= INTEGER_MAX:
+        problems.append(f"Sample size {values['sample_size']} is out of range")
+    return problems
+
+
+def fingerprint(values):
+    """Content fingerprint identifying a dataset: sha256 of its normalized name and disease type"""
+    key = '\x1f'.join(' '.join(str(values.get(field) or '').split()).lower() for field in FINGERPRINT_FIELDS)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints():
+    """
+    Fingerprint datasets that predate the column (idempotent).
+
+    When several rows share a fingerprint only the oldest gets it; the
+    others keep NULL (the unique index allows that) and are reported.
+    """
+    missing = Dataset.objects.filter(fingerprint__isnull=True)
+    if not missing.exists():
+        return 0
+    taken = set(Dataset.objects.filter(fingerprint__isnull=False).values_list('fingerprint', flat=True))
+    duplicates = []
+    chunk = []
+    total = 0
+    with transaction.atomic():
+        for dataset in missing.order_by('id').only('id', *FINGERPRINT_FIELDS).iterator(chunk_size=APPROVE_BATCH_SIZE):
+            fp = fingerprint({field: getattr(dataset, field) for field in FINGERPRINT_FIELDS})
+            if fp in taken:
+                duplicates.append(dataset.id)
+                continue
+            taken.add(fp)
+            dataset.fingerprint = fp
+            chunk.append(dataset)
+            if len(chunk) >= APPROVE_BATCH_SIZE:
+                Dataset.objects.bulk_update(chunk, ['fingerprint'])
+                total += len(chunk)
+                chunk = []
+        Dataset.objects.bulk_update(chunk, ['fingerprint'])
+        total += len(chunk)
+    if total:
+        print(f"[OK] Fingerprinted {total} datasets")
+    if duplicates:
+        print(f"Found {len(duplicates)} duplicate datasets (left without fingerprint): ids {duplicates[:20]}")
+    return total
+
+
+class IngestResult:
+    """Inserted and updated datasets, per-row errors and throughput of one upsert_datasets call"""
+
+    def __init__(self):
+        self.datasets = []  # Inserted
+        self.updated = []  # Changed in place
+        self.updated_count = 0  # Rows that changed an existing dataset
+        self.unchanged = 0
+        self.errors = []
+        self.rows = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return round(self.rows / self.elapsed, 1) if self.elapsed else None
+
+    def add_error(self, row_number, message):
+        self.errors.append(f'Row {row_number}: {message}')
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'added_count': len(self.datasets),
+            'updated_count': self.updated_count,
+            'unchanged_count': self.unchanged,
+            'error_count': len(self.errors),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': self.rows_per_second,
+        }
+
+
+def _classify(chunk, existing, result):
+    """
+    Fingerprint -> final values and kind ('inserted' or 'updated') for rows that change the catalog.
+
+    Rows identical to the stored dataset (or to an earlier row of the chunk)
+    are only counted as unchanged.
+    """
+    pending = {}
+    for row_number, values in chunk:
+        fp = fingerprint(values)
+        current = pending[fp]['values'] if fp in pending else existing.get(fp)
+        if current is not None and all(current[field] == values[field] for field in UPSERT_FIELDS):
+            result.unchanged += 1
+            continue
+        entry = pending.setdefault(fp, {'kind': 'updated' if fp in existing else 'inserted', 'rows': 0})
+        entry['values'] = values
+        entry['row_number'] = row_number
+        entry['rows'] += 1
+    return pending
+
+
+def _record(result, entry, dataset):
+    if entry['kind'] == 'inserted':
+        result.datasets.append(dataset)
+        # Later rows of the chunk that changed the new dataset again count as updates
+        result.updated_count += entry['rows'] - 1
+    else:
+        result.updated.append(dataset)
+        result.updated_count += entry['rows']
+
+
+def _upsert_chunk(chunk, result):
+    # One set-based lookup of the stored versions of every fingerprint in the chunk
+    fingerprints = {fingerprint(values) for _, values in chunk}
+    existing = {
+        row['fingerprint']: row
+        for row in Dataset.objects.filter(fingerprint__in=fingerprints).values('id', 'fingerprint', *DATASET_FIELDS)
+    }
+    pending = _classify(chunk, existing, result)
+    if not pending:
+        return
+    objects = {fp: Dataset(fingerprint=fp, **entry['values']) for fp, entry in pending.items()}
+    try:
+        with transaction.atomic():
+            Dataset.objects.bulk_create(
+                list(objects.values()),
+                update_conflicts=True,
+                unique_fields=['fingerprint'],
+                update_fields=UPSERT_FIELDS,
+            )
+            # Upserts do not return primary keys; the derived indexes need them
+            ids = dict(Dataset.objects.filter(fingerprint__in=list(objects)).values_list('fingerprint', 'id'))
+        for fp, obj in objects.items():
+            obj.pk = ids[fp]
+            _record(result, pending[fp], obj)
+        return
+    except DatabaseError:
+        pass
+
+    # Isolate the rows the database rejected
+    for fp, obj in objects.items():
+        entry = pending[fp]
+        try:
+            with transaction.atomic():
+                if entry['kind'] == 'inserted':
+                    obj.pk = None
+                    obj.save(force_insert=True)
+                else:
+                    obj.pk = existing[fp]['id']
+                    obj.save(update_fields=UPSERT_FIELDS)
+            _record(result, entry, obj)
+        except DatabaseError as e:
+            result.add_error(entry['row_number'], f'Database error - {e}')
+
+
+def upsert_datasets(rows, batch_size=None, result=None):
+    """
+    Validate and upsert (row_number, values) pairs by fingerprint, batch_size rows per statement.
+
+    New datasets are inserted, changed ones updated in place and identical
+    ones skipped. Run inside transaction.atomic(). Returns an IngestResult;
+    pass result to keep collecting into one that already holds errors from
+    earlier stages.
+    """
+    result = result or IngestResult()
+    batch_size = batch_size or APPROVE_BATCH_SIZE
+    started = time.perf_counter()
+    valid = []
+    for row_number, values in rows:
+        result.rows += 1
+        problems = validate(values)
+        if problems:
+            result.add_error(row_number, '; '.join(problems))
+        else:
+            valid.append((row_number, values))
+
+    for start in range(0, len(valid), batch_size):
+        _upsert_chunk(valid[start:start + batch_size], result)
+    result.elapsed += time.perf_counter() - started
+    return result
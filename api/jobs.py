@@ -0,0 +1,264 @@
+"""
+Database-backed job queue for upload approvals
+
+approve_upload only records an ApprovalJob and returns its id. A worker
+claims queued jobs with a conditional UPDATE (so two workers never run the
+same job) and ingests the upload's staged rows in batches of
+APPROVE_BATCH_SIZE. Each batch commits its datasets, analytics, tags,
+publication links and the job's progress together, so GET
+/management/jobs/<id> shows live progress, and a job interrupted by a
+crash resumes after its last committed batch instead of starting over.
+
+Workers:
+  - inline (default on Vercel): approve_upload claims and runs the job before
+    it responds. A serverless instance is frozen once its response is sent,
+    so work left to background threads would stall until a later request
+    thawed it, and could outlive its stale-heartbeat requeue.
+  - thread (default elsewhere): a thread pool inside the web process, woken
+    on enqueue
+  - external: jobs are only queued; run ``python manage.py run_approval_worker``
+"""
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from . import analytics, ingest, links, staging, tags
+from .cache import note_catalog_change
+from .models import ApprovalJob, PendingUpload
+
+JOB_STATUSES = [value for value, _ in ApprovalJob.STATUS_CHOICES]
+ACTIVE_STATUSES = ('queued', 'running')
+
+# inline | thread | external (see module docstring); Vercel sets VERCEL in its functions
+APPROVAL_WORKER = os.environ.get('APPROVAL_WORKER') or ('inline' if os.environ.get('VERCEL') else 'thread')
+APPROVAL_WORKER_THREADS = int(os.environ.get('APPROVAL_WORKER_THREADS', 1))
+
+# A running job whose heartbeat is older than this is assumed dead and requeued
+JOB_STALE_SECONDS = int(os.environ.get('APPROVAL_JOB_STALE_SECONDS', 300))
+
+# Row errors kept on the job (error_count always has the full number)
+JOB_MAX_ERRORS = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def enqueue_approval(upload, review_notes='', reviewed_by='admin', wake=True):
+    """Queue an approval of upload (or return the one already queued or running)"""
+    active = upload.jobs.filter(status__in=ACTIVE_STATUSES).first()
+    if active:
+        return active
+    job = ApprovalJob.objects.create(
+        upload=upload,
+        review_notes=review_notes,
+        reviewed_by=reviewed_by,
+        total_rows=upload.row_count,
+    )
+    if wake and APPROVAL_WORKER == 'thread':
+        # Start only after the enqueueing request's transaction (if any) commits
+        transaction.on_commit(wake_worker)
+    return job
+
+
+def wake_worker():
+    """Have the in-process thread pool drain the queue"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=APPROVAL_WORKER_THREADS, thread_name_prefix='approval')
+    _executor.submit(_drain_in_thread)
+
+
+def _drain_in_thread():
+    try:
+        run_pending()
+    except Exception:
+        traceback.print_exc()
+    finally:
+        close_old_connections()
+
+
+def resume_queued():
+    """On web startup: requeue stale jobs and, with the thread worker, pick up queued ones"""
+    if APPROVAL_WORKER == 'external':
+        return
+    requeued = requeue_stale()
+    if requeued:
+        print(f"Requeued {requeued} stale approval job(s)")
+    # Inline: a requeued job resumes when its upload is approved again
+    if APPROVAL_WORKER == 'thread' and ApprovalJob.objects.filter(status='queued').exists():
+        wake_worker()
+
+
+def claim_next(worker=None):
+    """Mark the oldest queued job running for this worker and return it (None if the queue is empty)"""
+    while True:
+        job_id = ApprovalJob.objects.filter(status='queued').order_by('created_at', 'id').values_list(
+            'id', flat=True
+        ).first()
+        if job_id is None:
+            return None
+        job = _claim(job_id, worker)
+        if job is not None:
+            return job
+        # Another worker claimed it first; try the next one
+
+
+def _claim(job_id, worker=None):
+    claimed = ApprovalJob.objects.filter(id=job_id, status='queued').update(
+        status='running', worker=worker or worker_name(), started_at=timezone.now(), updated_at=timezone.now()
+    )
+    return ApprovalJob.objects.get(id=job_id) if claimed else None
+
+
+def run_inline(job):
+    """Claim a queued job and run it in the calling thread (inline worker, profiled requests); returns the job"""
+    claimed = _claim(job.id)
+    return run_job(claimed) if claimed is not None else job
+
+
+def requeue_stale(stale_seconds=None):
+    """Requeue running jobs whose worker stopped sending heartbeats; returns how many"""
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds or JOB_STALE_SECONDS)
+    return ApprovalJob.objects.filter(status='running', updated_at__lt=cutoff).update(status='queued', worker='')
+
+
+def run_pending(batch_size=None, worker=None):
+    """Process queued jobs until none are left; returns the number processed"""
+    processed = 0
+    while True:
+        job = claim_next(worker)
+        if job is None:
+            return processed
+        run_job(job, batch_size)
+        processed += 1
+
+
+def _save_progress(job, result, processed_rows):
+    job.processed_rows = processed_rows
+    job.added_count += len(result.datasets)
+    job.updated_count += result.updated_count
+    job.unchanged_count += result.unchanged
+    job.error_count += len(result.errors)
+    if result.errors:
+        errors = json.loads(job.errors) if job.errors else []
+        job.errors = json.dumps((errors + result.errors)[:JOB_MAX_ERRORS])
+    job.save(update_fields=[
+        'processed_rows', 'added_count', 'updated_count', 'unchanged_count', 'error_count', 'errors', 'updated_at'
+    ])
+
+
+def run_job(job, batch_size=None):
+    """Ingest a claimed job's remaining rows batch by batch, then mark the upload approved"""
+    batch_size = batch_size or ingest.APPROVE_BATCH_SIZE
+    try:
+        upload = PendingUpload.objects.defer('file_content').get(id=job.upload_id)
+        column_mapping = ingest.resolve_columns(staging.columns(upload))
+        job.total_rows = upload.row_count
+        job.column_mapping = json.dumps(column_mapping)
+        job.save(update_fields=['total_rows', 'column_mapping', 'updated_at'])
+        print(f"Job {job.id}: approving upload {upload.id} ({upload.row_count} rows) "
+              f"from row {job.processed_rows}, mapping {column_mapping}")
+
+        for start, records in staging.iter_row_chunks(upload.id, batch_size, start=job.processed_rows):
+            with transaction.atomic():
+                result = ingest.upsert_datasets(
+                    ingest.mapped_rows(records, column_mapping, start=start + 1), batch_size
+                )
+                # Analytics snapshot (bumps the catalog version); updated rows may
+                # move values between buckets, which only a rebuild can undo
+                if result.updated:
+                    analytics.rebuild_snapshot()
+                else:
+                    analytics.record_datasets(result.datasets)
+                # Tag index and publication links
+                tags.tag_datasets(result.datasets)
+                tags.retag_datasets(result.updated)
+                if result.datasets:
+                    links.link_publications([d.name for d in result.datasets])
+                _save_progress(job, result, start + len(records))
+            note_catalog_change()
+
+        with transaction.atomic():
+            upload.status = 'approved'
+            upload.review_notes = job.review_notes
+            upload.reviewed_by = job.reviewed_by
+            upload.reviewed_at = timezone.now()
+            upload.save(update_fields=['status', 'review_notes', 'reviewed_by', 'reviewed_at'])
+            job.status = 'succeeded'
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'finished_at', 'updated_at'])
+        progress = job_progress(job)
+        print(f"Job {job.id}: approved upload {upload.id}: {job.added_count} added, {job.updated_count} updated, "
+              f"{job.unchanged_count} unchanged, {job.error_count} errors "
+              f"in {progress['elapsed_seconds']}s ({progress['rows_per_second']} rows/sec)")
+    except Exception as e:
+        print(f"Job {job.id} failed: {e}")
+        traceback.print_exc()
+        job.status = 'failed'
+        job.message = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+    return job
+
+
+def job_progress(job):
+    """Progress of a job as returned by the jobs endpoint: counts, rate and ETA"""
+    elapsed = None
+    rate = None
+    eta = None
+    if job.started_at:
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        if elapsed > 0 and job.processed_rows:
+            rate = job.processed_rows / elapsed
+        if job.status == 'running' and rate:
+            eta = (job.total_rows - job.processed_rows) / rate
+        elif job.status == 'succeeded':
+            eta = 0
+    return {
+        'id': job.id,
+        'upload_id': job.upload_id,
+        'status': job.status,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'percent': round(100 * job.processed_rows / job.total_rows, 1) if job.total_rows else None,
+        'added_count': job.added_count,
+        'updated_count': job.updated_count,
+        'unchanged_count': job.unchanged_count,
+        'error_count': job.error_count,
+        'errors': json.loads(job.errors) if job.errors else [],
+        'column_mapping': json.loads(job.column_mapping) if job.column_mapping else {},
+        'message': job.message,
+        'elapsed_seconds': round(elapsed, 3) if elapsed is not None else None,
+        'rows_per_second': round(rate, 1) if rate else None,
+        'eta_seconds': round(eta, 1) if eta is not None else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def work_forever(poll_interval=2.0, batch_size=None, once=False):
+    """Loop of the external worker: requeue stale jobs, drain the queue, sleep"""
+    worker = worker_name()
+    print(f"Approval worker {worker} started")
+    while True:
+        requeued = requeue_stale()
+        if requeued:
+            print(f"Requeued {requeued} stale approval job(s)")
+        processed = run_pending(batch_size, worker)
+        close_old_connections()
+        if once:
+            return processed
+        if not processed:
+            time.sleep(poll_interval)
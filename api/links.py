@@ -0,0 +1,89 @@
+"""
+Publication -> Dataset links
+
+Publications name their dataset in free text (``dataset_name``). The
+``Publication.dataset`` foreign key is resolved from that name with set-based
+UPDATEs: once for existing rows when the column is added, for new sample
+data, and after approve_upload for publications naming the new datasets.
+Reads then join on the indexed FK instead of comparing strings.
+"""
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Lower
+from .models import Dataset, Publication
+
+# Values accepted by the ?include= parameter of dataset list endpoints
+INCLUDE_OPTIONS = ('publications', 'publication_count')
+
+# Publication fields embedded in dataset responses
+EMBEDDED_PUBLICATION_FIELDS = ['id', 'title', 'authors', 'journal', 'year', 'pmid', 'doi', 'dataset_id']
+
+
+def link_publications(dataset_names=None):
+    """
+    Point unlinked publications at the dataset they name; returns rows linked.
+
+    Exact name matches are resolved first, then case-insensitive ones. Pass
+    dataset_names to only consider publications naming those datasets.
+    """
+    unlinked = Publication.objects.filter(dataset__isnull=True).exclude(dataset_name='')
+    if dataset_names is not None:
+        unlinked = unlinked.alias(name_key=Lower('dataset_name')).filter(
+            name_key__in={name.lower() for name in dataset_names}
+        )
+
+    linked = 0
+    for lookup in ('name', 'name__iexact'):
+        candidates = Dataset.objects.filter(**{lookup: OuterRef('dataset_name')}).order_by('id')
+        # Only rows with a match are touched, so unresolved names stay NULL
+        linked += unlinked.filter(Exists(candidates)).update(dataset_id=Subquery(candidates.values('id')[:1]))
+    return linked
+
+
+def parse_include(value):
+    """Set of embed options from a comma-separated ?include= value"""
+    options = {part.strip() for part in (value or '').split(',') if part.strip()}
+    unknown = options - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise ValueError(f"Invalid include '{', '.join(sorted(unknown))}'. Use any of: {', '.join(INCLUDE_OPTIONS)}")
+    return options
+
+
+def publication_counts(dataset_ids):
+    """dataset id -> number of linked publications, in one grouped query"""
+    return dict(
+        Publication.objects.filter(dataset_id__in=dataset_ids)
+        .order_by()
+        .values_list('dataset_id')
+        .annotate(count=Count('id'))
+    )
+
+
+def embed_publications(datasets, include):
+    """
+    Related data for a page of datasets, keyed by dataset id.
+
+    Costs one query per requested option regardless of page size.
+    """
+    embedded = {d.id: {} for d in datasets}
+    if not datasets or not include:
+        return embedded
+    ids = list(embedded)
+    if 'publications' in include:
+        grouped = {dataset_id: [] for dataset_id in ids}
+        for p in Publication.objects.filter(dataset_id__in=ids).only(*EMBEDDED_PUBLICATION_FIELDS):
+            grouped[p.dataset_id].append({
+                'id': p.id,
+                'title': p.title,
+                'authors': p.authors,
+                'journal': p.journal,
+                'year': p.year,
+                'pmid': p.pmid,
+                'doi': p.doi
+            })
+        for dataset_id, publications in grouped.items():
+            embedded[dataset_id]['publications'] = publications
+    if 'publication_count' in include:
+        counts = publication_counts(ids)
+        for dataset_id in ids:
+            embedded[dataset_id]['publication_count'] = counts.get(dataset_id, 0)
+    return embedded
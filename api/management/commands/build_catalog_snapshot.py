@@ -0,0 +1,114 @@
+"""
+Regenerate the catalog snapshot restored into fresh SQLite databases
+
+Run against the canonical database after approvals, then deploy the
+updated api/data/catalog.sqlite3.gz (see api/snapshot.py).
+
+--load-datasets / --load-publications first ingest catalog files into the
+configured database: a metadata spreadsheet goes through the same pipeline
+as an approved upload, a reference list (Dataset, PMID, Title, Journal, Year
+columns, as in pubmed_refs_fetched.csv) is added as publications. The
+shipped snapshot is built that way from a scratch database:
+
+    SQLITE_PATH=/tmp/catalog_build.db CATALOG_SNAPSHOT_PATH= \\
+        python manage.py build_catalog_snapshot --output api/data/catalog.sqlite3.gz \\
+        --load-datasets ADRD_Metadata_Sample_Big.xlsx --load-publications pubmed_refs_fetched.csv
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from api import snapshot
+
+
+def load_datasets(path):
+    """Ingest a metadata spreadsheet as approve_upload would; returns the IngestResult"""
+    from api import analytics, ingest, links, tags, uploads
+
+    file_type = uploads.file_type_of(path)
+    if file_type not in uploads.UPLOAD_TYPES:
+        raise CommandError(f'{path}: unsupported file type {file_type!r}')
+    with open(path, 'rb') as handle:
+        records = list(uploads.iter_file_rows(handle, file_type))
+    if not records:
+        raise CommandError(f'{path}: no rows')
+    mapping = ingest.resolve_columns(list(records[0]))
+    with transaction.atomic():
+        result = ingest.upsert_datasets(ingest.mapped_rows(records, mapping))
+        tags.tag_datasets(result.datasets)
+        tags.retag_datasets(result.updated)
+        links.link_publications()
+        analytics.rebuild_snapshot()
+    return result
+
+
+def load_publications(path):
+    """Add the references of a PubMed reference list not already in the catalog; returns how many"""
+    from api import analytics, links
+    from api.models import Publication
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+    known = set(Publication.objects.exclude(pmid='').values_list('pmid', flat=True))
+    publications = []
+    for row in rows:
+        pmid = (row.get('PMID') or '').strip()
+        if not pmid or pmid in known:
+            continue
+        known.add(pmid)
+        publications.append(Publication(
+            title=row.get('Title', '').strip()[:1000],
+            journal=row.get('Journal', '').strip()[:500],
+            year=int(row['Year']) if (row.get('Year') or '').strip().isdigit() else 0,
+            pmid=pmid,
+            dataset_name=row.get('Dataset', '').strip()[:500],
+        ))
+    with transaction.atomic():
+        Publication.objects.bulk_create(publications, batch_size=1000)
+        links.link_publications()
+        analytics.rebuild_snapshot()
+    return len(publications)
+
+
+class Command(BaseCommand):
+    help = 'Build a compressed SQLite image of the catalog for new instances to start from'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='SQLite database to snapshot (default: the configured database)')
+        parser.add_argument('--output', help=f'snapshot file; .gz is compressed (default {snapshot.SNAPSHOT_PATH})')
+        parser.add_argument('--load-datasets', metavar='FILE',
+                            help='ingest a metadata spreadsheet (csv/xlsx) into the configured database first')
+        parser.add_argument('--load-publications', metavar='CSV',
+                            help='add the publications of a PubMed reference list to the configured database first')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if (options['load_datasets'] or options['load_publications']) and source:
+            raise CommandError('--load-* options load into the configured database; they cannot be used with --source')
+        if not source:
+            if connection.vendor != 'sqlite':
+                raise CommandError(
+                    f'Snapshots are SQLite images; the configured database is {connection.vendor}. '
+                    'Pass --source with a SQLite copy of the catalog.'
+                )
+            source = connection.settings_dict['NAME']
+        output = options['output'] or snapshot.SNAPSHOT_PATH
+        if not output:
+            raise CommandError('No output path: pass --output or set CATALOG_SNAPSHOT_PATH')
+
+        if options['load_datasets']:
+            result = load_datasets(options['load_datasets'])
+            self.stdout.write(
+                f"Loaded {options['load_datasets']}: {len(result.datasets)} added, {len(result.updated)} updated, "
+                f"{result.unchanged} unchanged, {len(result.errors)} errors"
+            )
+        if options['load_publications']:
+            added = load_publications(options['load_publications'])
+            self.stdout.write(f"Loaded {options['load_publications']}: {added} publications added")
+
+        summary = snapshot.build_snapshot(source, output)
+        self.stdout.write(
+            f"Wrote {summary['path']}: {summary['datasets']} datasets, {summary['publications']} publications, "
+            f"{summary['image_bytes']:,} bytes ({summary['snapshot_bytes']:,} compressed) "
+            f"in {summary['elapsed_seconds']}s"
+        )
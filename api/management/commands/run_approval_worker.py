@@ -0,0 +1,26 @@
+"""
+Process queued upload approvals outside the web process
+
+Use with APPROVAL_WORKER=external so web requests only enqueue jobs. The
+command itself always runs in external mode (manage.py sets it before the
+database bootstrap), so it never starts the web process's thread pool.
+"""
+from django.core.management.base import BaseCommand
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued approval jobs (loops until interrupted unless --once is given)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='drain the queue once and exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='seconds to sleep when the queue is empty')
+        parser.add_argument('--batch-size', type=int, default=None, help='rows per batch (default APPROVE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        # This process is the worker: enqueues made here must not wake a pool
+        jobs.APPROVAL_WORKER = 'external'
+        processed = jobs.work_forever(
+            poll_interval=options['poll_interval'], batch_size=options['batch_size'], once=options['once']
+        )
+        self.stdout.write(f'Processed {processed} approval job(s)')
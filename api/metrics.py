@@ -0,0 +1,421 @@
+"""
+Per-request performance metrics for the ADRD Knowledge Graph API
+
+RequestMetricsMiddleware measures every request:
+- wall time, from the outermost middleware to the last byte of the body
+- DB time and query count, through an execute wrapper on the connection
+- rows fetched, through a proxy around the DB-API cursor
+- serialization time, reported by the JsonResponse subclass below
+- response bytes
+
+Each request gets a ``Server-Timing`` header (visible in the browser's
+network panel) and, unless REQUEST_LOG=off, one JSON log line on stdout.
+Statements slower than SLOW_QUERY_MS are captured and logged in that line
+together with their EXPLAIN plan, which is taken after the response is
+built so it never runs inside the view's transaction.
+
+Streaming exports run their queries while the body is sent, so their
+header only covers the time until the first byte; the log line and the
+metrics are recorded once the stream is finished.
+
+Per endpoint (the URL pattern, not the raw path) the module keeps
+cumulative histograms of wall and DB time, plus a rolling window of the
+last METRICS_WINDOW durations for quantiles. ``/api/metrics`` exposes both
+in the Prometheus text format. The numbers are per process: on serverless
+platforms each instance reports its own.
+
+``/api/metrics`` reveals traffic and SQL timings, so it is off unless
+METRICS_TOKEN is set, and then only answers requests that send it as
+``Authorization: Bearer <token>`` (Prometheus: ``authorization:
+{credentials: <token>}`` in the scrape config). ``/api/debug`` stays public
+but adds the database connection status only for such requests.
+"""
+import functools
+import hmac
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import connection
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+
+# "json" prints one structured line per request, "off" disables it
+REQUEST_LOG = os.environ.get('REQUEST_LOG', 'json').lower()
+
+# Statements at least this slow (ms) are logged with their plan; 0 disables
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 500))
+
+# Bearer token required by /api/metrics (and for the database section of
+# /api/debug); empty disables both
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Durations kept per endpoint for the rolling quantiles
+METRICS_WINDOW = int(os.environ.get('METRICS_WINDOW', 1000))
+
+# Histogram bucket bounds in seconds (Prometheus client defaults)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW_QUANTILES = (0.5, 0.9, 0.99)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Record of the request the current thread is serving (None outside requests)
+_current = threading.local()
+
+_lock = threading.Lock()
+_endpoints = {}
+_started_at = time.time()
+
+
+class RequestRecord:
+    """Measurements of one request"""
+
+    def __init__(self):
+        self.slow_query_seconds = SLOW_QUERY_MS / 1000 if SLOW_QUERY_MS > 0 else None
+        self.slow_queries = []
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count"""
+
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointStats:
+    """Everything recorded for one (method, endpoint) pair"""
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.db = Histogram()
+        self.window = deque(maxlen=METRICS_WINDOW)
+        self.statuses = {}
+        self.queries = 0
+        self.rows = 0
+        self.response_bytes = 0
+        self.serialize_seconds = 0.0
+
+
+def current_record():
+    """RequestRecord of the request this thread is serving (None outside requests)"""
+    return getattr(_current, 'record', None)
+
+
+class _RowCountingCursor:
+    """DB-API cursor proxy that adds fetched rows to the active request record"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _count(self, rows):
+        record = current_record()
+        if record is not None:
+            record.rows += rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count(1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def instrument_queries(execute, sql, params, many, context):
+    """Connection execute wrapper: times statements of the active request"""
+    record = current_record()
+    if record is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        record.db_seconds += elapsed
+        record.queries += 1
+        if record.slow_query_seconds is not None and elapsed >= record.slow_query_seconds and not many:
+            record.slow_queries.append({'ms': round(elapsed * 1000, 2), 'sql': sql, 'params': params})
+        wrapper = context['cursor']
+        if not isinstance(wrapper.cursor, _RowCountingCursor):
+            wrapper.cursor = _RowCountingCursor(wrapper.cursor)
+
+
+def explain_query(sql, params):
+    """Query plan of a statement as a list of lines (the error instead if it cannot be explained)"""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')):
+        return []
+    # Neither form executes the statement; the plan query itself is not recorded
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    record, _current.record = current_record(), None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+    finally:
+        _current.record = record
+    return [row[-1] for row in rows]
+
+
+def explain_slow_queries(record):
+    """Attach plans to the captured slow statements (once) and return them without their parameters"""
+    for query in record.slow_queries:
+        if 'plan' not in query:
+            query['plan'] = explain_query(query['sql'], query['params'])
+    return [{key: query[key] for key in ('ms', 'sql', 'plan')} for query in record.slow_queries]
+
+
+class JsonResponse(DjangoJsonResponse):
+    """django.http.JsonResponse that reports its encoding time to the request metrics"""
+
+    def __init__(self, *args, **kwargs):
+        started = time.perf_counter()
+        super().__init__(*args, **kwargs)
+        record = current_record()
+        if record is not None:
+            record.serialize_seconds += time.perf_counter() - started
+
+
+def endpoint_label(request):
+    """URL pattern that served the request, e.g. /datasets/<int:dataset_id>"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.route is None:
+        return 'unmatched'
+    route = match.route
+    if route.startswith('api/'):
+        route = route[len('api/'):]
+    return '/' + route.rstrip('/')
+
+
+def server_timing(record, wall_seconds):
+    """Server-Timing header value"""
+    return (
+        f'app;dur={wall_seconds * 1000:.1f}, '
+        f'db;dur={record.db_seconds * 1000:.1f};desc="{record.queries} queries, {record.rows} rows", '
+        f'serialize;dur={record.serialize_seconds * 1000:.1f}'
+    )
+
+
+def last_request():
+    """(endpoint, RequestRecord) of the last request this thread finished, for checks and tools"""
+    return getattr(_current, 'last', None)
+
+
+def _finish(request, response, record, endpoint, wall_seconds, streamed):
+    _current.last = (endpoint, record)
+    key = (request.method, endpoint)
+    with _lock:
+        stats = _endpoints.get(key)
+        if stats is None:
+            stats = _endpoints[key] = EndpointStats()
+        stats.duration.observe(wall_seconds)
+        stats.db.observe(record.db_seconds)
+        stats.window.append(wall_seconds)
+        stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+        stats.queries += record.queries
+        stats.rows += record.rows
+        stats.response_bytes += record.response_bytes
+        stats.serialize_seconds += record.serialize_seconds
+
+    slow_queries = explain_slow_queries(record)
+    if REQUEST_LOG == 'json':
+        print(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(wall_seconds * 1000, 2),
+            'db_ms': round(record.db_seconds * 1000, 2),
+            'queries': record.queries,
+            'rows': record.rows,
+            'serialize_ms': round(record.serialize_seconds * 1000, 2),
+            'bytes': record.response_bytes,
+            'cache': response.get('X-Cache'),
+            'streamed': streamed,
+            'slow_queries': slow_queries,
+        }, default=str))
+
+
+class RequestMetricsMiddleware:
+    """Outermost middleware: measures each request (see the module docstring)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Connections are per thread; install the wrapper on this thread's one
+        if instrument_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(instrument_queries)
+
+        record = RequestRecord()
+        started = time.perf_counter()
+        _current.record = record
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.record = None
+
+        endpoint = endpoint_label(request)
+        response['Server-Timing'] = server_timing(record, time.perf_counter() - started)
+        if response.streaming:
+            response.streaming_content = self._metered_stream(
+                response.streaming_content, request, response, record, endpoint, started
+            )
+        else:
+            record.response_bytes = len(response.content)
+            _finish(request, response, record, endpoint, time.perf_counter() - started, False)
+        return response
+
+    def _metered_stream(self, content, request, response, record, endpoint, started):
+        """Yield the body, attributing queries run while producing it to this request"""
+        chunks = iter(content)
+        try:
+            while True:
+                previous = current_record()
+                _current.record = record
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    _current.record = previous
+                record.response_bytes += len(chunk)
+                yield chunk
+        finally:
+            _finish(request, response, record, endpoint, time.perf_counter() - started, True)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histogram, labels):
+    lines = []
+    for bound, count in zip(DURATION_BUCKETS, histogram.buckets):
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+    return lines
+
+
+def _quantile(ordered, q):
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def render_prometheus():
+    """All recorded metrics in the Prometheus text exposition format"""
+    with _lock:
+        snapshot = [
+            (method, endpoint, stats.duration, stats.db, sorted(stats.window), dict(stats.statuses),
+             stats.queries, stats.rows, stats.response_bytes, stats.serialize_seconds)
+            for (method, endpoint), stats in sorted(_endpoints.items())
+        ]
+
+    families = {
+        'requests': ['# HELP adrd_http_requests_total Requests served, by endpoint and status',
+                     '# TYPE adrd_http_requests_total counter'],
+        'duration': ['# HELP adrd_http_request_duration_seconds Wall time per request',
+                     '# TYPE adrd_http_request_duration_seconds histogram'],
+        'db': ['# HELP adrd_http_request_db_seconds Time spent in SQL statements per request',
+               '# TYPE adrd_http_request_db_seconds histogram'],
+        'window': [f'# HELP adrd_http_request_duration_window_seconds Wall time over the last {METRICS_WINDOW} requests',
+                   '# TYPE adrd_http_request_duration_window_seconds summary'],
+        'queries': ['# HELP adrd_http_queries_total SQL statements executed',
+                    '# TYPE adrd_http_queries_total counter'],
+        'rows': ['# HELP adrd_http_rows_fetched_total Rows fetched from the database',
+                 '# TYPE adrd_http_rows_fetched_total counter'],
+        'bytes': ['# HELP adrd_http_response_bytes_total Response body bytes sent',
+                  '# TYPE adrd_http_response_bytes_total counter'],
+        'serialize': ['# HELP adrd_http_serialize_seconds_total Time spent encoding JSON responses',
+                      '# TYPE adrd_http_serialize_seconds_total counter'],
+    }
+    for method, endpoint, duration, db, window, statuses, queries, rows, response_bytes, serialize in snapshot:
+        labels = {'method': method, 'endpoint': endpoint}
+        for status, count in sorted(statuses.items()):
+            families['requests'].append(f'adrd_http_requests_total{_labels(**labels, status=status)} {count}')
+        families['duration'] += _histogram_lines('adrd_http_request_duration_seconds', duration, labels)
+        families['db'] += _histogram_lines('adrd_http_request_db_seconds', db, labels)
+        if window:
+            for q in WINDOW_QUANTILES:
+                families['window'].append(
+                    f'adrd_http_request_duration_window_seconds{_labels(**labels, quantile=q)} {_quantile(window, q):.6f}'
+                )
+            families['window'].append(f'adrd_http_request_duration_window_seconds_sum{_labels(**labels)} {sum(window):.6f}')
+            families['window'].append(f'adrd_http_request_duration_window_seconds_count{_labels(**labels)} {len(window)}')
+        families['queries'].append(f'adrd_http_queries_total{_labels(**labels)} {queries}')
+        families['rows'].append(f'adrd_http_rows_fetched_total{_labels(**labels)} {rows}')
+        families['bytes'].append(f'adrd_http_response_bytes_total{_labels(**labels)} {response_bytes}')
+        families['serialize'].append(f'adrd_http_serialize_seconds_total{_labels(**labels)} {serialize:.6f}')
+
+    lines = ['# HELP adrd_process_start_time_seconds Start time of this process since the epoch',
+             '# TYPE adrd_process_start_time_seconds gauge',
+             f'adrd_process_start_time_seconds {_started_at:.3f}']
+    for family in families.values():
+        lines += family
+    return '\n'.join(lines) + '\n'
+
+
+def has_metrics_token(request):
+    """Whether request sends METRICS_TOKEN as a bearer token (never while no token is configured)"""
+    if not METRICS_TOKEN:
+        return False
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip().encode(), METRICS_TOKEN.encode())
+
+
+def require_metrics_token(view):
+    """Serve view only to requests bearing METRICS_TOKEN (404 while no token is configured)"""
+    @functools.wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if not METRICS_TOKEN:
+            return JsonResponse({'error': 'Not found'}, status=404)
+        if not has_metrics_token(request):
+            response = JsonResponse({'error': 'Unauthorized'}, status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        return view(request, *args, **kwargs)
+    return wrapped
+
+
+@require_metrics_token
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,227 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=100, unique=True)),
+                ('password_hash', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_login', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'api_adminuser',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalyticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.TextField()),
+                ('version', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'api_analyticssnapshot',
+            },
+        ),
+        migrations.CreateModel(
+            name='ApprovalJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('review_notes', models.TextField(blank=True)),
+                ('reviewed_by', models.CharField(blank=True, max_length=100)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('added_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('unchanged_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('errors', models.TextField(blank=True)),
+                ('column_mapping', models.TextField(blank=True)),
+                ('message', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'api_approvaljob',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Dataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500)),
+                ('description', models.TextField()),
+                ('disease_type', models.CharField(max_length=200)),
+                ('sample_size', models.IntegerField()),
+                ('data_accessibility', models.CharField(max_length=200)),
+                ('wgs_available', models.CharField(max_length=50)),
+                ('imaging_types', models.TextField()),
+                ('modalities', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fingerprint', models.CharField(blank=True, max_length=64, null=True, unique=True)),
+            ],
+            options={
+                'db_table': 'api_dataset',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DatasetTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'db_table': 'api_datasettag',
+            },
+        ),
+        migrations.CreateModel(
+            name='PendingUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=500)),
+                ('file_content', models.TextField(blank=True)),
+                ('file_type', models.CharField(max_length=50)),
+                ('uploaded_by', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('review_notes', models.TextField(blank=True)),
+                ('reviewed_by', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('row_count', models.IntegerField(default=0)),
+                ('column_stats', models.TextField(blank=True)),
+            ],
+            options={
+                'db_table': 'api_pendingupload',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PendingUploadRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_index', models.IntegerField()),
+                ('data', models.TextField()),
+            ],
+            options={
+                'db_table': 'api_pendinguploadrow',
+            },
+        ),
+        migrations.CreateModel(
+            name='Publication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=1000)),
+                ('authors', models.TextField()),
+                ('journal', models.CharField(max_length=500)),
+                ('year', models.IntegerField()),
+                ('pmid', models.CharField(max_length=50)),
+                ('doi', models.CharField(max_length=200)),
+                ('dataset_name', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'api_publication',
+                'ordering': ['-year', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SchemaVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'api_schemaversion',
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('modality', 'Modality'), ('imaging', 'Imaging type'), ('disease', 'Disease type')], max_length=20)),
+                ('name', models.CharField(max_length=200)),
+                ('normalized', models.CharField(max_length=200)),
+            ],
+            options={
+                'db_table': 'api_tag',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('kind', 'normalized'), name='api_tag_kind_normalized_uniq'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='dataset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='publications', to='api.dataset'),
+        ),
+        migrations.AddField(
+            model_name='pendinguploadrow',
+            name='upload',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='api.pendingupload'),
+        ),
+        migrations.AddIndex(
+            model_name='pendingupload',
+            index=models.Index(fields=['status', 'created_at'], name='api_pendingupload_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='datasettag',
+            name='dataset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dataset_tags', to='api.dataset'),
+        ),
+        migrations.AddField(
+            model_name='datasettag',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dataset_tags', to='api.tag'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='tags',
+            field=models.ManyToManyField(related_name='datasets', through='api.DatasetTag', to='api.tag'),
+        ),
+        migrations.AddField(
+            model_name='approvaljob',
+            name='upload',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='api.pendingupload'),
+        ),
+        migrations.AddConstraint(
+            model_name='pendinguploadrow',
+            constraint=models.UniqueConstraint(fields=('upload', 'row_index'), name='api_pendinguploadrow_upload_row_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='datasettag',
+            index=models.Index(fields=['tag', 'dataset'], name='api_datasettag_tag_dataset'),
+        ),
+        migrations.AddConstraint(
+            model_name='datasettag',
+            constraint=models.UniqueConstraint(fields=('dataset', 'tag'), name='api_datasettag_dataset_tag_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['name'], name='api_dataset_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='approvaljob',
+            index=models.Index(fields=['status', 'created_at'], name='api_approvaljob_status_idx'),
+        ),
+    ]
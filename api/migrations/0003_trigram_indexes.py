@@ -0,0 +1,65 @@
+"""
+Trigram GIN indexes for the icontains filters (Postgres only)
+
+Django compiles ``field__icontains`` to ``UPPER(field::text) LIKE UPPER(%s)``
+on Postgres, so each index is built on that exact expression with
+gin_trgm_ops. SQLite has no equivalent; there these filters stay scans
+ordered through the btree indexes of 0002.
+
+The indexes are built with CREATE INDEX CONCURRENTLY so that a live
+database keeps accepting writes to api_dataset / api_publication meanwhile,
+which requires a non-atomic migration. A concurrent build that fails leaves
+an INVALID index behind: drop it and run migrate again. The indexes are not
+part of the model state (they only exist on Postgres).
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, CreateExtension
+from django.db import migrations
+from django.db.models import TextField
+from django.db.models.functions import Cast, Upper
+
+# Model -> fields filtered with icontains by the list, search and export views
+TRIGRAM_FIELDS = {
+    'dataset': ['name', 'description', 'disease_type', 'data_accessibility', 'wgs_available'],
+    'publication': ['title', 'authors', 'journal', 'dataset_name'],
+}
+
+
+class AddPostgresIndexConcurrently(AddIndexConcurrently):
+    """AddIndexConcurrently that only touches Postgres databases and leaves the model state alone"""
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def trigram_index(model_name, field):
+    return AddPostgresIndexConcurrently(
+        model_name=model_name,
+        index=GinIndex(
+            OpClass(Upper(Cast(field, output_field=TextField())), name='gin_trgm_ops'),
+            name=f'api_{model_name}_{field}_trgm',
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0002_production_indexes'),
+    ]
+
+    operations = [CreateExtension('pg_trgm')] + [
+        trigram_index(model_name, field)
+        for model_name, fields in TRIGRAM_FIELDS.items()
+        for field in fields
+    ]
@@ -17,11 +17,22 @@ class Dataset(models.Model):
     imaging_types = models.TextField()
     modalities = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # sha256 of the normalized name and disease type (see api/ingest.py); approvals upsert on it
+    fingerprint = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    tags = models.ManyToManyField('Tag', through='DatasetTag', related_name='datasets')
 
     class Meta:
         app_label = 'api'
         db_table = 'api_dataset'
         ordering = ['-created_at']
+        # Serve the list order / cursor keyset, disease grouping and sample size
+        # ranges; icontains filters use trigram indexes on Postgres (migration 0003)
+        indexes = [
+            models.Index(fields=['name'], name='api_dataset_name_idx'),
+            models.Index(fields=['created_at', 'id'], name='api_dataset_created_idx'),
+            models.Index(fields=['disease_type'], name='api_dataset_disease_idx'),
+            models.Index(fields=['sample_size'], name='api_dataset_sample_size_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -36,12 +47,24 @@ class Publication(models.Model):
     pmid = models.CharField(max_length=50)
     doi = models.CharField(max_length=200)
     dataset_name = models.CharField(max_length=500)
+    # Resolved from dataset_name (see api/links.py); null until a dataset with that name exists.
+    # Indexed by api_publication_dataset_idx, which also serves the per-dataset list order
+    dataset = models.ForeignKey(
+        Dataset, null=True, blank=True, on_delete=models.SET_NULL, related_name='publications', db_index=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         app_label = 'api'
         db_table = 'api_publication'
         ordering = ['-year', '-created_at']
+        # List order / cursor keyset and year filters, a dataset's publications
+        # in list order, and the recent feed
+        indexes = [
+            models.Index(fields=['year', 'created_at', 'id'], name='api_publication_year_idx'),
+            models.Index(fields=['dataset', 'year', 'created_at', 'id'], name='api_publication_dataset_idx'),
+            models.Index(fields=['created_at'], name='api_publication_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -80,7 +103,7 @@ class PendingUpload(models.Model):
     ]
     
     file_name = models.CharField(max_length=500)
-    file_content = models.TextField()  # Store file content as text (CSV/Excel parsed)
+    file_content = models.TextField(blank=True)  # Legacy JSON blob; parsed rows now live in PendingUploadRow
     file_type = models.CharField(max_length=50)  # csv, xlsx, xls
     uploaded_by = models.CharField(max_length=200, blank=True)  # Optional: email or name
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -88,12 +111,143 @@ class PendingUpload(models.Model):
     reviewed_by = models.CharField(max_length=100, blank=True)  # Admin username
     created_at = models.DateTimeField(auto_now_add=True)
     reviewed_at = models.DateTimeField(null=True, blank=True)
+    row_count = models.IntegerField(default=0)  # Number of staged rows
+    column_stats = models.TextField(blank=True)  # JSON: per-column fill counts, see api/staging.py
     
     class Meta:
         app_label = 'api'
         db_table = 'api_pendingupload'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='api_pendingupload_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.file_name} - {self.status}"
 
+
+class PendingUploadRow(models.Model):
+    """One parsed spreadsheet row of a pending upload, addressable by its position"""
+    upload = models.ForeignKey(PendingUpload, on_delete=models.CASCADE, related_name='rows')
+    row_index = models.IntegerField()  # 0-based position in the file
+    data = models.TextField()  # JSON object: column -> cell value
+
+    class Meta:
+        app_label = 'api'
+        db_table = 'api_pendinguploadrow'
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'row_index'], name='api_pendinguploadrow_upload_row_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.upload_id}[{self.row_index}]"
+
+
+
+class AnalyticsSnapshot(models.Model):
+    """Materialized analytics overview (single row), updated as datasets are approved"""
+    payload = models.TextField()  # JSON: counters and distributions, see api/analytics.py
+    version = models.IntegerField(default=0)  # Bumped on every change to the catalog
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'api'
+        db_table = 'api_analyticssnapshot'
+
+    def __str__(self):
+        return f"Analytics snapshot v{self.version}"
+
+
+class Tag(models.Model):
+    """Normalized modality, imaging type or disease term, split out of the Dataset text columns"""
+    KIND_CHOICES = [
+        ('modality', 'Modality'),
+        ('imaging', 'Imaging type'),
+        ('disease', 'Disease type'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    name = models.CharField(max_length=200)  # Display label (first spelling seen)
+    normalized = models.CharField(max_length=200)  # Lowercased, whitespace-collapsed
+
+    class Meta:
+        app_label = 'api'
+        db_table = 'api_tag'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'normalized'], name='api_tag_kind_normalized_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.name}"
+
+
+class DatasetTag(models.Model):
+    """Dataset <-> Tag link; (tag, dataset) is indexed for tag filtering"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='dataset_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='dataset_tags')
+
+    class Meta:
+        app_label = 'api'
+        db_table = 'api_datasettag'
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'tag'], name='api_datasettag_dataset_tag_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'dataset'], name='api_datasettag_tag_dataset'),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset_id} -> {self.tag_id}"
+
+
+class ApprovalJob(models.Model):
+    """Queued approval of a pending upload, processed in batches by api/jobs.py"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    upload = models.ForeignKey(PendingUpload, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    review_notes = models.TextField(blank=True)
+    reviewed_by = models.CharField(max_length=100, blank=True)
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)  # Rows committed so far; a resumed job starts here
+    added_count = models.IntegerField(default=0)  # New datasets
+    updated_count = models.IntegerField(default=0)  # Rows that changed an existing dataset (same fingerprint)
+    unchanged_count = models.IntegerField(default=0)  # Rows identical to a stored dataset
+    error_count = models.IntegerField(default=0)
+    errors = models.TextField(blank=True)  # JSON list of the first row errors
+    column_mapping = models.TextField(blank=True)  # JSON: Dataset field -> source column
+    message = models.TextField(blank=True)  # Failure reason
+    worker = models.CharField(max_length=100, blank=True)  # Who claimed the job
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Heartbeat while running
+
+    class Meta:
+        app_label = 'api'
+        db_table = 'api_approvaljob'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='api_approvaljob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Approval of upload {self.upload_id} - {self.status}"
+
+
+class SchemaVersion(models.Model):
+    """Single-row marker of the schema/seed version api/index.py last bootstrapped"""
+    version = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'api'
+        db_table = 'api_schemaversion'
+
+    def __str__(self):
+        return f"Schema v{self.version}"
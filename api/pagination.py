@@ -0,0 +1,94 @@
+"""
+Keyset (cursor) pagination for list endpoints
+
+A cursor is an opaque, URL-safe token holding the sort key of the last row
+of the previous page. The next page is fetched with a seek predicate on that
+key instead of OFFSET, so page 1000 costs the same as page 1. All keys are
+walked in descending order to match the models' default ordering, and the
+last key must be unique (the primary key) so no row is skipped or repeated.
+"""
+import base64
+import json
+from django.db import connection
+from django.db.models import Q
+
+
+class PaginationError(ValueError):
+    """Raised for an undecodable cursor or unsupported pagination parameters"""
+
+
+COUNT_MODES = ('none', 'approximate', 'exact')
+
+
+def encode_cursor(values):
+    """Encode sort-key values as an opaque cursor"""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, model, keys):
+    """Decode a cursor back into typed sort-key values for model"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('wrong number of keys')
+        return [model._meta.get_field(key).to_python(value) for key, value in zip(keys, values)]
+    except Exception as e:
+        raise PaginationError(f'Invalid cursor: {e}')
+
+
+def _seek_filter(keys, values):
+    """Rows strictly after (values) when ordered by keys descending"""
+    condition = Q()
+    for i, key in enumerate(keys):
+        step = Q(**{f'{key}__lt': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            step &= Q(**{prev_key: prev_value})
+        condition |= step
+    return condition
+
+
+def keyset_page(queryset, keys, cursor=None, per_page=10):
+    """
+    Return (rows, next_cursor) for one page of queryset ordered by keys descending.
+
+    next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(*[f'-{key}' for key in keys])
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, keys)
+        queryset = queryset.filter(_seek_filter(keys, values))
+
+    # One extra row tells us whether another page exists without a COUNT
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([_cursor_value(getattr(last, key)) for key in keys])
+    return rows, next_cursor
+
+
+def _cursor_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def count_rows(queryset, mode='none'):
+    """
+    Count rows according to mode: 'exact' runs COUNT(*), 'approximate' uses the
+    Postgres planner estimate (falling back to COUNT(*) elsewhere), 'none' skips it.
+
+    Returns (total, is_approximate); total is None when mode is 'none'.
+    """
+    if mode == 'none':
+        return None, False
+    if mode == 'approximate' and connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), True
+    return queryset.count(), False
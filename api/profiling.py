@@ -0,0 +1,136 @@
+"""
+Opt-in profiling of single requests
+
+Set PROFILE_TOKEN to enable it. A request that carries the token in an
+``X-Profile`` header runs under cProfile (only a header: a token in the URL
+would end up in access logs and Referer headers):
+
+    curl -H "X-Profile: $PROFILE_TOKEN" "$API/api/datasets/search?q=amyloid"
+
+Each profiled request writes two files to PROFILE_DIR and returns their
+base name in the ``X-Profile-Id`` response header:
+- <id>.prof: raw pstats data (``python -m pstats``, snakeviz)
+- <id>.json: request, status, timings, the top PROFILE_TOP_FUNCTIONS
+  functions by cumulative time and every SQL statement that took at least
+  PROFILE_SLOW_QUERY_MS, with its EXPLAIN plan (see api/metrics.py)
+
+So that the profile shows the real work, profiled requests bypass the
+response cache, and approve_upload runs its approval job inline instead of
+queueing it. Without PROFILE_TOKEN the middleware unloads itself at
+startup.
+"""
+import cProfile
+import hmac
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+# Shared secret that enables profiling of a request; empty disables the profiler
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/adrd_profiles')
+# Statements at least this slow (ms) are captured with their plan in profiled requests
+PROFILE_SLOW_QUERY_MS = float(os.environ.get('PROFILE_SLOW_QUERY_MS', 5))
+PROFILE_TOP_FUNCTIONS = int(os.environ.get('PROFILE_TOP_FUNCTIONS', 40))
+
+_sequence = itertools.count(1)
+
+
+def requested_profile(request):
+    """True if the request carries the profiling token"""
+    token = request.headers.get('X-Profile')
+    return bool(token) and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def profile_id(request):
+    """Unique, filesystem-safe name for a profile of this request"""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_')[:60]
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method.lower()}-{slug}-{os.getpid()}-{next(_sequence)}"
+
+
+def save_profile(name, profiler, request, response, record, elapsed):
+    """Write <name>.prof and the <name>.json report to PROFILE_DIR; returns the report path"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, name)
+    profiler.dump_stats(f'{base}.prof')
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    report = {
+        'id': name,
+        'method': request.method,
+        'path': request.path,
+        'params': {key: request.GET.getlist(key) for key in request.GET},
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 2),
+        'queries': record.queries if record else None,
+        'db_ms': round(record.db_seconds * 1000, 2) if record else None,
+        'rows': record.rows if record else None,
+        'slow_query_ms': PROFILE_SLOW_QUERY_MS,
+        'slow_queries': metrics.explain_slow_queries(record) if record else [],
+        'functions': [line for line in out.getvalue().splitlines() if line.strip()],
+    }
+    with open(f'{base}.json', 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"[OK] Profiled {request.method} {request.path} in {elapsed * 1000:.0f} ms -> {base}.json")
+    return f'{base}.json'
+
+
+class ProfilingMiddleware:
+    """Runs requests that carry PROFILE_TOKEN under cProfile (place right after RequestMetricsMiddleware)"""
+
+    def __init__(self, get_response):
+        if not PROFILE_TOKEN:
+            raise MiddlewareNotUsed('PROFILE_TOKEN is not set')
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not requested_profile(request):
+            return self.get_response(request)
+
+        request.profiled = True
+        record = metrics.current_record()
+        if record is not None:
+            record.slow_query_seconds = PROFILE_SLOW_QUERY_MS / 1000
+        name = profile_id(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        response = profiler.runcall(self.get_response, request)
+        response['X-Profile-Id'] = name
+        if response.streaming:
+            response.streaming_content = self._profiled_stream(
+                response.streaming_content, name, profiler, request, response, record, started
+            )
+        else:
+            self._finish(name, profiler, request, response, record, started)
+        return response
+
+    def _profiled_stream(self, content, name, profiler, request, response, record, started):
+        """Yield the body with the profiler running while each chunk is produced"""
+        chunks = iter(content)
+        try:
+            while True:
+                profiler.enable()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    profiler.disable()
+                yield chunk
+        finally:
+            self._finish(name, profiler, request, response, record, started)
+
+    def _finish(self, name, profiler, request, response, record, started):
+        try:
+            save_profile(name, profiler, request, response, record, time.perf_counter() - started)
+        except Exception as e:
+            # A profile that cannot be written must not fail the request
+            print(f"Error saving profile {name}: {e}")
@@ -0,0 +1,250 @@
+"""
+Full-text search for datasets and publications
+
+SQLite uses an external-content FTS5 table per model, kept in sync by
+AFTER INSERT/UPDATE/DELETE triggers. Postgres uses a stored generated
+``tsvector`` column with a GIN index. Both are maintained by the database
+itself, so rows inserted by approve_upload (or bulk_create) are indexed
+incrementally in the same transaction.
+
+Queries are tokenized into prefix terms that must all match, which keeps the
+"type part of a word" behaviour of the old ``icontains`` search while being
+answered from the index and ranked by relevance (bm25 / ts_rank_cd).
+Highlight snippets are built in Python for the returned page only.
+"""
+import re
+from django.db import connection
+from django.utils.html import escape
+
+# Indexed text columns per table, most important first; weights feed bm25
+SEARCH_INDEXES = {
+    'api_dataset': {
+        'fields': ['name', 'description'],
+        'weights': [10.0, 1.0],
+    },
+    'api_publication': {
+        'fields': ['title', 'authors'],
+        'weights': [5.0, 1.0],
+    },
+}
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+SNIPPET_TOKENS = 24
+
+# Postgres setweight labels, in the same order as SEARCH_INDEXES fields
+_PG_WEIGHT_LABELS = ['A', 'B', 'C', 'D']
+
+# vendor -> bool, filled lazily per process
+_backend_ready = {}
+
+
+def _fts_table(table):
+    return f'{table}_fts'
+
+
+def _tokens(query):
+    return re.findall(r'\w+', query or '', re.UNICODE)
+
+
+def _sqlite_statements(table, fields):
+    fts = _fts_table(table)
+    cols = ', '.join(fields)
+    new_vals = ', '.join(f'new.{f}' for f in fields)
+    old_vals = ', '.join(f'old.{f}' for f in fields)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='porter unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def _postgres_statements(table, fields):
+    vector = ' || '.join(
+        f"setweight(to_tsvector('english', coalesce({f}, '')), '{_PG_WEIGHT_LABELS[i]}')"
+        for i, f in enumerate(fields)
+    )
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING gin (search_vector)",
+    ]
+
+
+def ensure_search_index():
+    """Create the full-text index structures if missing (idempotent)"""
+    try:
+        with connection.cursor() as cursor:
+            for table, spec in SEARCH_INDEXES.items():
+                if connection.vendor == 'sqlite':
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [_fts_table(table)])
+                    is_new = cursor.fetchone() is None
+                    for statement in _sqlite_statements(table, spec['fields']):
+                        cursor.execute(statement)
+                    if is_new:
+                        # Index rows that existed before the FTS table did
+                        fts = _fts_table(table)
+                        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                        print(f"[OK] Built full-text index {fts}")
+                elif connection.vendor == 'postgresql':
+                    for statement in _postgres_statements(table, spec['fields']):
+                        cursor.execute(statement)
+        _backend_ready[connection.vendor] = True
+    except Exception as e:
+        print(f"Full-text index unavailable, falling back to substring search: {e}")
+        _backend_ready[connection.vendor] = False
+    return _backend_ready[connection.vendor]
+
+
+def search_available():
+    """Whether ranked full-text search can be used on the current connection"""
+    if connection.vendor not in _backend_ready:
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'sqlite':
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name IN (%s, %s)",
+                        [_fts_table(t) for t in SEARCH_INDEXES],
+                    )
+                    _backend_ready['sqlite'] = cursor.fetchone()[0] == len(SEARCH_INDEXES)
+                elif connection.vendor == 'postgresql':
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM information_schema.columns "
+                        "WHERE column_name = 'search_vector' AND table_name IN (%s, %s)",
+                        list(SEARCH_INDEXES),
+                    )
+                    _backend_ready['postgresql'] = cursor.fetchone()[0] == len(SEARCH_INDEXES)
+                else:
+                    _backend_ready[connection.vendor] = False
+        except Exception:
+            _backend_ready[connection.vendor] = False
+    return _backend_ready[connection.vendor]
+
+
+def _restrict_sql(queryset, id_column):
+    """SQL fragment limiting matches to the rows of an already-filtered queryset"""
+    if not queryset.query.where:
+        return '', []
+    sub_sql, sub_params = queryset.order_by().values('id').query.sql_with_params()
+    return f' AND {id_column} IN ({sub_sql})', list(sub_params)
+
+
+def _match_expression(tokens):
+    if connection.vendor == 'sqlite':
+        return ' '.join(f'"{t}"*' for t in tokens)
+    return ' & '.join(f'{t}:*' for t in tokens)
+
+
+def match_queryset(queryset, query):
+    """Filter queryset to rows matching query through the full-text index (unranked)"""
+    from django.db.models.expressions import RawSQL
+
+    tokens = _tokens(query)
+    if not tokens:
+        return queryset
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite':
+        fts = _fts_table(table)
+        matches = RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [_match_expression(tokens)])
+        return queryset.filter(id__in=matches)
+    matches = RawSQL(
+        f"SELECT id FROM {table} WHERE search_vector @@ to_tsquery('english', %s)",
+        [_match_expression(tokens)],
+    )
+    return queryset.filter(id__in=matches)
+
+
+def _highlight(text, pattern, snippet_tokens=None):
+    """Wrap matched terms in <mark> tags; optionally cut a window of words around the first match"""
+    text = text or ''
+    if snippet_tokens:
+        words = text.split()
+        if len(words) > snippet_tokens:
+            first = next((i for i, w in enumerate(words) if pattern.search(w)), 0)
+            start = max(0, min(first - snippet_tokens // 4, len(words) - snippet_tokens))
+            window = ' '.join(words[start:start + snippet_tokens])
+            text = ('… ' if start > 0 else '') + window + (' …' if start + snippet_tokens < len(words) else '')
+    # Match on the raw text and escape each piece, so a term never matches inside an entity (&amp;)
+    parts = []
+    end = 0
+    for m in pattern.finditer(text):
+        parts.append(escape(text[end:m.start()]))
+        parts.append(f'{HIGHLIGHT_START}{escape(m.group(0))}{HIGHLIGHT_STOP}')
+        end = m.end()
+    parts.append(escape(text[end:]))
+    return ''.join(parts)
+
+
+def ranked_search(queryset, query, limit=50, offset=0):
+    """
+    Rank rows of queryset matching query by relevance.
+
+    Returns (results, total) where results is a list of
+    (instance, score, highlights) ordered best-first and highlights maps each
+    indexed field to a snippet with matches wrapped in <mark> tags.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return [], 0
+
+    model = queryset.model
+    table = model._meta.db_table
+    fields = SEARCH_INDEXES[table]['fields']
+    match = _match_expression(tokens)
+
+    # Only ids and scores come out of the index; computing snippets in SQL
+    # would run for every match before the LIMIT is applied.
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            fts = _fts_table(table)
+            restrict, restrict_params = _restrict_sql(queryset, 'rowid')
+            weights = ', '.join(str(w) for w in SEARCH_INDEXES[table]['weights'])
+            cursor.execute(
+                f"SELECT rowid, -bm25({fts}, {weights}) AS score "
+                f"FROM {fts} WHERE {fts} MATCH %s{restrict} "
+                f"ORDER BY score DESC, rowid DESC LIMIT %s OFFSET %s",
+                [match] + restrict_params + [limit, offset],
+            )
+            rows = cursor.fetchall()
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH %s{restrict}",
+                [match] + restrict_params,
+            )
+            total = cursor.fetchone()[0]
+        else:
+            restrict, restrict_params = _restrict_sql(queryset, 't.id')
+            cursor.execute(
+                f"SELECT t.id, ts_rank_cd(t.search_vector, q.query) AS score "
+                f"FROM {table} t, to_tsquery('english', %s) q "
+                f"WHERE t.search_vector @@ q.query{restrict} "
+                f"ORDER BY score DESC, t.id DESC LIMIT %s OFFSET %s",
+                [match] + restrict_params + [limit, offset],
+            )
+            rows = cursor.fetchall()
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {table} t "
+                f"WHERE t.search_vector @@ to_tsquery('english', %s){restrict}",
+                [match] + restrict_params,
+            )
+            total = cursor.fetchone()[0]
+
+    instances = model.objects.in_bulk([row[0] for row in rows])
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(t) for t in tokens) + r')\w*', re.IGNORECASE)
+    results = []
+    for row_id, score in rows:
+        instance = instances.get(row_id)
+        if instance is None:
+            continue
+        highlights = {
+            field: _highlight(getattr(instance, field), pattern, SNIPPET_TOKENS if i else None)
+            for i, field in enumerate(fields)
+        }
+        results.append((instance, float(score), highlights))
+    return results, total
@@ -0,0 +1,121 @@
+"""
+Catalog snapshots for the ephemeral SQLite database
+
+On Vercel the SQLite file lives in /tmp, so every fresh instance starts
+with an empty database. A snapshot is a gzip-compressed SQLite image of the
+catalog (datasets, publications, tags, analytics and the full-text index)
+built offline from the canonical database with
+``python manage.py build_catalog_snapshot`` and shipped in api/data/.
+When a process starts and its SQLite file does not exist yet, index.py
+decompresses the snapshot into place before Django opens a connection.
+A snapshot named without .gz is a plain image and is copied instead, which
+is faster for large catalogs at the cost of a bigger deployment.
+
+Tables that are not part of the published catalog (EXCLUDED_TABLES) are
+emptied in the image. That includes the schema marker, so the first start
+on a restored image runs the normal bootstrap once (upgrading an older
+snapshot, seeding admin users) and later starts take the marker path.
+
+index.py imports this module before Django is configured, so it only uses
+the standard library.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+# Snapshot shipped with the deployment; set CATALOG_SNAPSHOT_PATH='' to disable restoring
+SNAPSHOT_PATH = os.environ.get(
+    'CATALOG_SNAPSHOT_PATH', str(Path(__file__).resolve().parent / 'data' / 'catalog.sqlite3.gz')
+)
+
+# Emptied in snapshots: review queue, jobs, accounts and the schema marker
+EXCLUDED_TABLES = (
+    'api_pendinguploadrow', 'api_approvaljob', 'api_pendingupload', 'api_adminuser', 'api_schemaversion',
+)
+
+# Bytes per read when compressing or restoring
+COPY_CHUNK = 1024 * 1024
+
+
+def _open_snapshot(path, mode, compressed):
+    return gzip.open(path, mode, compresslevel=9) if compressed else open(path, mode)
+
+
+def restore_snapshot(db_path, snapshot_path=None):
+    """Put the snapshot at db_path if no database exists there yet; returns True if it was restored"""
+    snapshot_path = SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+    if not snapshot_path or os.path.exists(db_path) or not os.path.exists(snapshot_path):
+        return False
+    started = time.perf_counter()
+    directory = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-', suffix='.sqlite3')
+    try:
+        if snapshot_path.endswith('.gz'):
+            with os.fdopen(fd, 'wb') as out, _open_snapshot(snapshot_path, 'rb', True) as src:
+                shutil.copyfileobj(src, out, COPY_CHUNK)
+        else:
+            # Plain image: kernel-side copy (sendfile), the fastest start for large catalogs
+            os.close(fd)
+            shutil.copyfile(snapshot_path, tmp_path)
+        try:
+            # Unlike a rename, a hard link never replaces a database another worker created meanwhile
+            os.link(tmp_path, db_path)
+        except FileExistsError:
+            return False
+        except OSError:
+            # Filesystem without hard links
+            os.replace(tmp_path, db_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    print(f"[OK] Restored catalog snapshot {snapshot_path} to {db_path} "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return True
+
+
+def build_snapshot(source_path, output_path=None):
+    """Write a catalog snapshot of the SQLite database at source_path; returns a summary dict"""
+    output_path = output_path or SNAPSHOT_PATH
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with tempfile.TemporaryDirectory() as scratch:
+        image_path = os.path.join(scratch, 'catalog.sqlite3')
+        source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+        image = sqlite3.connect(image_path)
+        try:
+            # Page-level copy, consistent even while the source is being written
+            source.backup(image)
+            tables = {row[0] for row in image.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table in EXCLUDED_TABLES:
+                if table in tables:
+                    image.execute(f'DELETE FROM "{table}"')
+            image.commit()
+            counts = {
+                table: image.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in ('api_dataset', 'api_publication') if table in tables
+            }
+            # Self-contained file: no WAL, no free pages
+            image.execute('PRAGMA journal_mode = DELETE')
+            image.execute('VACUUM')
+        finally:
+            source.close()
+            image.close()
+
+        image_bytes = os.path.getsize(image_path)
+        tmp_output = f'{output_path}.tmp'
+        with open(image_path, 'rb') as src, _open_snapshot(tmp_output, 'wb', output_path.endswith('.gz')) as out:
+            shutil.copyfileobj(src, out, COPY_CHUNK)
+        os.replace(tmp_output, output_path)
+    return {
+        'path': output_path,
+        'datasets': counts.get('api_dataset', 0),
+        'publications': counts.get('api_publication', 0),
+        'image_bytes': image_bytes,
+        'snapshot_bytes': os.path.getsize(output_path),
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
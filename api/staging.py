@@ -0,0 +1,131 @@
+"""
+Row-addressable staging of parsed uploads
+
+Each parsed spreadsheet row is stored as its own PendingUploadRow, keyed by
+(upload, row_index), instead of one JSON blob per upload. Rows are written
+in chunks of STAGE_BATCH_SIZE as the parser yields them, so neither upload
+nor approval ever holds the whole file. The review screen reads one
+offset/limit window through the unique (upload, row_index) index, and
+per-column stats are computed while staging and stored on the upload.
+"""
+import json
+from django.db import transaction
+from .models import PendingUpload, PendingUploadRow
+
+# Rows per bulk INSERT when staging, and per chunk when reading back
+STAGE_BATCH_SIZE = 1000
+
+# Default and largest preview window served by the detail endpoint
+PREVIEW_DEFAULT_LIMIT = 50
+PREVIEW_MAX_LIMIT = 1000
+
+# Distinct example values kept per column
+STATS_EXAMPLES = 3
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(str(value).replace(',', ''))
+        return True
+    except ValueError:
+        return False
+
+
+class ColumnStats:
+    """Per-column fill counts, numeric counts and a few example values, accumulated row by row"""
+
+    def __init__(self):
+        self.columns = {}
+
+    def add(self, row):
+        for name, value in row.items():
+            column = self.columns.setdefault(name, {'name': name, 'filled': 0, 'numeric': 0, 'examples': []})
+            if _is_blank(value):
+                continue
+            column['filled'] += 1
+            if _is_number(value):
+                column['numeric'] += 1
+            if len(column['examples']) < STATS_EXAMPLES and value not in column['examples']:
+                column['examples'].append(value)
+
+    def as_list(self, row_count):
+        return [dict(column, empty=row_count - column['filled']) for column in self.columns.values()]
+
+
+def stage_rows(upload, rows):
+    """Store an iterable of row dicts for a saved upload; returns the row count"""
+    stats = ColumnStats()
+    count = 0
+    chunk = []
+    # No savepoint when called inside a transaction: a failure must roll back the caller's too
+    with transaction.atomic(savepoint=False):
+        for row in rows:
+            stats.add(row)
+            chunk.append(PendingUploadRow(upload=upload, row_index=count, data=json.dumps(row)))
+            count += 1
+            if len(chunk) >= STAGE_BATCH_SIZE:
+                PendingUploadRow.objects.bulk_create(chunk)
+                chunk = []
+        PendingUploadRow.objects.bulk_create(chunk)
+        upload.row_count = count
+        upload.column_stats = json.dumps(stats.as_list(count))
+        upload.save(update_fields=['row_count', 'column_stats'])
+    return count
+
+
+def column_stats(upload):
+    """Stored per-column stats of an upload"""
+    return json.loads(upload.column_stats) if upload.column_stats else []
+
+
+def columns(upload):
+    """Column names of an upload, in first-seen order"""
+    return [column['name'] for column in column_stats(upload)]
+
+
+def row_window(upload_id, offset=0, limit=PREVIEW_DEFAULT_LIMIT):
+    """Row dicts offset..offset+limit of an upload, read through the (upload, row_index) index"""
+    data = PendingUploadRow.objects.filter(
+        upload_id=upload_id, row_index__gte=offset, row_index__lt=offset + limit
+    ).order_by('row_index').values_list('data', flat=True)
+    return [json.loads(row) for row in data]
+
+
+def iter_row_chunks(upload_id, chunk_size=STAGE_BATCH_SIZE, start=0):
+    """(first_row_index, [row dicts]) for consecutive chunks of an upload's rows, from row start"""
+    while True:
+        rows = row_window(upload_id, start, chunk_size)
+        if not rows:
+            return
+        yield start, rows
+        start += chunk_size
+
+
+def stage_legacy_uploads():
+    """Move uploads still stored as a file_content JSON blob into the row table (idempotent)"""
+    legacy = PendingUpload.objects.filter(row_count=0).exclude(file_content='').only('id', 'file_content')
+    staged = 0
+    for upload in legacy.iterator():
+        try:
+            records = json.loads(upload.file_content)
+        except json.JSONDecodeError as e:
+            print(f"Skipping upload {upload.id}: invalid file_content ({e})")
+            continue
+        if not isinstance(records, list):
+            continue
+        with transaction.atomic():
+            PendingUploadRow.objects.filter(upload_id=upload.id).delete()
+            stage_rows(upload, (record for record in records if isinstance(record, dict)))
+            PendingUpload.objects.filter(id=upload.id).update(file_content='')
+        staged += 1
+    if staged:
+        print(f"[OK] Staged rows of {staged} legacy uploads")
+    return staged
@@ -0,0 +1,139 @@
+"""
+Normalized tag index for dataset modalities, imaging types and disease types
+
+``Dataset.modalities`` and ``imaging_types`` hold comma-separated text, so a
+substring filter for "MRI" also matches "fMRI". Each term is stored once in
+``Tag`` (per kind, keyed by its normalized spelling) and linked to datasets
+through ``DatasetTag``. Filters become indexed semi-joins on
+(tag, dataset) and filter options come straight from the tag table.
+
+Tags are written when datasets are approved and backfilled once for rows
+that predate the index.
+"""
+import re
+from django.db import connection, transaction
+from django.db.models import Count
+from .models import Dataset, Tag, DatasetTag
+
+# Tag kind -> (Dataset field, whether the field holds a comma-separated list)
+TAG_SOURCES = {
+    'modality': ('modalities', True),
+    'imaging': ('imaging_types', True),
+    'disease': ('disease_type', False),
+}
+
+TAG_MATCH_MODES = ('any', 'all')
+
+BACKFILL_CHUNK_SIZE = 2000
+
+_SEPARATORS = re.compile(r'[,;|]')
+
+
+def normalize(term):
+    """Canonical spelling used for matching: lowercase with single spaces"""
+    return ' '.join(term.split()).lower()
+
+
+def split_terms(value, is_list=True):
+    """Individual terms of a (comma-separated) text value, blanks dropped"""
+    parts = _SEPARATORS.split(value or '') if is_list else [value or '']
+    return [' '.join(part.split()) for part in parts if part and part.strip()]
+
+
+def parse_filter(values):
+    """Normalized terms from filter params (repeated and/or comma-separated)"""
+    terms = []
+    for value in values:
+        terms.extend(normalize(term) for term in split_terms(value))
+    return list(dict.fromkeys(terms))
+
+
+def tag_datasets(datasets):
+    """Create Tag and DatasetTag rows for saved datasets in a fixed number of queries"""
+    wanted = {}
+    links = set()
+    for dataset in datasets:
+        for kind, (field, is_list) in TAG_SOURCES.items():
+            for term in split_terms(getattr(dataset, field), is_list):
+                key = (kind, normalize(term))
+                wanted.setdefault(key, term)
+                links.add((dataset.id, key))
+    if not links:
+        return 0
+
+    with transaction.atomic():
+        Tag.objects.bulk_create(
+            [Tag(kind=kind, normalized=normalized, name=name) for (kind, normalized), name in wanted.items()],
+            ignore_conflicts=True,
+        )
+        tag_ids = {
+            (kind, normalized): tag_id
+            for tag_id, kind, normalized in Tag.objects.filter(
+                normalized__in={normalized for _, normalized in wanted}
+            ).values_list('id', 'kind', 'normalized')
+        }
+        # Links are two integers each; a plain executemany skips building a
+        # model instance per link, which dominated bulk approvals
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {DatasetTag._meta.db_table} (dataset_id, tag_id) VALUES (%s, %s) "
+                f"ON CONFLICT DO NOTHING",
+                [(dataset_id, tag_ids[key]) for dataset_id, key in links],
+            )
+    return len(links)
+
+
+def retag_datasets(datasets):
+    """Replace the tag links of datasets whose tagged fields may have changed"""
+    if not datasets:
+        return 0
+    with transaction.atomic():
+        DatasetTag.objects.filter(dataset_id__in={d.id for d in datasets}).delete()
+        return tag_datasets(datasets)
+
+
+def backfill_tags():
+    """Tag every existing dataset if the link table is still empty (idempotent)"""
+    if DatasetTag.objects.exists() or not Dataset.objects.exists():
+        return 0
+    fields = ['id'] + [field for field, _ in TAG_SOURCES.values()]
+    total = 0
+    chunk = []
+    for dataset in Dataset.objects.order_by('id').only(*fields).iterator(chunk_size=BACKFILL_CHUNK_SIZE):
+        chunk.append(dataset)
+        if len(chunk) >= BACKFILL_CHUNK_SIZE:
+            total += tag_datasets(chunk)
+            chunk = []
+    total += tag_datasets(chunk)
+    print(f"[OK] Backfilled {total} dataset tags")
+    return total
+
+
+def filter_by_tags(queryset, kind, terms, match='any'):
+    """
+    Restrict a Dataset queryset to rows tagged with terms of kind.
+
+    match='any' keeps datasets with at least one of the terms (one semi-join);
+    match='all' keeps datasets with every term (one semi-join per term).
+    """
+    if not terms:
+        return queryset
+    if match not in TAG_MATCH_MODES:
+        raise ValueError(f"Invalid match mode '{match}'. Use one of: {', '.join(TAG_MATCH_MODES)}")
+    links = DatasetTag.objects.filter(tag__kind=kind)
+    if match == 'any':
+        return queryset.filter(id__in=links.filter(tag__normalized__in=terms).values('dataset_id'))
+    for term in terms:
+        queryset = queryset.filter(id__in=links.filter(tag__normalized=term).values('dataset_id'))
+    return queryset
+
+
+def tag_options(kind):
+    """Display names of tags of kind that are attached to at least one dataset"""
+    return sorted(
+        Tag.objects.filter(kind=kind)
+        .annotate(datasets_count=Count('dataset_tags'))
+        .filter(datasets_count__gt=0)
+        .values_list('name', flat=True),
+        key=str.lower,
+    )
@@ -0,0 +1,195 @@
+"""
+Parsing of uploaded spreadsheets into row dicts for the staging table
+
+Parsed rows are written to PendingUploadRow by api/staging.py as they are
+produced.
+
+Multipart uploads (the frontend's path) are spooled to a temporary file by
+LimitedUploadHandler, which rejects anything over UPLOAD_MAX_BYTES while
+it streams, and are then parsed straight from the file handle: csv.reader
+over a text wrapper, openpyxl in read_only mode for xlsx. Neither keeps
+more than one row of the source file in memory.
+
+Legacy JSON bodies carry the file base64-encoded; Excel sheets from that
+path are converted column by column with pandas and serialized with a single
+``DataFrame.to_json(orient='records')``. pandas and openpyxl are only
+imported on those paths, not when the module is loaded.
+"""
+import base64
+import csv
+import io
+import json
+import os
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+
+UPLOAD_TYPES = ('csv', 'xlsx', 'xls')
+
+# Largest accepted upload (bytes); bigger requests get 413 before or while streaming
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+
+
+class UploadParseError(ValueError):
+    """Raised for an unsupported file type or content that cannot be parsed"""
+
+
+def decode_content(file_content):
+    """Bytes of a base64 (optionally data-URL) encoded upload"""
+    if file_content.startswith('data:'):
+        file_content = file_content.split(',', 1)[1]
+    return base64.b64decode(file_content)
+
+
+def frame_to_json(df):
+    """
+    JSON array of records for a DataFrame.
+
+    Missing cells become '' and datetime columns their str() form, as the old
+    per-cell loop produced; numbers and booleans stay native JSON types.
+    """
+    import pandas as pd
+
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        missing = series.isna()
+        if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+            series = series.astype(str)
+        if missing.any():
+            series = series.astype(object).where(~missing, '')
+        columns[name] = series
+    return pd.DataFrame(columns, index=df.index).to_json(
+        orient='records', date_format='iso', double_precision=15, default_handler=str
+    )
+
+
+def parse_csv(content):
+    """Row dicts of CSV bytes or text"""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def parse_excel(content):
+    """Row dicts of the first sheet of an Excel workbook"""
+    import pandas as pd
+
+    return json.loads(frame_to_json(pd.read_excel(io.BytesIO(content))))
+
+
+def parse_upload(file_content, file_type):
+    """Row dicts of an upload sent as base64 (csv may also be sent as raw text)"""
+    if file_type not in UPLOAD_TYPES:
+        raise UploadParseError('Unsupported file type')
+    try:
+        if file_type == 'csv':
+            try:
+                content = decode_content(file_content).decode('utf-8')
+            except Exception:
+                # Not base64, use as-is
+                content = file_content
+            return parse_csv(content)
+        return parse_excel(decode_content(file_content))
+    except Exception as e:
+        raise UploadParseError(f'Error parsing file: {e}')
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Spool uploaded files to disk and stop reading once max_bytes is exceeded"""
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or UPLOAD_MAX_BYTES
+        self.received = 0
+        self.exceeded = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.exceeded = True
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def file_type_of(file_name):
+    """Upload type from a file name's extension"""
+    return os.path.splitext(file_name or '')[1].lstrip('.').lower()
+
+
+def _unique_headers(values):
+    """Header names as pandas would produce them: blanks named 'Unnamed: i', duplicates suffixed .1, .2"""
+    headers = []
+    seen = {}
+    for i, value in enumerate(values):
+        header = f'Unnamed: {i}' if value is None or str(value).strip() == '' else str(value)
+        if header in seen:
+            seen[header] += 1
+            header = f'{header}.{seen[header]}'
+        else:
+            seen[header] = 0
+        headers.append(header)
+    return headers
+
+
+# Text cells pandas.read_excel treats as missing; the streaming reader blanks
+# them too so both paths store the same records
+_NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+
+def _cell(value):
+    if value is None or (isinstance(value, str) and value in _NA_STRINGS):
+        return ''
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    # datetime, date, time, Decimal...
+    return str(value)
+
+
+def iter_csv_file(handle):
+    """Row dicts of a binary CSV file handle, read one line at a time"""
+    text = io.TextIOWrapper(handle, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def iter_xlsx_file(handle):
+    """Row dicts of the first sheet of an xlsx file handle, streamed with openpyxl read_only"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(handle, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = _unique_headers(next(rows, ()))
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            values = tuple(values) + (None,) * (len(headers) - len(values))
+            yield {header: _cell(value) for header, value in zip(headers, values)}
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(handle, file_type):
+    """Row dicts of an uploaded file handle"""
+    if file_type == 'csv':
+        return iter_csv_file(handle)
+    if file_type == 'xlsx':
+        return iter_xlsx_file(handle)
+    # Legacy .xls has no streaming reader; it is small by nature
+    import pandas as pd
+
+    return iter(json.loads(frame_to_json(pd.read_excel(handle))))
+
+
+def parse_file(handle, file_type):
+    """Row dicts of an uploaded file handle (multipart path), yielded as they are read"""
+    if file_type not in UPLOAD_TYPES:
+        raise UploadParseError('Unsupported file type')
+    try:
+        yield from iter_file_rows(handle, file_type)
+    except Exception as e:
+        raise UploadParseError(f'Error parsing file: {e}')
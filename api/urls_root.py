@@ -3,6 +3,7 @@ Root URL configuration that handles both /api/* and /* paths
 """
 from django.urls import path, include
 from django.http import JsonResponse
+from api.metrics import has_metrics_token, metrics_view
 from importlib import import_module
 import sys
 import traceback
@@ -11,111 +12,111 @@ def simple_health(request):
     """Simple health check that doesn't require any imports"""
     return JsonResponse({'status': 'ok', 'message': 'Django is running on Vercel'})
 
-# Try to import views and models
+# Views are imported on the first request that needs them (see lazy_view),
+# so loading the URLconf does not pull in the views and their dependencies
 views_module = None
-models_module = None
 import_errors = []
 
-try:
-    models_module = import_module('api.models')
-    print("[OK] Models imported successfully")
-except Exception as e:
-    error_msg = f"Error importing models: {str(e)}\n{traceback.format_exc()}"
-    print(error_msg)
-    import_errors.append(error_msg)
+def load_views():
+    """Import api.views once; returns None (and records the error) if it fails"""
+    global views_module
+    if views_module is None and not import_errors:
+        try:
+            views_module = import_module('api.views')
+            print("[OK] Views imported successfully")
+        except Exception as e:
+            error_msg = f"Error importing views: {str(e)}\n{traceback.format_exc()}"
+            print(error_msg)
+            import_errors.append(error_msg)
+    return views_module
 
-try:
-    views_module = import_module('api.views')
-    print("[OK] Views imported successfully")
-except Exception as e:
-    error_msg = f"Error importing views: {str(e)}\n{traceback.format_exc()}"
-    print(error_msg)
-    import_errors.append(error_msg)
+def lazy_view(name):
+    """URL target that resolves api.views.<name> on its first call"""
+    def view(request, *args, **kwargs):
+        module = load_views()
+        if module is None:
+            return JsonResponse({'error': 'API views failed to import', 'details': import_errors}, status=500)
+        return getattr(module, name)(request, *args, **kwargs)
+    view.__name__ = name
+    return view
 
 # Debug endpoint to show import status
 def debug_status(request):
-    """Show import status and errors"""
-    return JsonResponse({
+    """Show import status and errors (plus the database connection for METRICS_TOKEN holders)"""
+    status = {
         'status': 'running',
-        'models_imported': models_module is not None,
-        'views_imported': views_module is not None,
+        'models_imported': 'api.models' in sys.modules,
+        'views_imported': load_views() is not None,
         'errors': import_errors if import_errors else None,
         'python_version': sys.version,
         'python_path': sys.path[:5]  # First 5 paths only
-    })
+    }
+    if has_metrics_token(request):
+        from api.db import connection_status
+        status['database'] = connection_status()
+    return JsonResponse(status)
 
-# Build URL patterns based on what imported successfully
+# Always-available endpoints, then the API (views resolved lazily)
 api_patterns = [
     path('health', simple_health),
     path('health/', simple_health),
     path('debug', debug_status),
     path('debug/', debug_status),
+    path('metrics', metrics_view),
+    path('metrics/', metrics_view),
 ]
 
-# Add full API patterns if views imported successfully
-if views_module:
-    try:
-        # Verify key functions exist
-        if hasattr(views_module, 'approve_upload') and hasattr(views_module, 'reject_upload'):
-            print("[OK] approve_upload and reject_upload functions found")
-        else:
-            print(f"⚠ approve_upload or reject_upload not found in views_module")
-            print(f"Available functions: {[attr for attr in dir(views_module) if not attr.startswith('_')]}")
-        
-        api_patterns.extend([
-            path('datasets', views_module.get_datasets),
-            path('datasets/', views_module.get_datasets),
-            path('datasets/<int:dataset_id>', views_module.get_dataset),
-            path('datasets/<int:dataset_id>/', views_module.get_dataset),
-            path('datasets/search', views_module.search_datasets),
-            path('datasets/search/', views_module.search_datasets),
-            path('datasets/export', views_module.export_datasets),
-            path('datasets/export/', views_module.export_datasets),
-            path('datasets/recent', views_module.get_recent_datasets),
-            path('datasets/recent/', views_module.get_recent_datasets),
-            path('datasets/<int:dataset_id>/publications', views_module.get_dataset_publications),
-            path('datasets/<int:dataset_id>/publications/', views_module.get_dataset_publications),
-            path('publications', views_module.get_publications),
-            path('publications/', views_module.get_publications),
-            path('publications/search', views_module.search_publications),
-            path('publications/search/', views_module.search_publications),
-            path('publications/export', views_module.export_publications),
-            path('publications/export/', views_module.export_publications),
-            path('publications/recent', views_module.get_recent_publications),
-            path('publications/recent/', views_module.get_recent_publications),
-            path('stats', views_module.get_stats),
-            path('stats/', views_module.get_stats),
-            path('filters', views_module.get_filters),
-            path('filters/', views_module.get_filters),
-            path('analytics/overview', views_module.get_analytics_overview),
-            path('analytics/overview/', views_module.get_analytics_overview),
-            # Authentication
-            path('auth/login', views_module.admin_login),
-            path('auth/login/', views_module.admin_login),
-            path('auth/logout', views_module.admin_logout),
-            path('auth/logout/', views_module.admin_logout),
-            path('auth/check', views_module.check_auth),
-            path('auth/check/', views_module.check_auth),
-            # File upload
-            path('upload', views_module.upload_file),
-            path('upload/', views_module.upload_file),
-            # Management - More specific routes first!
-            path('management/pending/<int:upload_id>/approve', views_module.approve_upload),
-            path('management/pending/<int:upload_id>/approve/', views_module.approve_upload),
-            path('management/pending/<int:upload_id>/reject', views_module.reject_upload),
-            path('management/pending/<int:upload_id>/reject/', views_module.reject_upload),
-            path('management/pending/<int:upload_id>', views_module.get_pending_upload_detail),
-            path('management/pending/<int:upload_id>/', views_module.get_pending_upload_detail),
-            path('management/pending', views_module.get_pending_uploads),
-            path('management/pending/', views_module.get_pending_uploads),
-        ])
-        print("[OK] Full API patterns loaded (including auth and management)")
-    except Exception as e:
-        print(f"⚠ Error adding API patterns: {e}")
-        import traceback
-        traceback.print_exc()
-else:
-    print(f"⚠ Using minimal API (views import failed)")
+api_patterns += [
+    path('datasets', lazy_view('get_datasets')),
+    path('datasets/', lazy_view('get_datasets')),
+    path('datasets/<int:dataset_id>', lazy_view('get_dataset')),
+    path('datasets/<int:dataset_id>/', lazy_view('get_dataset')),
+    path('datasets/search', lazy_view('search_datasets')),
+    path('datasets/search/', lazy_view('search_datasets')),
+    path('datasets/export', lazy_view('export_datasets')),
+    path('datasets/export/', lazy_view('export_datasets')),
+    path('datasets/recent', lazy_view('get_recent_datasets')),
+    path('datasets/recent/', lazy_view('get_recent_datasets')),
+    path('datasets/<int:dataset_id>/publications', lazy_view('get_dataset_publications')),
+    path('datasets/<int:dataset_id>/publications/', lazy_view('get_dataset_publications')),
+    path('publications', lazy_view('get_publications')),
+    path('publications/', lazy_view('get_publications')),
+    path('publications/search', lazy_view('search_publications')),
+    path('publications/search/', lazy_view('search_publications')),
+    path('publications/export', lazy_view('export_publications')),
+    path('publications/export/', lazy_view('export_publications')),
+    path('publications/recent', lazy_view('get_recent_publications')),
+    path('publications/recent/', lazy_view('get_recent_publications')),
+    path('stats', lazy_view('get_stats')),
+    path('stats/', lazy_view('get_stats')),
+    path('filters', lazy_view('get_filters')),
+    path('filters/', lazy_view('get_filters')),
+    path('analytics/overview', lazy_view('get_analytics_overview')),
+    path('analytics/overview/', lazy_view('get_analytics_overview')),
+    path('cache/stats', lazy_view('get_cache_stats')),
+    path('cache/stats/', lazy_view('get_cache_stats')),
+    # Authentication
+    path('auth/login', lazy_view('admin_login')),
+    path('auth/login/', lazy_view('admin_login')),
+    path('auth/logout', lazy_view('admin_logout')),
+    path('auth/logout/', lazy_view('admin_logout')),
+    path('auth/check', lazy_view('check_auth')),
+    path('auth/check/', lazy_view('check_auth')),
+    # File upload
+    path('upload', lazy_view('upload_file')),
+    path('upload/', lazy_view('upload_file')),
+    # Management - More specific routes first!
+    path('management/pending/<int:upload_id>/approve', lazy_view('approve_upload')),
+    path('management/pending/<int:upload_id>/approve/', lazy_view('approve_upload')),
+    path('management/pending/<int:upload_id>/reject', lazy_view('reject_upload')),
+    path('management/pending/<int:upload_id>/reject/', lazy_view('reject_upload')),
+    path('management/pending/<int:upload_id>', lazy_view('get_pending_upload_detail')),
+    path('management/pending/<int:upload_id>/', lazy_view('get_pending_upload_detail')),
+    path('management/pending', lazy_view('get_pending_uploads')),
+    path('management/pending/', lazy_view('get_pending_uploads')),
+    path('management/jobs/<int:job_id>', lazy_view('get_approval_job')),
+    path('management/jobs/<int:job_id>/', lazy_view('get_approval_job')),
+]
 
 urlpatterns = [
     # Handle both /api/* and /* paths
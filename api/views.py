@@ -1,22 +1,84 @@
 """
 Django views for ADRD Knowledge Graph API
 """
-from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.db import transaction
 from django.utils import timezone
-import csv
 import json
-import base64
-import pandas as pd
-import io
 from . import models
+from . import analytics
+from . import exports
+from . import search as fulltext
+from . import tags
+from . import links
+from . import ingest
+from . import uploads
+from . import staging
+from . import jobs
+from .cache import cached_response, cache_stats
+from .metrics import JsonResponse
+from .pagination import keyset_page, count_rows, PaginationError, COUNT_MODES
 Dataset = models.Dataset
 Publication = models.Publication
 PendingUpload = models.PendingUpload
 AdminUser = models.AdminUser
+ApprovalJob = models.ApprovalJob
+
+# Page size for search endpoints (results are ranked, so callers rarely need more)
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+
+# Page size for list endpoints; per_page is clamped to 1..PAGE_MAX_SIZE
+PAGE_DEFAULT_SIZE = 10
+PAGE_MAX_SIZE = 100
+
+# Keyset sort keys (descending) for cursor pagination; the last key is unique
+DATASET_KEYSET = ['created_at', 'id']
+PUBLICATION_KEYSET = ['year', 'created_at', 'id']
+UPLOAD_KEYSET = ['created_at', 'id']
+
+UPLOAD_STATUSES = [value for value, _ in PendingUpload.STATUS_CHOICES]
+
+# Columns the upload listing reads (never the file_content blob)
+UPLOAD_LIST_FIELDS = [
+    'id', 'file_name', 'file_type', 'uploaded_by', 'status', 'row_count',
+    'review_notes', 'reviewed_by', 'created_at', 'reviewed_at',
+]
+
+
+def _paginate(request, queryset, keyset):
+    """
+    Page a queryset either by page number (Paginator) or by cursor.
+    
+    Cursor mode is selected by passing a `cursor` parameter (empty for the first
+    page). It never runs OFFSET, and only counts when `count=exact|approximate`.
+    Returns (rows, metadata) where metadata is merged into the response.
+    """
+    per_page = min(max(int(request.GET.get('per_page', PAGE_DEFAULT_SIZE)), 1), PAGE_MAX_SIZE)
+    if 'cursor' in request.GET:
+        count_mode = request.GET.get('count', 'none')
+        if count_mode not in COUNT_MODES:
+            raise PaginationError(f"count must be one of {', '.join(COUNT_MODES)}")
+        rows, next_cursor = keyset_page(queryset, keyset, request.GET.get('cursor'), per_page)
+        total, approximate = count_rows(queryset, count_mode)
+        return rows, {
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+            'per_page': per_page,
+            'total': total,
+            'total_is_approximate': approximate
+        }
+    
+    page = int(request.GET.get('page', 1))
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(page), {
+        'total': paginator.count,
+        'pages': paginator.num_pages,
+        'current_page': page
+    }
 
 
 @require_http_methods(["GET"])
@@ -29,34 +91,24 @@ def health_check(request):
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_datasets(request):
     """Get all datasets with optional filtering"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         disease_type = request.GET.get('disease_type')
-        modality = request.GET.get('modality')
         search = request.GET.get('search')
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 10))
         
-        queryset = Dataset.objects.all()
+        queryset = _filter_tags(Dataset.objects.all(), request.GET)
         
         if disease_type:
             queryset = queryset.filter(disease_type__icontains=disease_type)
-        if modality:
-            queryset = queryset.filter(modalities__icontains=modality)
         if search:
             queryset = queryset.filter(name__icontains=search)
         
-        paginator = Paginator(queryset, per_page)
-        datasets_page = paginator.get_page(page)
+        include = links.parse_include(request.GET.get('include'))
+        datasets_page, page_info = _paginate(request, queryset, DATASET_KEYSET)
+        embedded = links.embed_publications(datasets_page, include)
         
-        # Convert to list to ensure data is fetched before closing connection
         datasets_list = [{
             'id': d.id,
             'name': d.name,
@@ -67,36 +119,25 @@ def get_datasets(request):
             'wgs_available': d.wgs_available,
             'imaging_types': d.imaging_types,
             'modalities': d.modalities,
-            'created_at': d.created_at.isoformat() if d.created_at else None
+            'created_at': d.created_at.isoformat() if d.created_at else None,
+            **embedded[d.id]
         } for d in datasets_page]
         
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse({
             'datasets': datasets_list,
-            'total': paginator.count,
-            'pages': paginator.num_pages,
-            'current_page': page
+            **page_info
         })
+    except (PaginationError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_dataset(request, dataset_id):
     """Get a specific dataset by ID"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         dataset = Dataset.objects.get(id=dataset_id)
         
         result = {
@@ -112,42 +153,27 @@ def get_dataset(request, dataset_id):
             'created_at': dataset.created_at.isoformat() if dataset.created_at else None
         }
         
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse(result)
     except Dataset.DoesNotExist:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': 'Dataset not found'}, status=404)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_publications(request):
     """Get all publications with optional filtering"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
+        dataset_id = request.GET.get('dataset_id')
         dataset_name = request.GET.get('dataset_name')
         title_search = request.GET.get('title_search')
         year = request.GET.get('year')
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 10))
         
         queryset = Publication.objects.all()
         
+        if dataset_id:
+            queryset = queryset.filter(dataset_id=int(dataset_id))
         if dataset_name:
             queryset = queryset.filter(dataset_name__icontains=dataset_name)
         if title_search:
@@ -155,10 +181,8 @@ def get_publications(request):
         if year:
             queryset = queryset.filter(year=int(year))
         
-        paginator = Paginator(queryset, per_page)
-        publications_page = paginator.get_page(page)
+        publications_page, page_info = _paginate(request, queryset, PUBLICATION_KEYSET)
         
-        # Convert to list to ensure data is fetched before closing connection
         publications_list = [{
             'id': p.id,
             'title': p.title,
@@ -168,135 +192,152 @@ def get_publications(request):
             'pmid': p.pmid,
             'doi': p.doi,
             'dataset_name': p.dataset_name,
+            'dataset_id': p.dataset_id,
             'created_at': p.created_at.isoformat() if p.created_at else None
         } for p in publications_page]
         
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse({
             'publications': publications_list,
-            'total': paginator.count,
-            'pages': paginator.num_pages,
-            'current_page': page
+            **page_info
         })
+    except (PaginationError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_stats(request):
-    """Get summary statistics"""
-    from django.db import connection, close_old_connections
-    from django.db.models import Count
-    
+    """Get summary statistics (from the analytics snapshot)"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
-        total_datasets = Dataset.objects.count()
-        total_publications = Publication.objects.count()
-        
-        disease_stats = list(Dataset.objects.values('disease_type').annotate(
-            count=Count('id')
-        ).filter(disease_type__isnull=False))
-        
-        # Close connection after use
-        connection.close()
+        overview = analytics.overview(analytics.get_snapshot())
         
         return JsonResponse({
-            'total_datasets': total_datasets,
-            'total_publications': total_publications,
-            'disease_distribution': [
-                {'disease_type': stat['disease_type'], 'count': stat['count']}
-                for stat in disease_stats
-            ]
+            'total_datasets': overview['overview']['total_datasets'],
+            'total_publications': overview['overview']['total_publications'],
+            'disease_distribution': overview['disease_distribution']
         })
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_filters(request):
     """Get available filter options"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
-        disease_types = list(Dataset.objects.values_list('disease_type', flat=True).distinct())
-        disease_types = [d for d in disease_types if d]
-        
-        modalities = [
-            "MRI", "fMRI", "PET", "DTI", "ASL",
-            "SNP Genotyping", "WGS", "WES", "RNA", "Epigenomics",
-            "Proteomics", "Metabolomics", "EHR", "Clinical Cognitive Tests"
-        ]
-        
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse({
-            'disease_types': sorted(disease_types),
-            'modalities': sorted(modalities)
+            'disease_types': tags.tag_options('disease'),
+            'modalities': tags.tag_options('modality'),
+            'imaging_types': tags.tag_options('imaging')
         })
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
+# Fields matched by the free-text `q` parameter when no full-text index exists
+DATASET_TEXT_FIELDS = ['name', 'description']
+PUBLICATION_TEXT_FIELDS = ['title', 'authors']
+
+
+def _filter_tags(queryset, params):
+    """
+    Apply exact modality / imaging type filters through the tag index.
+
+    Terms may be repeated or comma-separated (modality=MRI,PET);
+    modality_match / imaging_match choose 'any' (default) or 'all'.
+    """
+    modalities = tags.parse_filter(params.getlist('modality'))
+    imaging_types = tags.parse_filter(params.getlist('imaging_type'))
+    queryset = tags.filter_by_tags(queryset, 'modality', modalities, params.get('modality_match', 'any'))
+    queryset = tags.filter_by_tags(queryset, 'imaging', imaging_types, params.get('imaging_match', 'any'))
+    return queryset
+
+
+def _filter_datasets(params):
+    """Dataset queryset with the structured search filters applied (everything but q)"""
+    disease_type = params.get('disease_type')
+    min_sample_size = params.get('min_sample_size')
+    max_sample_size = params.get('max_sample_size')
+    data_access = params.get('data_accessibility')
+    wgs_available = params.get('wgs_available')
+    
+    queryset = _filter_tags(Dataset.objects.all(), params)
+    
+    if disease_type:
+        queryset = queryset.filter(disease_type__icontains=disease_type)
+    if min_sample_size:
+        queryset = queryset.filter(sample_size__gte=int(min_sample_size))
+    if max_sample_size:
+        queryset = queryset.filter(sample_size__lte=int(max_sample_size))
+    if data_access:
+        queryset = queryset.filter(data_accessibility__icontains=data_access)
+    if wgs_available:
+        queryset = queryset.filter(wgs_available__icontains=wgs_available)
+    return queryset
+
+
+def _filter_publications(params):
+    """Publication queryset with the structured search filters applied (everything but q)"""
+    dataset_name = params.get('dataset_name')
+    journal = params.get('journal')
+    min_year = params.get('min_year')
+    max_year = params.get('max_year')
+    author = params.get('author')
+    
+    queryset = Publication.objects.all()
+    
+    if dataset_name:
+        queryset = queryset.filter(dataset_name__icontains=dataset_name)
+    if journal:
+        queryset = queryset.filter(journal__icontains=journal)
+    if min_year:
+        queryset = queryset.filter(year__gte=int(min_year))
+    if max_year:
+        queryset = queryset.filter(year__lte=int(max_year))
+    if author:
+        queryset = queryset.filter(authors__icontains=author)
+    return queryset
+
+
+def _match_text(queryset, query, fields):
+    """Restrict queryset to rows matching free-text query, through the index when available"""
+    if not query.strip():
+        return queryset
+    if fulltext.search_available():
+        return fulltext.match_queryset(queryset, query)
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return queryset.filter(condition)
+
+
+def _search_window(request):
+    """Parse limit/offset for search endpoints"""
+    limit = min(max(int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    offset = max(int(request.GET.get('offset', 0)), 0)
+    return limit, offset
+
+
 @require_http_methods(["GET"])
 def search_datasets(request):
-    """Advanced search for datasets"""
-    from django.db import connection, close_old_connections
-    
+    """Advanced search for datasets, ranked by relevance when q is given"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         query = request.GET.get('q', '')
-        disease_type = request.GET.get('disease_type')
-        modality = request.GET.get('modality')
-        min_sample_size = request.GET.get('min_sample_size')
-        max_sample_size = request.GET.get('max_sample_size')
-        data_access = request.GET.get('data_accessibility')
-        wgs_available = request.GET.get('wgs_available')
-        
-        search_query = Dataset.objects.all()
+        limit, offset = _search_window(request)
+        include = links.parse_include(request.GET.get('include'))
         
-        if query:
-            search_query = search_query.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
-            )
-        if disease_type:
-            search_query = search_query.filter(disease_type__icontains=disease_type)
-        if modality:
-            search_query = search_query.filter(modalities__icontains=modality)
-        if min_sample_size:
-            search_query = search_query.filter(sample_size__gte=int(min_sample_size))
-        if max_sample_size:
-            search_query = search_query.filter(sample_size__lte=int(max_sample_size))
-        if data_access:
-            search_query = search_query.filter(data_accessibility__icontains=data_access)
-        if wgs_available:
-            search_query = search_query.filter(wgs_available__icontains=wgs_available)
+        search_query = _filter_datasets(request.GET)
         
-        datasets = list(search_query.all())
+        ranked = bool(query.strip()) and fulltext.search_available()
+        if ranked:
+            results, total = fulltext.ranked_search(search_query, query, limit=limit, offset=offset)
+        else:
+            search_query = _match_text(search_query, query, DATASET_TEXT_FIELDS)
+            total = search_query.count()
+            results = [(d, None, {}) for d in search_query[offset:offset + limit]]
+        embedded = links.embed_publications([d for d, _, _ in results], include)
         
         datasets_list = [{
             'id': d.id,
@@ -308,59 +349,41 @@ def search_datasets(request):
             'wgs_available': d.wgs_available,
             'imaging_types': d.imaging_types,
             'modalities': d.modalities,
-            'created_at': d.created_at.isoformat() if d.created_at else None
-        } for d in datasets]
-        
-        # Close connection after use
-        connection.close()
+            'created_at': d.created_at.isoformat() if d.created_at else None,
+            'score': score,
+            'highlights': highlights,
+            **embedded[d.id]
+        } for d, score, highlights in results]
         
         return JsonResponse({
             'datasets': datasets_list,
-            'total': len(datasets_list)
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'ranked': ranked
         })
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
 def search_publications(request):
-    """Advanced search for publications"""
-    from django.db import connection, close_old_connections
-    
+    """Advanced search for publications, ranked by relevance when q is given"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         query = request.GET.get('q', '')
-        dataset_name = request.GET.get('dataset_name')
-        journal = request.GET.get('journal')
-        min_year = request.GET.get('min_year')
-        max_year = request.GET.get('max_year')
-        author = request.GET.get('author')
-        
-        search_query = Publication.objects.all()
+        limit, offset = _search_window(request)
         
-        if query:
-            search_query = search_query.filter(
-                Q(title__icontains=query) | Q(authors__icontains=query)
-            )
-        if dataset_name:
-            search_query = search_query.filter(dataset_name__icontains=dataset_name)
-        if journal:
-            search_query = search_query.filter(journal__icontains=journal)
-        if min_year:
-            search_query = search_query.filter(year__gte=int(min_year))
-        if max_year:
-            search_query = search_query.filter(year__lte=int(max_year))
-        if author:
-            search_query = search_query.filter(authors__icontains=author)
+        search_query = _filter_publications(request.GET)
         
-        publications = list(search_query.all())
+        ranked = bool(query.strip()) and fulltext.search_available()
+        if ranked:
+            results, total = fulltext.ranked_search(search_query, query, limit=limit, offset=offset)
+        else:
+            search_query = _match_text(search_query, query, PUBLICATION_TEXT_FIELDS)
+            total = search_query.count()
+            results = [(p, None, {}) for p in search_query[offset:offset + limit]]
         
         publications_list = [{
             'id': p.id,
@@ -371,116 +394,63 @@ def search_publications(request):
             'pmid': p.pmid,
             'doi': p.doi,
             'dataset_name': p.dataset_name,
-            'created_at': p.created_at.isoformat() if p.created_at else None
-        } for p in publications]
-        
-        # Close connection after use
-        connection.close()
+            'created_at': p.created_at.isoformat() if p.created_at else None,
+            'score': score,
+            'highlights': highlights
+        } for p, score, highlights in results]
         
         return JsonResponse({
             'publications': publications_list,
-            'total': len(publications_list)
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'ranked': ranked
         })
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
 def export_datasets(request):
-    """Export datasets to CSV"""
-    from django.db import connection, close_old_connections
-    
+    """Export datasets matching the search filters (format=csv|ndjson|arrow|parquet|xlsx)"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
-        datasets = list(Dataset.objects.all())
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="adrd_datasets.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'ID', 'Name', 'Description', 'Disease Type', 'Sample Size',
-            'Data Accessibility', 'WGS Available', 'Imaging Types',
-            'Modalities', 'Created At'
-        ])
-        
-        for d in datasets:
-            writer.writerow([
-                d.id, d.name, d.description, d.disease_type, d.sample_size,
-                d.data_accessibility, d.wgs_available, d.imaging_types,
-                d.modalities, d.created_at.isoformat() if d.created_at else None
-            ])
-        
-        # Close connection after use
-        connection.close()
-        
-        return response
+        queryset = _filter_datasets(request.GET)
+        queryset = _match_text(queryset, request.GET.get('q', ''), DATASET_TEXT_FIELDS)
+        return exports.export_response(
+            queryset, exports.DATASET_EXPORT_COLUMNS, 'adrd_datasets',
+            request.GET.get('format', 'csv')
+        )
+    except (exports.ExportFormatError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
 def export_publications(request):
-    """Export publications to CSV"""
-    from django.db import connection, close_old_connections
-    
+    """Export publications matching the search filters (format=csv|ndjson|arrow|parquet|xlsx)"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
-        publications = list(Publication.objects.all())
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="adrd_publications.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'ID', 'Title', 'Authors', 'Journal', 'Year',
-            'PMID', 'DOI', 'Dataset Name', 'Created At'
-        ])
-        
-        for p in publications:
-            writer.writerow([
-                p.id, p.title, p.authors, p.journal, p.year,
-                p.pmid, p.doi, p.dataset_name, p.created_at.isoformat() if p.created_at else None
-            ])
-        
-        # Close connection after use
-        connection.close()
-        
-        return response
+        queryset = _filter_publications(request.GET)
+        queryset = _match_text(queryset, request.GET.get('q', ''), PUBLICATION_TEXT_FIELDS)
+        return exports.export_response(
+            queryset, exports.PUBLICATION_EXPORT_COLUMNS, 'adrd_publications',
+            request.GET.get('format', 'csv')
+        )
+    except (exports.ExportFormatError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_dataset_publications(request, dataset_id):
     """Get publications for a specific dataset"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         dataset = Dataset.objects.get(id=dataset_id)
-        publications = list(Publication.objects.filter(dataset_name=dataset.name))
+        publications = list(dataset.publications.all())
         
         publications_list = [{
             'id': p.id,
@@ -492,9 +462,6 @@ def get_dataset_publications(request, dataset_id):
             'doi': p.doi
         } for p in publications]
         
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse({
             'dataset': {
                 'id': dataset.id,
@@ -505,98 +472,35 @@ def get_dataset_publications(request, dataset_id):
             'total': len(publications_list)
         })
     except Dataset.DoesNotExist:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': 'Dataset not found'}, status=404)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_analytics_overview(request):
-    """Get comprehensive analytics overview"""
-    from django.db import connection, close_old_connections
-    from django.db.models import Count
-    
+    """Get comprehensive analytics overview (from the analytics snapshot)"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
-        total_datasets = Dataset.objects.count()
-        total_publications = Publication.objects.count()
-        
-        disease_stats = list(Dataset.objects.values('disease_type').annotate(
-            count=Count('id')
-        ).filter(disease_type__isnull=False))
-        
-        sample_sizes = list(Dataset.objects.filter(sample_size__isnull=False).values_list('sample_size', flat=True))
-        sample_sizes = [s for s in sample_sizes if s]
-        
-        year_stats = list(Publication.objects.values('year').annotate(
-            count=Count('id')
-        ).filter(year__isnull=False).order_by('-year'))
-        
-        access_stats = list(Dataset.objects.values('data_accessibility').annotate(
-            count=Count('id')
-        ).filter(data_accessibility__isnull=False))
-        
-        wgs_stats = list(Dataset.objects.values('wgs_available').annotate(
-            count=Count('id')
-        ).filter(wgs_available__isnull=False))
-        
-        # Close connection after use
-        connection.close()
-        
-        return JsonResponse({
-            'overview': {
-                'total_datasets': total_datasets,
-                'total_publications': total_publications,
-                'avg_sample_size': sum(sample_sizes) / len(sample_sizes) if sample_sizes else 0,
-                'min_sample_size': min(sample_sizes) if sample_sizes else 0,
-                'max_sample_size': max(sample_sizes) if sample_sizes else 0
-            },
-            'disease_distribution': [
-                {'disease_type': stat['disease_type'], 'count': stat['count']}
-                for stat in disease_stats
-            ],
-            'publication_years': [
-                {'year': stat['year'], 'count': stat['count']}
-                for stat in year_stats
-            ],
-            'data_accessibility': [
-                {'accessibility': stat['data_accessibility'], 'count': stat['count']}
-                for stat in access_stats
-            ],
-            'wgs_availability': [
-                {'availability': stat['wgs_available'], 'count': stat['count']}
-                for stat in wgs_stats
-            ]
-        })
+        return JsonResponse(analytics.overview(analytics.get_snapshot()))
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def get_cache_stats(request):
+    """Response cache hit/miss/eviction statistics"""
+    try:
+        return JsonResponse(cache_stats())
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_recent_datasets(request):
     """Get recently added datasets"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         limit = int(request.GET.get('limit', 5))
         datasets = list(Dataset.objects.order_by('-created_at')[:limit])
         
@@ -609,30 +513,18 @@ def get_recent_datasets(request):
             'created_at': d.created_at.isoformat() if d.created_at else None
         } for d in datasets]
         
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse({
             'datasets': datasets_list
         })
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @require_http_methods(["GET"])
+@cached_response
 def get_recent_publications(request):
     """Get recently added publications"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         limit = int(request.GET.get('limit', 5))
         publications = list(Publication.objects.order_by('-created_at')[:limit])
         
@@ -646,17 +538,10 @@ def get_recent_publications(request):
             'created_at': p.created_at.isoformat() if p.created_at else None
         } for p in publications]
         
-        # Close connection after use
-        connection.close()
-        
         return JsonResponse({
             'publications': publications_list
         })
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
@@ -711,140 +596,72 @@ def check_auth(request):
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_pending_uploads(request):
-    """Get all pending uploads (or all uploads if status='all')"""
-    from django.db import connection, close_old_connections
-    from .models import PendingUpload
-    
+    """List uploads with one status (page or cursor pagination) plus per-status counts"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        
-        # Ensure database is initialized
-        try:
-            table_name = PendingUpload._meta.db_table
-            with connection.cursor() as cursor:
-                if connection.vendor == 'sqlite':
-                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=%s;", [table_name])
-                    table_exists = cursor.fetchone()
-                else:
-                    cursor.execute("SELECT to_regclass(%s);", [table_name])
-                    table_exists = cursor.fetchone()[0]
-            if not table_exists:
-                print(f"Table {table_name} doesn't exist, initializing...")
-                with connection.schema_editor() as schema_editor:
-                    schema_editor.create_model(PendingUpload)
-                print(f"Table {table_name} created")
-        except Exception as init_error:
-            print(f"Database init check error (non-fatal): {init_error}")
-            import traceback
-            traceback.print_exc()
-        
         status = request.GET.get('status', 'pending')
+        if status not in UPLOAD_STATUSES:
+            return JsonResponse({'error': f"status must be one of {', '.join(UPLOAD_STATUSES)}"}, status=400)
         
-        # Ensure connection is open
-        connection.ensure_connection()
-        
-        # Filter by status (removed 'all' option to simplify)
-        queryset = PendingUpload.objects.filter(status=status).order_by('-created_at')
-        
-        # Force evaluation by converting to list immediately (before closing connection)
-        pending_uploads = list(queryset)
-        
-        print(f"Fetching uploads with status='{status}': {len(pending_uploads)} found")
-        if len(pending_uploads) > 0:
-            print(f"Sample upload IDs and statuses: {[(u.id, u.status) for u in pending_uploads[:5]]}")
+        # Metadata columns only; served by the (status, created_at) index
+        queryset = PendingUpload.objects.filter(status=status).only(*UPLOAD_LIST_FIELDS).order_by('-created_at', '-id')
+        page, pagination = _paginate(request, queryset, UPLOAD_KEYSET)
         
-        # Double-check: verify all returned uploads have the correct status
-        for u in pending_uploads:
-            if u.status != status:
-                print(f"ERROR: Upload {u.id} has status '{u.status}' but filter requested '{status}'")
-        
-        # Convert to list to ensure we can serialize
-        uploads_list = []
-        for u in pending_uploads:
-            uploads_list.append({
-                'id': u.id,
-                'file_name': u.file_name,
-                'file_type': u.file_type,
-                'uploaded_by': u.uploaded_by,
-                'status': u.status,
-                'review_notes': u.review_notes,
-                'reviewed_by': u.reviewed_by,
-                'created_at': u.created_at.isoformat() if u.created_at else None,
-                'reviewed_at': u.reviewed_at.isoformat() if u.reviewed_at else None,
-            })
+        # Tab badges: every status counted in a single aggregate
+        counts = PendingUpload.objects.aggregate(**{
+            value: Count('id', filter=Q(status=value)) for value in UPLOAD_STATUSES
+        })
         
-        # Close connection after use
-        connection.close()
+        uploads_list = [{
+            'id': u.id,
+            'file_name': u.file_name,
+            'file_type': u.file_type,
+            'uploaded_by': u.uploaded_by,
+            'status': u.status,
+            'row_count': u.row_count,
+            'review_notes': u.review_notes,
+            'reviewed_by': u.reviewed_by,
+            'created_at': u.created_at.isoformat() if u.created_at else None,
+            'reviewed_at': u.reviewed_at.isoformat() if u.reviewed_at else None,
+        } for u in page]
+        print(f"Fetching uploads with status='{status}': {len(uploads_list)} of {counts[status]}")
         
         return JsonResponse({
             'uploads': uploads_list,
-            'total': len(uploads_list),
-            'status_filter': status
+            'status_filter': status,
+            'counts': counts,
+            **pagination
         })
+    except PaginationError as e:
+        return JsonResponse({'error': str(e), 'uploads': [], 'total': 0}, status=400)
     except Exception as e:
         print(f"Error in get_pending_uploads: {e}")
         import traceback
         traceback.print_exc()
-        # Ensure connection is closed even on error
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e), 'uploads': [], 'total': 0}, status=500)
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_pending_upload_detail(request, upload_id):
-    """Get detailed information about a pending upload"""
-    from django.db import connection, close_old_connections
-    
+    """Get an upload's metadata, column stats and one window of its staged rows (offset/limit)"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
-        upload = PendingUpload.objects.get(id=upload_id)
+        upload = PendingUpload.objects.defer('file_content').get(id=upload_id)
+        limit = min(max(int(request.GET.get('limit', staging.PREVIEW_DEFAULT_LIMIT)), 1), staging.PREVIEW_MAX_LIMIT)
+        offset = max(int(request.GET.get('offset', 0)), 0)
         
-        # Parse file content
-        file_content = None
-        try:
-            if upload.file_content:
-                file_content = json.loads(upload.file_content)
-                # Ensure all values are JSON serializable
-                if isinstance(file_content, list):
-                    for record in file_content:
-                        if isinstance(record, dict):
-                            for key, value in record.items():
-                                # Convert any non-serializable types
-                                try:
-                                    # Check for NaN values (pandas/numpy)
-                                    if value is None or (hasattr(value, '__class__') and str(value) == 'nan'):
-                                        record[key] = ''
-                                    elif pd.isna(value):
-                                        record[key] = ''
-                                    elif not isinstance(value, (str, int, float, bool, type(None))):
-                                        # Try to convert to string
-                                        record[key] = str(value)
-                                except:
-                                    # If anything fails, set to empty string
-                                    record[key] = ''
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}")
-            file_content = None
-        except Exception as e:
-            print(f"Error parsing file_content: {e}")
-            file_content = None
-        
-        # Close connection after use
-        connection.close()
+        rows = staging.row_window(upload.id, offset, limit)
+        column_stats = staging.column_stats(upload)
         
         return JsonResponse({
             'id': upload.id,
             'file_name': upload.file_name,
             'file_type': upload.file_type,
-            'file_content': file_content if file_content else [],
+            'file_content': rows,
+            'offset': offset,
+            'limit': limit,
+            'total_rows': upload.row_count,
+            'column_stats': column_stats,
+            'column_mapping': ingest.resolve_columns([c['name'] for c in column_stats]) if column_stats else {},
             'uploaded_by': upload.uploaded_by,
             'status': upload.status,
             'review_notes': upload.review_notes,
@@ -852,17 +669,11 @@ def get_pending_upload_detail(request, upload_id):
             'created_at': upload.created_at.isoformat() if upload.created_at else None,
             'reviewed_at': upload.reviewed_at.isoformat() if upload.reviewed_at else None,
         })
+    except ValueError:
+        return JsonResponse({'error': 'offset and limit must be integers'}, status=400)
     except PendingUpload.DoesNotExist:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': 'Upload not found'}, status=404)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         print(f"Error in get_pending_upload_detail: {e}")
         import traceback
         traceback.print_exc()
@@ -872,16 +683,10 @@ def get_pending_upload_detail(request, upload_id):
 @csrf_exempt
 @require_http_methods(["POST"])
 def approve_upload(request, upload_id):
-    """Approve a pending upload and add to database"""
-    from django.db import connection, close_old_connections
-    
+    """Queue approval of a pending upload; returns 202 with a job id to poll"""
     print(f"approve_upload called with upload_id={upload_id}, path={request.path}, method={request.method}")
     
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         body = request.body.decode('utf-8') if isinstance(request.body, bytes) else request.body
         data = json.loads(body)
         review_notes = data.get('review_notes', '')
@@ -889,186 +694,33 @@ def approve_upload(request, upload_id):
         
         # Get upload - don't filter by status='pending' in case it was already processed
         try:
-            upload = PendingUpload.objects.get(id=upload_id)
+            upload = PendingUpload.objects.defer('file_content').get(id=upload_id)
             if upload.status != 'pending':
                 print(f"WARNING: Upload {upload_id} is not pending (status: {upload.status}), but proceeding with approval")
         except PendingUpload.DoesNotExist:
-            try:
-                connection.close()
-            except:
-                pass
             return JsonResponse({'error': 'Upload not found'}, status=404)
         
-        # Parse file content
-        try:
-            file_data = json.loads(upload.file_content)
-        except Exception as e:
-            print(f"Error parsing file_content: {e}")
-            try:
-                connection.close()
-            except:
-                pass
-            return JsonResponse({'error': f'Invalid file content format: {str(e)}'}, status=400)
-        
-        if not isinstance(file_data, list) or len(file_data) == 0:
-            try:
-                connection.close()
-            except:
-                pass
+        if upload.row_count == 0:
             return JsonResponse({'error': 'No data found in file'}, status=400)
         
-        # Log the actual column names in the file for debugging
-        if len(file_data) > 0:
-            actual_columns = list(file_data[0].keys())
-            print(f"Actual columns in file: {actual_columns}")
-        
-        # Helper function to get value from row with multiple possible keys (case-insensitive)
-        def get_value(row, possible_keys, default=''):
-            # First try exact match
-            for key in possible_keys:
-                if key in row:
-                    value = row[key]
-                    return str(value).strip() if value else default
-            
-            # Then try case-insensitive and normalized match
-            for key in possible_keys:
-                for row_key in row.keys():
-                    # Normalize both keys for comparison (remove spaces, underscores, hyphens, dots, case)
-                    def normalize(s):
-                        return s.lower().replace(' ', '').replace('_', '').replace('-', '').replace('.', '').strip()
-                    
-                    if normalize(row_key) == normalize(key):
-                        value = row[row_key]
-                        return str(value).strip() if value else default
-            
-            # Try partial match (contains)
-            for key in possible_keys:
-                key_normalized = key.lower().replace(' ', '').replace('_', '').replace('-', '').replace('.', '')
-                for row_key in row.keys():
-                    row_key_normalized = row_key.lower().replace(' ', '').replace('_', '').replace('-', '').replace('.', '')
-                    # Check if key is contained in row_key or vice versa
-                    if key_normalized in row_key_normalized or row_key_normalized in key_normalized:
-                        value = row[row_key]
-                        return str(value).strip() if value else default
-            
-            return default
-        
-        # Process and add to database
-        added_count = 0
-        error_count = 0
-        errors = []
-        
-        for idx, row in enumerate(file_data):
-            try:
-                # Get values with flexible column name matching
-                name = get_value(row, ['Dataset Name', 'name', 'dataset_name', 'Dataset', 'Title'], '')
-                description = get_value(row, ['Description', 'description', 'desc', 'Summary'], '')
-                disease_type = get_value(row, ['Disease Type', 'disease_type', 'disease', 'Disease', 'Type'], '')
-                
-                # Handle sample size - try to convert to int
-                sample_size_str = get_value(row, ['Sample Size', 'sample_size', 'Sample Size', 'n', 'N', 'size'], '0')
-                try:
-                    # Remove any non-numeric characters except minus sign
-                    sample_size = int(''.join(c for c in str(sample_size_str) if c.isdigit() or c == '-') or '0')
-                except:
-                    sample_size = 0
-                
-                data_accessibility = get_value(row, ['Data Accessibility', 'data_accessibility', 'Accessibility', 'access', 'Access'], '')
-                wgs_available = get_value(row, ['WGS Available', 'wgs_available', 'WGS', 'wgs', 'WGS Available?'], '')
-                imaging_types = get_value(row, ['Imaging Types', 'imaging_types', 'Imaging', 'imaging', 'Imaging Types'], '')
-                modalities = get_value(row, ['Modalities', 'modalities', 'Modality', 'modality', 'Data Types'], '')
-                
-                # Skip if essential fields are missing
-                if not name:
-                    error_count += 1
-                    available_keys = list(row.keys())
-                    errors.append(f"Row {idx + 1}: Missing dataset name. Available columns: {', '.join(available_keys)}")
-                    print(f"Row {idx + 1} - Available columns: {available_keys}")
-                    print(f"Row {idx + 1} - Row data: {row}")
-                    continue
-                
-                # Create dataset
-                try:
-                    Dataset.objects.create(
-                        name=name,
-                        description=description,
-                        disease_type=disease_type,
-                        sample_size=sample_size,
-                        data_accessibility=data_accessibility,
-                        wgs_available=wgs_available,
-                        imaging_types=imaging_types,
-                        modalities=modalities
-                    )
-                    added_count += 1
-                    print(f"Successfully added dataset: {name}")
-                except Exception as db_error:
-                    error_count += 1
-                    error_msg = f"Row {idx + 1}: Database error - {str(db_error)}"
-                    errors.append(error_msg)
-                    print(f"Database error for row {idx + 1}: {db_error}")
-                    import traceback
-                    traceback.print_exc()
-                
-            except Exception as e:
-                error_count += 1
-                error_msg = f"Row {idx + 1}: {str(e)}"
-                errors.append(error_msg)
-                print(f"Error processing row {idx + 1}: {e}")
-                print(f"Row {idx + 1} data: {row}")
-                import traceback
-                traceback.print_exc()
-        
-        # Update upload status - ensure it's saved properly
-        upload.status = 'approved'
-        upload.review_notes = review_notes
-        upload.reviewed_by = reviewed_by
-        upload.reviewed_at = timezone.now()
-        upload.save(update_fields=['status', 'review_notes', 'reviewed_by', 'reviewed_at'])
-        
-        # Force commit by ensuring transaction is committed
-        from django.db import transaction
-        transaction.commit()
-        
-        # Force commit by refreshing from database
-        upload.refresh_from_db()
-        print(f"Upload {upload.id} status updated to: {upload.status} (verified)")
-        
-        # Verify the status was actually saved (before closing connection)
-        try:
-            verify_upload = PendingUpload.objects.get(id=upload.id)
-            if verify_upload.status != 'approved':
-                print(f"WARNING: Upload {upload.id} status is {verify_upload.status}, expected 'approved'")
-            else:
-                print(f"[OK] Upload {upload.id} status confirmed as 'approved'")
-        except Exception as verify_error:
-            print(f"Error verifying upload status: {verify_error}")
-        
-        # Close connection after use
-        connection.close()
-        
-        # Return result with counts
-        message = f'Successfully added {added_count} dataset(s) to the database.'
-        if error_count > 0:
-            message += f' {error_count} row(s) had errors.'
+        # Rows are ingested by a worker (see api/jobs.py); poll management/jobs/<id>.
+        # A profile of the enqueue alone would be empty, so profiled requests
+        # run the ingest here too (api/profiling.py)
+        inline = jobs.APPROVAL_WORKER == 'inline' or getattr(request, 'profiled', False)
+        job = jobs.enqueue_approval(upload, review_notes, reviewed_by, wake=not inline)
+        if inline:
+            job = jobs.run_inline(job)
+        print(f"Approval job {job.id} for upload {upload.id} ({upload.row_count} rows): {job.status}")
         
+        finished = job.status not in jobs.ACTIVE_STATUSES
         return JsonResponse({
-            'success': True,
-            'message': message,
-            'added_count': added_count,
-            'error_count': error_count,
-            'errors': errors[:10] if errors else []  # Return first 10 errors
-        })
-    except PendingUpload.DoesNotExist:
-        try:
-            connection.close()
-        except:
-            pass
-        return JsonResponse({'error': 'Upload not found'}, status=404)
+            'success': job.status != 'failed',
+            'message': f'Approval {job.status} for {upload.row_count} row(s).',
+            'job_id': job.id,
+            'status': job.status,
+            'total_rows': job.total_rows,
+        }, status=200 if finished else 202)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         error_msg = str(e)
         print(f"Error in approve_upload: {error_msg}")
         import traceback
@@ -1080,17 +732,24 @@ def approve_upload(request, upload_id):
         }, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_approval_job(request, job_id):
+    """Progress of an approval job: rows processed, rate, ETA and row errors"""
+    try:
+        job = ApprovalJob.objects.get(id=job_id)
+        return JsonResponse(jobs.job_progress(job))
+    except ApprovalJob.DoesNotExist:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def reject_upload(request, upload_id):
     """Reject a pending upload"""
-    from django.db import connection, close_old_connections
-    
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
-        
         body = request.body.decode('utf-8') if isinstance(request.body, bytes) else request.body
         data = json.loads(body)
         review_notes = data.get('review_notes', '')
@@ -1098,65 +757,90 @@ def reject_upload(request, upload_id):
         
         # Get upload - don't filter by status='pending' in case it was already processed
         try:
-            upload = PendingUpload.objects.get(id=upload_id)
+            upload = PendingUpload.objects.only('id', 'status').get(id=upload_id)
             if upload.status != 'pending':
                 print(f"WARNING: Upload {upload_id} is not pending (status: {upload.status}), but proceeding with rejection")
         except PendingUpload.DoesNotExist:
-            try:
-                connection.close()
-            except:
-                pass
             return JsonResponse({'error': 'Upload not found'}, status=404)
         
         upload.status = 'rejected'
         upload.review_notes = review_notes
         upload.reviewed_by = reviewed_by
         upload.reviewed_at = timezone.now()
+        # Autocommit: the UPDATE is durable once save() returns, no read-back needed
         upload.save(update_fields=['status', 'review_notes', 'reviewed_by', 'reviewed_at'])
-        
-        # Force commit by refreshing from database
-        upload.refresh_from_db()
-        print(f"Upload {upload.id} status updated to: {upload.status} (verified)")
-        
-        # Verify the status was actually saved
-        verify_upload = PendingUpload.objects.get(id=upload.id)
-        if verify_upload.status != 'rejected':
-            print(f"WARNING: Upload {upload.id} status is {verify_upload.status}, expected 'rejected'")
-        else:
-            print(f"[OK] Upload {upload.id} status confirmed as 'rejected'")
-        
-        # Close connection after use
-        connection.close()
+        print(f"[OK] Upload {upload.id} status updated to: rejected")
         
         return JsonResponse({
             'success': True,
             'message': 'Upload rejected'
         })
     except PendingUpload.DoesNotExist:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': 'Upload not found'}, status=404)
     except Exception as e:
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
 
 # File upload endpoint
+def _create_upload(file_name, file_type, uploaded_by, rows):
+    """Save a pending upload and stage its rows; nothing is kept if parsing fails midway"""
+    with transaction.atomic():
+        pending_upload = PendingUpload.objects.create(
+            file_name=file_name,
+            file_content='',
+            file_type=file_type,
+            uploaded_by=uploaded_by,
+            status='pending'
+        )
+        staging.stage_rows(pending_upload, rows)
+    return pending_upload
+
+
+def _upload_multipart(request):
+    """Spool a multipart upload to a temporary file and parse it from disk"""
+    too_large = JsonResponse(
+        {'error': f'File too large (limit is {uploads.UPLOAD_MAX_BYTES:,} bytes)'}, status=413
+    )
+    # Reject on the declared size before reading any of the body
+    if int(request.META.get('CONTENT_LENGTH') or 0) > uploads.UPLOAD_MAX_BYTES:
+        return too_large
+    
+    handler = uploads.LimitedUploadHandler(request)
+    request.upload_handlers = [handler]
+    uploaded = request.FILES.get('file')
+    if handler.exceeded:
+        return too_large
+    if uploaded is None:
+        return JsonResponse({'error': 'File required'}, status=400)
+    
+    file_name = request.POST.get('file_name') or uploaded.name
+    file_type = request.POST.get('file_type') or uploads.file_type_of(file_name)
+    uploaded_by = request.POST.get('uploaded_by', '')
+    try:
+        pending_upload = _create_upload(
+            file_name, file_type, uploaded_by, uploads.parse_file(uploaded.file, file_type)
+        )
+    except uploads.UploadParseError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    finally:
+        uploaded.close()
+    print(f"Created pending upload with ID: {pending_upload.id}, file_name: {file_name} "
+          f"({uploaded.size} bytes, {pending_upload.row_count} rows)")
+    
+    return JsonResponse({
+        'success': True,
+        'message': 'File uploaded successfully and pending review',
+        'upload_id': pending_upload.id
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def upload_file(request):
-    """Upload a file for review"""
-    from django.db import connection, close_old_connections
-    
+    """Upload a file for review (multipart/form-data, or legacy base64 JSON body)"""
     try:
-        # Close any stale connections and ensure fresh connection
-        close_old_connections()
-        connection.ensure_connection()
+        if request.content_type == 'multipart/form-data':
+            return _upload_multipart(request)
         
         body = request.body.decode('utf-8') if isinstance(request.body, bytes) else request.body
         data = json.loads(body)
@@ -1168,117 +852,15 @@ def upload_file(request):
         if not file_name or not file_content:
             return JsonResponse({'error': 'File name and content required'}, status=400)
         
-        # Parse file content based on type
-        parsed_content = None
+        # Parse file content into rows and stage them
         try:
-            if file_type == 'csv':
-                # If base64 encoded, decode it
-                if file_content.startswith('data:'):
-                    # Remove data URL prefix
-                    file_content = file_content.split(',')[1]
-                
-                try:
-                    # Try to decode base64
-                    decoded = base64.b64decode(file_content)
-                    content_str = decoded.decode('utf-8')
-                except:
-                    # If not base64, use as-is
-                    content_str = file_content
-                
-                # Parse CSV
-                csv_reader = csv.DictReader(io.StringIO(content_str))
-                parsed_content = list(csv_reader)
-            elif file_type in ['xlsx', 'xls']:
-                # For Excel files, decode base64 and parse
-                if file_content.startswith('data:'):
-                    file_content = file_content.split(',')[1]
-                
-                decoded = base64.b64decode(file_content)
-                df = pd.read_excel(io.BytesIO(decoded))
-                
-                # Replace NaN values and convert to native Python types
-                df = df.fillna('')  # Replace NaN with empty string
-                
-                # Convert all columns to string first to avoid type issues, then parse back
-                # This ensures all data is JSON serializable
-                parsed_content = []
-                for _, row in df.iterrows():
-                    record = {}
-                    for col in df.columns:
-                        value = row[col]
-                        # Convert to native Python type
-                        if pd.isna(value) or value == '':
-                            record[col] = ''
-                        elif isinstance(value, (pd.Timestamp, pd.DatetimeTZDtype)):
-                            record[col] = str(value)
-                        elif hasattr(value, 'item'):  # numpy types
-                            try:
-                                record[col] = value.item()
-                            except:
-                                record[col] = str(value)
-                        elif isinstance(value, (int, float)):
-                            # Keep numbers as-is but ensure they're native Python types
-                            record[col] = float(value) if isinstance(value, float) else int(value)
-                        elif isinstance(value, bool):
-                            record[col] = bool(value)
-                        else:
-                            # Convert everything else to string
-                            record[col] = str(value) if value else ''
-                    parsed_content.append(record)
-            else:
-                return JsonResponse({'error': 'Unsupported file type'}, status=400)
-        except Exception as e:
-            return JsonResponse({'error': f'Error parsing file: {str(e)}'}, status=400)
-        
-        # Save as pending upload
-        # Ensure parsed_content is JSON serializable before saving
-        try:
-            # Test JSON serialization
-            json_str = json.dumps(parsed_content)
-            # If successful, save to database
-            pending_upload = PendingUpload.objects.create(
-                file_name=file_name,
-                file_content=json_str,
-                file_type=file_type,
-                uploaded_by=uploaded_by,
-                status='pending'
-            )
-            # Force commit by accessing the ID (ensures it's saved)
-            upload_id = pending_upload.id
-            print(f"Created pending upload with ID: {upload_id}, file_name: {file_name}")
-            
-            # Close connection after use
-            connection.close()
-        except (TypeError, ValueError) as e:
-            # If JSON serialization fails, try to clean the data more
-            print(f"JSON serialization error: {e}")
-            # Clean the data one more time
-            cleaned_content = []
-            for record in parsed_content:
-                cleaned_record = {}
-                for key, value in record.items():
-                    try:
-                        # Try to serialize each value
-                        json.dumps(value)
-                        cleaned_record[key] = value
-                    except:
-                        # If it fails, convert to string
-                        cleaned_record[key] = str(value) if value else ''
-                cleaned_content.append(cleaned_record)
-            
-            pending_upload = PendingUpload.objects.create(
-                file_name=file_name,
-                file_content=json.dumps(cleaned_content),
-                file_type=file_type,
-                uploaded_by=uploaded_by,
-                status='pending'
+            pending_upload = _create_upload(
+                file_name, file_type, uploaded_by, uploads.parse_upload(file_content, file_type)
             )
-            # Force commit by accessing the ID
-            upload_id = pending_upload.id
-            print(f"Created pending upload with ID: {upload_id}, file_name: {file_name}")
-        
-        # Close connection after use
-        connection.close()
+        except uploads.UploadParseError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        upload_id = pending_upload.id
+        print(f"Created pending upload with ID: {upload_id}, file_name: {file_name} ({pending_upload.row_count} rows)")
         
         return JsonResponse({
             'success': True,
@@ -1286,10 +868,5 @@ def upload_file(request):
             'upload_id': upload_id
         })
     except Exception as e:
-        # Ensure connection is closed even on error
-        try:
-            connection.close()
-        except:
-            pass
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -0,0 +1,198 @@
+"""
+Synthetic catalog generation for benchmarks
+
+Rows are built lazily and inserted with bulk_create in batches, so seeding a
+million rows does not need a million model instances in memory at once.
+
+By default values come from the fixed vocabularies below. Pass a
+CatalogProfile (load_profile) to draw them from the distributions of the
+sample files instead: ADRD_Metadata_Sample_Big.xlsx for datasets and
+pubmed_refs_fetched.csv for publications.
+"""
+import itertools
+import os
+import random
+import re
+
+DISEASE_TYPES = [
+    "Alzheimer's Disease", "Lewy Body Dementia", "Frontotemporal Dementia",
+    "Vascular Dementia", "Mixed Dementia", "Multiple Dementia Types",
+]
+ACCESSIBILITY = ["Open", "Open with application", "Restricted", "Controlled access"]
+WGS = ["Yes", "No", "Partial"]
+MODALITIES = [
+    "MRI", "fMRI", "PET", "DTI", "ASL", "SNP Genotyping", "WGS", "WES", "RNA",
+    "Epigenomics", "Proteomics", "Metabolomics", "EHR", "Clinical Cognitive Tests",
+]
+JOURNALS = ["Neurobiology of Aging", "Nature Genetics", "Annals of Neurology", "Alzheimer's & Dementia", "Brain"]
+WORDS = (
+    "longitudinal cohort study aging dementia biomarker imaging genetic clinical "
+    "cognitive decline amyloid tau neurodegeneration memory population risk"
+).split()
+
+
+# Sample files in the project root that load_profile measures
+SAMPLE_METADATA = 'ADRD_Metadata_Sample_Big.xlsx'
+SAMPLE_REFERENCES = 'pubmed_refs_fetched.csv'
+
+IMAGING = ("MRI", "fMRI", "PET", "DTI", "ASL")
+_AVAILABLE = re.compile(r"^(?:[\w-]+:\s*)?(?:available|yes)\b", re.IGNORECASE)
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]+")
+
+
+class CatalogProfile:
+    """
+    Value distributions measured from the sample spreadsheet and reference list.
+
+    Every attribute is a list drawn from with rng.choice, so values keep their
+    observed frequencies. Fields are drawn independently, except a dataset's
+    modalities, which are taken together from one spreadsheet row.
+    """
+
+    def __init__(self, metadata_path, references_path):
+        import pandas as pd
+        from api import ingest
+
+        # Datasets: the spreadsheet mapped exactly as an approval would map it
+        sheet = pd.read_excel(metadata_path)
+        mapping = ingest.resolve_columns(list(sheet.columns))
+        rows = [values for _, values in ingest.mapped_rows(sheet.to_dict('records'), mapping)]
+        self.names = [row['name'] for row in rows]
+        self.disease_types = [row['disease_type'] for row in rows]
+        self.sample_sizes = [row['sample_size'] for row in rows]
+        self.accessibility = [row['data_accessibility'] for row in rows]
+        self.wgs = [row['wgs_available'] for row in rows]
+        self.imaging_types = [row['imaging_types'] for row in rows]
+
+        # Modalities: the "<X> Data Available" columns a row marks available, plus its imaging
+        availability = [column for column in sheet.columns if ' Data Available' in column]
+        self.modality_sets = []
+        for record, values in zip(sheet.to_dict('records'), rows):
+            found = [column.split(' Data Available')[0] for column in availability
+                     if _AVAILABLE.match(str(record[column]))]
+            found += [m for m in IMAGING if re.search(rf'\b{m}\b', values['imaging_types'])]
+            self.modality_sets.append(', '.join(found))
+
+        # Descriptions: words and lengths of the free-text columns no field maps to
+        text_columns = [
+            column for column in sheet.columns
+            if column not in mapping.values() and sheet[column].nunique() > 1
+        ]
+        documents = [
+            ' '.join(value for value in record.values() if isinstance(value, str))
+            for record in sheet[text_columns].to_dict('records')
+        ]
+        self.description_words = [word.lower() for doc in documents for word in _WORD.findall(doc)]
+        self.description_lengths = [len(_WORD.findall(doc)) for doc in documents]
+
+        # Publications
+        references = pd.read_csv(references_path)
+        titles = references['Title'].dropna().astype(str).tolist()
+        self.title_words = [word.lower() for title in titles for word in _WORD.findall(title)]
+        self.title_lengths = [len(_WORD.findall(title)) for title in titles]
+        self.journals = references['Journal'].astype(str).tolist()
+        self.years = references['Year'].astype(int).tolist()
+        self.publications_per_dataset = references['Dataset'].value_counts().tolist()
+        # Share of references naming a dataset the spreadsheet does not list (they stay unlinked)
+        listed = {name.lower() for name in self.names}
+        self.unlisted_share = float((~references['Dataset'].str.lower().isin(listed)).mean())
+
+
+def load_profile(root):
+    """CatalogProfile of the sample files in the project root"""
+    return CatalogProfile(os.path.join(root, SAMPLE_METADATA), os.path.join(root, SAMPLE_REFERENCES))
+
+
+def _sentence(rng, words, vocabulary=WORDS):
+    return ' '.join(rng.choice(vocabulary) for _ in range(words)).capitalize()
+
+
+def _authors(rng):
+    return ', '.join(f"{rng.choice(WORDS).capitalize()} {chr(65 + rng.randrange(26))}" for _ in range(3)) + ', et al.'
+
+
+def iter_datasets(count, seed=0, profile=None):
+    """Yield unsaved Dataset instances (drawn from profile if given)"""
+    from api.models import Dataset
+
+    rng = random.Random(seed)
+    if profile is not None:
+        for i in range(count):
+            yield Dataset(
+                name=f"{rng.choice(profile.names)} {seed}-{i}",
+                description=_sentence(rng, rng.choice(profile.description_lengths), profile.description_words),
+                disease_type=rng.choice(profile.disease_types),
+                sample_size=int(rng.choice(profile.sample_sizes) * rng.uniform(0.5, 1.5)),
+                data_accessibility=rng.choice(profile.accessibility),
+                wgs_available=rng.choice(profile.wgs),
+                imaging_types=rng.choice(profile.imaging_types),
+                modalities=rng.choice(profile.modality_sets),
+            )
+        return
+    for i in range(count):
+        modalities = rng.sample(MODALITIES, rng.randint(1, 5))
+        yield Dataset(
+            name=f"{_sentence(rng, 3)} Cohort {i}",
+            description=_sentence(rng, 25),
+            disease_type=rng.choice(DISEASE_TYPES),
+            sample_size=int(rng.lognormvariate(7, 1.5)),
+            data_accessibility=rng.choice(ACCESSIBILITY),
+            wgs_available=rng.choice(WGS),
+            imaging_types=', '.join(m for m in modalities if m in ("MRI", "fMRI", "PET", "DTI", "ASL")),
+            modalities=', '.join(modalities),
+        )
+
+
+def iter_publications(count, dataset_names=(), seed=0, profile=None):
+    """Yield unsaved Publication instances, linked by name to dataset_names (drawn from profile if given)"""
+    from api.models import Publication
+
+    rng = random.Random(seed + 1)
+    names = list(dataset_names) or ['Synthetic Cohort']
+    if profile is not None:
+        # Runs of publications per dataset as in the reference list; some name unlisted datasets
+        cycle = itertools.cycle(names)
+        current, remaining = None, 0
+        for i in range(count):
+            if rng.random() < profile.unlisted_share:
+                dataset_name = f"{rng.choice(profile.names)} unlisted {rng.randrange(count)}"
+            else:
+                if remaining == 0:
+                    current, remaining = next(cycle), rng.choice(profile.publications_per_dataset)
+                dataset_name, remaining = current, remaining - 1
+            yield Publication(
+                title=_sentence(rng, rng.choice(profile.title_lengths), profile.title_words),
+                authors=_authors(rng),
+                journal=rng.choice(profile.journals),
+                year=rng.choice(profile.years),
+                pmid=str(30000000 + seed + i),
+                doi=f"10.1000/synthetic.{seed + i}",
+                dataset_name=dataset_name,
+            )
+        return
+    for i in range(count):
+        yield Publication(
+            title=_sentence(rng, 8),
+            authors=_authors(rng),
+            journal=rng.choice(JOURNALS),
+            year=rng.randint(1995, 2025),
+            pmid=str(30000000 + i),
+            doi=f"10.1000/synthetic.{i}",
+            dataset_name=rng.choice(names),
+        )
+
+
+def bulk_insert(model, objects, batch_size=5000):
+    """Insert an iterable of unsaved instances in batches; returns the number inserted"""
+    inserted = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        inserted += len(batch)
+    return inserted
@@ -0,0 +1,46 @@
+"""
+Shared helpers for the ADRD Knowledge Graph benchmarks
+
+Benchmarks boot the same Django configuration as the Vercel entry point
+(api/index.py), so DATABASE_URL / SQLITE_PATH / DB_CONN_MAX_AGE behave exactly
+as they do in production.
+"""
+import math
+import os
+import sys
+import statistics
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(sqlite_path=None):
+    """Configure Django through api.index; use a scratch SQLite file unless DATABASE_URL is set"""
+    if sqlite_path and not os.environ.get('DATABASE_URL'):
+        os.environ['SQLITE_PATH'] = str(sqlite_path)
+    # Per-request log lines would drown the benchmark output
+    os.environ.setdefault('REQUEST_LOG', 'off')
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    import api.index  # noqa: F401  (configures settings and initializes the schema)
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples (nearest-rank)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples_ms):
+    """Latency summary in milliseconds"""
+    return {
+        'count': len(samples_ms),
+        'mean_ms': round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p90_ms': round(percentile(samples_ms, 90), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'max_ms': round(max(samples_ms), 3) if samples_ms else 0.0,
+    }
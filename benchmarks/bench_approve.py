@@ -0,0 +1,145 @@
+"""
+Approve throughput benchmark: batched pipeline vs per-row inserts
+
+Stages a pending upload of synthetic spreadsheet rows (50k by default) and
+approves it through /api/management/pending/<id>/approve, once per batch
+size. The approval job is run synchronously (APPROVAL_WORKER=external) and
+timed until it finishes. The "per-row" baseline replays the previous implementation: one
+Dataset.objects.create per row in autocommit mode. Rows inserted by each run
+are deleted afterwards so every run starts from the same catalog.
+
+Usage:
+    python benchmarks/bench_approve.py --rows 50000 --batch-sizes 100,1000,5000
+    DATABASE_URL=postgres://.../scratch DB_SSL_REQUIRE=false python benchmarks/bench_approve.py
+
+Point DATABASE_URL at a scratch database: the benchmark inserts rows into it.
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from _common import setup_django
+
+# Spreadsheet header -> Dataset field, as in ADRD_Metadata_Sample.csv
+HEADERS = {
+    'Dataset Name': 'name',
+    'Description': 'description',
+    'Disease Type': 'disease_type',
+    'Sample Size': 'sample_size',
+    'Data Accessibility': 'data_accessibility',
+    'WGS Available': 'wgs_available',
+    'Imaging Types': 'imaging_types',
+    'Modalities': 'modalities',
+}
+
+
+def spreadsheet_rows(count):
+    from _catalog import iter_datasets
+
+    return [
+        {header: str(getattr(d, field)) for header, field in HEADERS.items()}
+        for d in iter_datasets(count, seed=7)
+    ]
+
+
+def stage_upload(rows):
+    from api.models import PendingUpload
+    from api.staging import stage_rows
+
+    upload = PendingUpload.objects.create(file_name='bench_approve.csv', file_type='csv')
+    stage_rows(upload, rows)
+    return upload
+
+
+def cleanup(after_id):
+    from api.models import Dataset
+    from api import analytics
+
+    Dataset.objects.filter(id__gt=after_id).delete()
+    analytics.rebuild_snapshot()
+
+
+def run_per_row(rows):
+    """The previous approve loop: one autocommit INSERT per row"""
+    from api.models import Dataset
+
+    started = time.perf_counter()
+    for row in rows:
+        Dataset.objects.create(**{
+            field: int(row[header]) if field == 'sample_size' else row[header]
+            for header, field in HEADERS.items()
+        })
+    return time.perf_counter() - started
+
+
+def run_pipeline(client, rows, batch_size):
+    """Queue the approval over HTTP, run the job in this thread and read its progress"""
+    from api import ingest, jobs
+
+    ingest.APPROVE_BATCH_SIZE = batch_size
+    upload = stage_upload(rows)
+    started = time.perf_counter()
+    response = client.post(f'/api/management/pending/{upload.id}/approve', '{}', content_type='application/json')
+    if response.status_code != 202:
+        raise SystemExit(f'approve failed: {response.status_code} {response.json()}')
+    jobs.run_pending()
+    elapsed = time.perf_counter() - started
+    body = client.get(f"/api/management/jobs/{response.json()['job_id']}").json()
+    if body['status'] != 'succeeded' or body['added_count'] != len(rows):
+        raise SystemExit(f'approval job failed: {body}')
+    return elapsed, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--batch-sizes', default='100,1000,5000')
+    parser.add_argument('--skip-per-row', action='store_true', help='skip the slow per-row baseline')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    os.environ['APPROVAL_WORKER'] = 'external'
+    # A fresh SQLite database per run, removed on exit (ignored with DATABASE_URL)
+    scratch_dir = tempfile.mkdtemp(prefix='adrd_bench_approve_')
+    atexit.register(shutil.rmtree, scratch_dir, ignore_errors=True)
+    setup_django(sqlite_path=os.path.join(scratch_dir, 'bench_approve.db'))
+    from django.db import connection
+    from django.test import Client
+    from api.models import Dataset
+
+    rows = spreadsheet_rows(args.rows)
+    client = Client()
+    client.get('/api/health')
+    baseline_id = Dataset.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    results = []
+    if not args.skip_per_row:
+        elapsed = run_per_row(rows)
+        cleanup(baseline_id)
+        results.append({'mode': 'per-row', 'batch_size': 1, 'seconds': round(elapsed, 2),
+                        'rows_per_sec': round(len(rows) / elapsed)})
+    for batch_size in [int(b) for b in args.batch_sizes.split(',')]:
+        elapsed, body = run_pipeline(client, rows, batch_size)
+        cleanup(baseline_id)
+        results.append({'mode': 'pipeline', 'batch_size': batch_size, 'seconds': round(elapsed, 2),
+                        'rows_per_sec': round(len(rows) / elapsed),
+                        'job_rows_per_sec': body['rows_per_second']})
+
+    print(f"{connection.vendor}, {len(rows)} rows")
+    for r in results:
+        line = f"{r['mode']:>9} batch={r['batch_size']:<6} {r['seconds']:>8}s  {r['rows_per_sec']:>8} rows/sec"
+        if 'job_rows_per_sec' in r:
+            line += f"  (job {r['job_rows_per_sec']} rows/sec)"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'vendor': connection.vendor, 'rows': len(rows), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
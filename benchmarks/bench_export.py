@@ -0,0 +1,123 @@
+"""
+Export memory benchmark: streamed CSV vs the old in-memory response
+
+Seeds a scratch catalog with synthetic datasets (1M by default), then exports
+it through /api/datasets/export in a fresh process per mode and reports peak
+RSS, throughput and bytes written. Modes:
+  - streaming: the current endpoint (StreamingHttpResponse over a chunked cursor)
+  - buffered:  the previous implementation (list(Model.objects.all()) into HttpResponse)
+
+Usage:
+    python benchmarks/bench_export.py --rows 1000000
+    DATABASE_URL=postgres://.../scratch DB_SSL_REQUIRE=false python benchmarks/bench_export.py
+
+Point DATABASE_URL at a scratch database: the benchmark inserts rows into it.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import setup_django
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def seed(db_path, rows):
+    setup_django(sqlite_path=db_path)
+    from api.models import Dataset
+    from _catalog import iter_datasets, bulk_insert
+
+    existing = Dataset.objects.count()
+    if existing < rows:
+        started = time.perf_counter()
+        bulk_insert(Dataset, iter_datasets(rows - existing, seed=existing))
+        print(f"Seeded {rows - existing} datasets in {time.perf_counter() - started:.1f}s")
+
+
+def export(db_path, mode):
+    setup_django(sqlite_path=db_path)
+    import csv
+    from django.http import HttpResponse
+    from django.test import Client
+    from api.models import Dataset
+
+    client = Client()
+    client.get('/api/health')  # load the URLconf and views before taking the baseline
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    size = 0
+    if mode == 'streaming':
+        response = client.get('/api/datasets/export')
+        for chunk in response.streaming_content:
+            size += len(chunk)
+    else:
+        response = HttpResponse(content_type='text/csv')
+        writer = csv.writer(response)
+        for d in list(Dataset.objects.all()):
+            writer.writerow([
+                d.id, d.name, d.description, d.disease_type, d.sample_size,
+                d.data_accessibility, d.wgs_available, d.imaging_types,
+                d.modalities, d.created_at.isoformat() if d.created_at else None
+            ])
+        size = len(response.content)
+    elapsed = time.perf_counter() - started
+    rows = Dataset.objects.count()
+    return {
+        'mode': mode,
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(elapsed, 2),
+        'rows_per_sec': round(rows / elapsed) if elapsed else 0,
+        'baseline_rss_mb': round(baseline, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'export_rss_growth_mb': round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--modes', default='streaming,buffered')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'seed':
+        seed(args.db, args.rows)
+        return
+    if args.child:
+        print(json.dumps(export(args.db, args.child)))
+        return
+
+    # Each step runs in its own process so peak RSS is not polluted by seeding;
+    # all of them share one scratch SQLite file created for this run
+    script = os.path.abspath(__file__)
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_export.db')
+    subprocess.run([sys.executable, script, '--child', 'seed', '--db', db_path, '--rows', str(args.rows)], check=True)
+    results = []
+    for mode in args.modes.split(','):
+        out = subprocess.run(
+            [sys.executable, script, '--child', mode, '--db', db_path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{mode:>10}: {result['rows']} rows, {result['bytes'] / 1e6:.1f} MB in {result['seconds']}s, "
+              f"peak RSS {result['peak_rss_mb']} MB (+{result['export_rss_growth_mb']} MB during export)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
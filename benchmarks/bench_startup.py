@@ -0,0 +1,150 @@
+"""
+Cold start benchmark: import-to-first-response with and without the schema marker
+
+Each sample is a fresh Python process (what a serverless cold start is):
+it imports api.index, which configures Django and bootstraps the database,
+then serves one request through the Django test client. Measured per run:
+  - import_ms:   importing api.index (settings, schema check or bootstrap)
+  - response_ms: the first request, including loading urls and views
+  - total_ms:    import plus first response
+  - queries:     SQL statements executed until the response is sent
+  - query_ms:    time spent inside those statements
+
+On local SQLite a statement costs microseconds, so import time (pandas,
+Django) dominates total_ms; against a networked Postgres every statement is
+at least one round trip and the saved queries are where the time goes.
+
+Modes on an already bootstrapped database (--datasets synthetic datasets):
+  - full:     FORCE_DB_BOOTSTRAP=1, i.e. table introspection, seed counts, schema
+              upgrade, backfills and admin checks on every start (the old behaviour)
+  - marker:   the schema version marker is current, one primary-key lookup
+
+Modes on a fresh serverless instance (no SQLite file yet, new path per run):
+  - fresh:    tables created and three sample datasets seeded
+  - snapshot: the catalog snapshot (api/snapshot.py) of the database above
+              restored into place, then the one-time bootstrap
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10 --path /api/datasets --datasets 5000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from _common import PROJECT_ROOT, setup_django, summarize
+from _catalog import bulk_insert, iter_datasets
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+from django.db.backends import utils
+
+queries = [0, 0.0]
+for name in ('_execute', '_executemany'):
+    original = getattr(utils.CursorWrapper, name)
+    def counted(self, *args, _original=original, **kwargs):
+        queries[0] += 1
+        query_started = time.perf_counter()
+        try:
+            return _original(self, *args, **kwargs)
+        finally:
+            queries[1] += time.perf_counter() - query_started
+    setattr(utils.CursorWrapper, name, counted)
+
+sys.path.insert(0, sys.argv[1])
+import api.index
+imported = time.perf_counter()
+from django.test import Client
+response = Client().get(sys.argv[2])
+finished = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import_ms': (imported - started) * 1000,
+    'response_ms': (finished - imported) * 1000,
+    'total_ms': (finished - started) * 1000,
+    'queries': queries[0],
+    'query_ms': queries[1] * 1000,
+}))
+'''
+
+
+def cold_start(path, env):
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD, str(PROJECT_ROOT), path],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    # The bootstrap prints progress; the measurement is the last line
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if result['status'] != 200:
+        raise RuntimeError(f"{path} returned {result['status']}")
+    return result
+
+
+def run_mode(path, runs, env, fresh_db=False):
+    samples = []
+    for run in range(runs):
+        if fresh_db:
+            env = dict(env, SQLITE_PATH=os.path.join(tempfile.mkdtemp(), f'fresh_{run}.db'))
+        samples.append(cold_start(path, env))
+    summary = {key: summarize([s[key] for s in samples]) for key in ('import_ms', 'response_ms', 'total_ms', 'query_ms')}
+    summary['queries'] = samples[-1]['queries']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/datasets')
+    parser.add_argument('--datasets', type=int, default=5000, help='synthetic datasets in the catalog')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    # Only the snapshot mode restores a snapshot, and only the one built here
+    os.environ['CATALOG_SNAPSHOT_PATH'] = ''
+    os.environ.pop('FORCE_DB_BOOTSTRAP', None)
+    scratch = tempfile.mkdtemp()
+    env = dict(os.environ, APPROVAL_WORKER='external')
+    if not env.get('DATABASE_URL'):
+        env['SQLITE_PATH'] = os.path.join(scratch, 'bench_startup.db')
+
+    # First start creates and seeds the database and writes the marker
+    first = cold_start(args.path, env)
+    print(f"first start (empty database): {first['total_ms']:.0f} ms, {first['queries']} queries")
+
+    setup_django(env.get('SQLITE_PATH'))
+    from django.db import connection
+    from api import analytics, ingest, snapshot, tags
+    from api.models import Dataset
+
+    # Bring the synthetic rows to what approvals leave behind
+    bulk_insert(Dataset, iter_datasets(args.datasets))
+    ingest.backfill_fingerprints()
+    tags.backfill_tags()
+    analytics.rebuild_snapshot()
+    modes = [('full', {'FORCE_DB_BOOTSTRAP': '1'}, False), ('marker', {}, False)]
+    if connection.vendor == 'sqlite':
+        built = snapshot.build_snapshot(connection.settings_dict['NAME'], os.path.join(scratch, 'catalog.sqlite3.gz'))
+        print(f"snapshot: {built['datasets']} datasets, {built['snapshot_bytes']:,} bytes compressed")
+        modes += [('fresh', {}, True), ('snapshot', {'CATALOG_SNAPSHOT_PATH': built['path']}, True)]
+
+    results = {'path': args.path, 'runs': args.runs, 'datasets': args.datasets, 'first_start': first}
+    for mode, extra, fresh_db in modes:
+        summary = run_mode(args.path, args.runs, dict(env, **extra), fresh_db)
+        results[mode] = summary
+        print(f"{mode:>8}: total p50 {summary['total_ms']['p50_ms']:>7.1f} ms "
+              f"(import {summary['import_ms']['p50_ms']:.1f}, first response {summary['response_ms']['p50_ms']:.1f}), "
+              f"{summary['queries']} queries in {summary['query_ms']['p50_ms']:.1f} ms")
+
+    saved = results['full']['total_ms']['p50_ms'] - results['marker']['total_ms']['p50_ms']
+    print(f"   saved: {saved:.1f} ms and {results['full']['queries'] - results['marker']['queries']} queries per cold start")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Import-time budget check for cold starts
+
+Starts fresh processes under ``python -X importtime`` that do what a cold
+start does: import api.index (settings, apps, schema marker check), load
+the URLconf and import api.views, as the first API request does. The
+cumulative import time of each module in BUDGETS_MS (median over --runs)
+must stay within its budget. None of LAZY_MODULES may be imported at that
+point; they belong to the upload and approval code paths only.
+
+Exits non-zero when a budget is exceeded or a lazy module is imported at
+startup. Budgets are generous for a laptop; scale them for slower CI
+machines with --scale.
+
+Usage:
+    python benchmarks/check_import_time.py --runs 5
+    python benchmarks/check_import_time.py --scale 2 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _common import PROJECT_ROOT
+
+# Cumulative import time per module (ms)
+BUDGETS_MS = {
+    'api.index': 600,
+    'api.jobs': 80,
+    'api.ingest': 40,
+    'api.uploads': 40,
+    'api.urls_root': 30,
+    'api.views': 120,
+}
+
+# Heavy dependencies only the code paths that use them may import
+LAZY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+CHILD = r'''
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import api.index
+import api.urls_root
+import api.views
+print(json.dumps(sorted(name for name in sys.argv[2:] if name in sys.modules)))
+'''
+
+
+def import_profile(env):
+    """(cumulative import ms per module, lazy modules that were imported) for one fresh process"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, str(PROJECT_ROOT), *LAZY_MODULES],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative) / 1000
+    return timings, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every budget by this factor')
+    parser.add_argument('--top', type=int, default=10, help='also list the N slowest imports')
+    args = parser.parse_args()
+
+    env = dict(os.environ, APPROVAL_WORKER='external')
+    env.pop('FORCE_DB_BOOTSTRAP', None)
+    if not env.get('DATABASE_URL'):
+        env['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'check_import_time.db')
+
+    # The first start bootstraps the database; later ones take the marker path
+    import_profile(env)
+    profiles = [import_profile(env) for _ in range(args.runs)]
+
+    medians = {}
+    for name in set().union(*(timings for timings, _ in profiles)):
+        medians[name] = statistics.median(timings.get(name, 0.0) for timings, _ in profiles)
+    eagerly_imported = sorted(set().union(*(lazy for _, lazy in profiles)))
+
+    failures = []
+    print(f"{'module':<20} {'median ms':>10} {'budget ms':>10}")
+    for name, budget in BUDGETS_MS.items():
+        budget *= args.scale
+        took = medians.get(name)
+        if took is None:
+            failures.append(f"{name} was not imported")
+            continue
+        flag = '' if took <= budget else '  OVER'
+        print(f"{name:<20} {took:>10.1f} {budget:>10.0f}{flag}")
+        if flag:
+            failures.append(f"{name} took {took:.1f} ms (budget {budget:.0f} ms)")
+    if eagerly_imported:
+        failures.append(f"imported at startup: {', '.join(eagerly_imported)}")
+
+    if args.top:
+        print(f"\nslowest {args.top} imports (cumulative):")
+        for name, took in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {took:>8.1f} ms  {name}")
+
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print('\nOK: all import budgets met, no heavy dependency imported at startup')
+
+
+if __name__ == '__main__':
+    main()
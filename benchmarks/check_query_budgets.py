@@ -0,0 +1,172 @@
+"""
+Query budget check: queries and rows per request, per endpoint
+
+Seeds a fixed fixture (FIXTURE_DATASETS datasets, FIXTURE_PUBLICATIONS
+publications and the staged uploads of bench_endpoints.bench_fixtures), then
+sends one request to every route in bench_endpoints.ROUTES and to the
+variants in EXTRA_REQUESTS. The response cache is off. The request metrics
+(api/metrics.py) count the SQL statements each request executed and the
+rows it fetched from the database. Both must stay within the endpoint's
+entry in budgets().
+
+The budgets state the bound each endpoint is designed to, derived from the
+page and window sizes of api/views.py and the fixture, not the figures
+measured today. A per-row query inside a loop (N+1) or an extra read-back of
+a row that was just written raises the query count above budget. A query
+that loads whole tables where a page or an aggregate would do raises the row
+count. A change that needs a larger budget changes the endpoint's design:
+update its bound and the reason next to it in the same commit.
+
+Exits non-zero if any endpoint is over budget or fails.
+
+Usage:
+    python benchmarks/check_query_budgets.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from _common import setup_django
+from bench_endpoints import METRICS_TOKEN, ROUTES, bench_fixtures, seed, send, unlisted_routes, upload_csv
+
+FIXTURE_DATASETS = 500
+FIXTURE_PUBLICATIONS = 1000
+
+# Variants of ROUTES entries whose query count depends on their options
+EXTRA_REQUESTS = {
+    'datasets?include': ('GET', '/api/datasets?include=publications,publication_count', None),
+    'datasets?modality': ('GET', '/api/datasets?modality=MRI&imaging_type=PET&imaging_match=all', None),
+    'datasets?cursor': ('GET', '/api/datasets?cursor=', None),
+    'datasets?per_page': ('GET', '/api/datasets?per_page=100000', None),
+    'publications?dataset_id': ('GET', '/api/publications?dataset_id={dataset}', None),
+    'publications?cursor': ('GET', '/api/publications?cursor=&year=2020', None),
+    'management/pending?cursor': ('GET', '/api/management/pending?status=pending&cursor=', None),
+}
+
+# Default limit of the recent endpoints
+RECENT_LIMIT = 5
+# Rows in the CSV sent to the upload endpoint
+UPLOAD_ROWS = 10
+
+
+def budgets(fixtures):
+    """
+    endpoint -> (max queries, max rows fetched, intended bound)
+
+    Each budget is the bound the endpoint is designed to, not a measurement:
+    pages are bounded by the page size, lookups by one row, and only the
+    exports read a whole table (once, in keyset chunks).
+    """
+    from api.exports import EXPORT_CHUNK_SIZE
+    from api.models import Publication, Tag
+    from api.staging import PREVIEW_DEFAULT_LIMIT
+    from api.views import PAGE_DEFAULT_SIZE as PAGE, PAGE_MAX_SIZE, SEARCH_DEFAULT_LIMIT as SEARCH
+
+    linked = Publication.objects.filter(dataset_id=fixtures['dataset']).count()
+    vocabulary = Tag.objects.count()
+    return {
+        'health': (0, 0, 'no database access'),
+        'debug': (0, 0, 'no database access'),
+        'metrics': (0, 0, 'no database access'),
+        'datasets': (2, 1 + PAGE, '1 count + 1 page'),
+        'datasets/<int:dataset_id>': (1, 1, '1 primary key lookup'),
+        'datasets/search': (3, SEARCH + 1 + SEARCH, 'ranked ids of 1 window + 1 count + the rows of the window'),
+        'datasets/export': (
+            FIXTURE_DATASETS // EXPORT_CHUNK_SIZE + 1, FIXTURE_DATASETS,
+            '1 keyset chunk per EXPORT_CHUNK_SIZE rows, every row read once',
+        ),
+        'datasets/recent': (1, RECENT_LIMIT, '1 limited query'),
+        'datasets/<int:dataset_id>/publications': (2, 1 + linked, 'the dataset + its publications in 1 query'),
+        'publications': (2, 1 + PAGE, '1 count + 1 page'),
+        'publications/search': (3, SEARCH + 1 + SEARCH, 'ranked ids of 1 window + 1 count + the rows of the window'),
+        'publications/export': (
+            FIXTURE_PUBLICATIONS // EXPORT_CHUNK_SIZE + 1, FIXTURE_PUBLICATIONS,
+            '1 keyset chunk per EXPORT_CHUNK_SIZE rows, every row read once',
+        ),
+        'publications/recent': (1, RECENT_LIMIT, '1 limited query'),
+        'stats': (1, 1, 'the analytics snapshot row'),
+        'filters': (3, vocabulary, '1 query per tag kind, never more rows than the tag vocabulary'),
+        'analytics/overview': (1, 1, 'the analytics snapshot row'),
+        'cache/stats': (0, 0, 'no database access'),
+        'auth/login': (2, 1, 'user lookup + last_login update'),
+        'auth/logout': (0, 0, 'no database access'),
+        'auth/check': (0, 0, 'no database access'),
+        'upload': (
+            4, 1 + UPLOAD_ROWS,
+            'transaction + upload insert + 1 bulk insert of the rows + stats update; the returned ids',
+        ),
+        'management/pending/<int:upload_id>/approve': (3, 3, 'upload lookup + active job check + job insert'),
+        'management/pending/<int:upload_id>/reject': (2, 1, 'upload lookup + status update'),
+        'management/pending/<int:upload_id>': (2, 1 + PREVIEW_DEFAULT_LIMIT, 'the upload + 1 window of staged rows'),
+        'management/pending': (3, 1 + 1 + PAGE, '1 count + 1 page + per-status counts in 1 aggregate'),
+        'management/jobs/<int:job_id>': (1, 1, '1 primary key lookup'),
+        'datasets?include': (
+            4, 1 + PAGE + PAGE * linked + PAGE,
+            '1 count + 1 page + 1 query per include option, whatever the page size',
+        ),
+        'datasets?modality': (2, 1 + PAGE, '1 count + 1 page, tags matched in a subquery'),
+        'datasets?cursor': (1, PAGE + 1, '1 keyset page of per_page + 1 rows, no count'),
+        'datasets?per_page': (2, 1 + PAGE_MAX_SIZE, '1 count + 1 page clamped to PAGE_MAX_SIZE'),
+        'publications?dataset_id': (2, 1 + PAGE, '1 count + 1 page'),
+        'publications?cursor': (1, PAGE + 1, '1 keyset page of per_page + 1 rows, no count'),
+        'management/pending?cursor': (2, PAGE + 1 + 1, '1 keyset page + per-status counts in 1 aggregate'),
+    }
+
+def check(client, method, path, body, csv_bytes):
+    from api import metrics
+
+    status, _ = send(client, method, path, body, csv_bytes)
+    _, record = metrics.last_request()
+    return status, record.queries, record.rows
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    os.environ.update({
+        'APPROVAL_WORKER': 'external', 'CATALOG_SNAPSHOT_PATH': '', 'RESPONSE_CACHE': 'off',
+        'METRICS_TOKEN': METRICS_TOKEN,
+    })
+    os.environ.pop('DATABASE_URL', None)
+    setup_django(os.path.join(tempfile.mkdtemp(), 'check_query_budgets.db'))
+    from django.test import Client
+
+    missing = unlisted_routes()
+    if missing:
+        sys.exit(f"Routes without a request in bench_endpoints.ROUTES: {', '.join(missing)}")
+    seed(FIXTURE_DATASETS, FIXTURE_PUBLICATIONS / FIXTURE_DATASETS)
+    fixtures = bench_fixtures()
+    limits = budgets(fixtures)
+    csv_bytes = upload_csv(UPLOAD_ROWS)
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+    client.get('/api/health')  # load the URLconf and views first
+
+    failures = []
+    requests = {**ROUTES, **EXTRA_REQUESTS}
+    print(f"{'endpoint':<46} {'status':>6} {'queries':>12} {'rows':>14}")
+    for label, (method, template, body) in requests.items():
+        status, queries, rows = check(client, method, template.format(**fixtures), body, csv_bytes)
+        max_queries, max_rows, bound = limits.get(label, (None, None, None))
+        problems = []
+        if status >= 400:
+            problems.append(f'status {status}')
+        if max_queries is None:
+            problems.append('no budget')
+        else:
+            if queries > max_queries:
+                problems.append(f'{queries} queries (budget {max_queries})')
+            if rows > max_rows:
+                problems.append(f'{rows} rows (budget {max_rows})')
+        print(f"{label:<46} {status:>6} {queries:>5} / {max_queries if max_queries is not None else '-':<4} "
+              f"{rows:>6} / {max_rows if max_rows is not None else '-':<6}{'  FAIL' if problems else ''}")
+        failures += [f'{label}: {problem}' + (f' [{bound}]' if bound else '') for problem in problems]
+
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print(f'\nOK: all {len(requests)} endpoints within their query and row budgets')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Schema upgrade check: a database from before migrations must bootstrap
+
+Builds a SQLite database with the tables the original code created
+(BASELINE_SCHEMA, before api/migrations existed) and a few rows in them,
+including an upload still stored as a file_content JSON blob. It then boots
+api.index on it, which adopts the schema (adopt_unmigrated_schema), runs
+migrate --fake-initial and the backfills. The check asserts that:
+  - every migration is applied and the schema marker is current
+  - every table has the columns and indexes of the current models
+  - the old rows were carried over: publications linked, datasets
+    fingerprinted, the legacy upload staged into the row table
+  - the read endpoints answer 200
+  - a second bootstrap on the upgraded database changes nothing
+
+Exits non-zero on the first failed assertion.
+
+Usage:
+    python benchmarks/check_schema_upgrade.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from _common import setup_django
+
+# Tables as created by the original create_model bootstrap
+BASELINE_SCHEMA = [
+    'CREATE TABLE "api_dataset" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "name" varchar(500) NOT NULL, '
+    '"description" text NOT NULL, "disease_type" varchar(200) NOT NULL, "sample_size" integer NOT NULL, '
+    '"data_accessibility" varchar(200) NOT NULL, "wgs_available" varchar(50) NOT NULL, '
+    '"imaging_types" text NOT NULL, "modalities" text NOT NULL, "created_at" datetime NOT NULL)',
+    'CREATE TABLE "api_pendingupload" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, '
+    '"file_name" varchar(500) NOT NULL, "file_content" text NOT NULL, "file_type" varchar(50) NOT NULL, '
+    '"uploaded_by" varchar(200) NOT NULL, "status" varchar(20) NOT NULL, "review_notes" text NOT NULL, '
+    '"reviewed_by" varchar(100) NOT NULL, "created_at" datetime NOT NULL, "reviewed_at" datetime NULL)',
+    'CREATE TABLE "api_adminuser" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, '
+    '"username" varchar(100) NOT NULL UNIQUE, "password_hash" varchar(255) NOT NULL, '
+    '"created_at" datetime NOT NULL, "last_login" datetime NULL)',
+    'CREATE TABLE "api_publication" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "title" varchar(1000) NOT NULL, '
+    '"authors" text NOT NULL, "journal" varchar(500) NOT NULL, "year" integer NOT NULL, "pmid" varchar(50) NOT NULL, '
+    '"doi" varchar(200) NOT NULL, "dataset_name" varchar(500) NOT NULL, "created_at" datetime NOT NULL)',
+]
+
+CREATED_AT = '2024-01-01 00:00:00'
+DATASETS = [
+    ("Alzheimer's Disease Neuroimaging Initiative (ADNI)", "Biomarkers for Alzheimer's disease clinical trials",
+     "Alzheimer's Disease", 2500, 'Open with application', 'Yes', 'MRI, PET', 'MRI, PET, Clinical, Genetic'),
+    ('UK Biobank', 'Large-scale biomedical database', 'Multiple Dementia Types', 500000,
+     'Open with application', 'Yes', 'MRI, fMRI', 'MRI, fMRI, Genetic, EHR'),
+]
+PUBLICATIONS = [
+    ("Imaging and biomarkers in Alzheimer's disease", 'Mueller SG, et al.', 'Neurobiology of Aging', 2020,
+     '32145678', '10.1016/j.neurobiolaging.2020.01.001', "Alzheimer's Disease Neuroimaging Initiative (ADNI)"),
+    ('Genetic risk factors for dementia', 'Smith J, et al.', 'Nature Genetics', 2021,
+     '33456789', '10.1038/ng.2021.001', 'UK Biobank'),
+]
+LEGACY_UPLOAD_ROWS = [
+    {'Dataset Name': f'Legacy cohort {i}', 'Disease Type': 'Lewy Body Dementia', 'Sample Size': 100 + i}
+    for i in range(25)
+]
+
+
+def build_baseline(path):
+    db = sqlite3.connect(path)
+    for statement in BASELINE_SCHEMA:
+        db.execute(statement)
+    db.executemany(
+        'INSERT INTO api_dataset (name, description, disease_type, sample_size, data_accessibility, '
+        'wgs_available, imaging_types, modalities, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [row + (CREATED_AT,) for row in DATASETS],
+    )
+    db.executemany(
+        'INSERT INTO api_publication (title, authors, journal, year, pmid, doi, dataset_name, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [row + (CREATED_AT,) for row in PUBLICATIONS],
+    )
+    db.execute(
+        'INSERT INTO api_pendingupload (file_name, file_content, file_type, uploaded_by, status, review_notes, '
+        'reviewed_by, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ('legacy.csv', json.dumps(LEGACY_UPLOAD_ROWS), 'csv', 'anonymous', 'pending', '', '', CREATED_AT),
+    )
+    db.commit()
+    db.close()
+
+
+def schema_problems():
+    """Differences between the database and the current models and migrations"""
+    from django.apps import apps
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    problems = []
+    executor = MigrationExecutor(connection)
+    unapplied = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    problems += [f'migration {migration.app_label}.{migration.name} not applied' for migration, _ in unapplied]
+    with connection.cursor() as cursor:
+        for model in apps.get_app_config('api').get_models():
+            table = model._meta.db_table
+            columns = {c.name for c in connection.introspection.get_table_description(cursor, table)}
+            constraints = connection.introspection.get_constraints(cursor, table)
+            for field in model._meta.concrete_fields:
+                if field.column not in columns:
+                    problems.append(f'{table}.{field.column} missing')
+            for index in model._meta.indexes:
+                if index.name not in constraints:
+                    problems.append(f'index {index.name} missing on {table}')
+    return problems
+
+
+def data_problems():
+    """Rows of the baseline database that were not carried over"""
+    from api import index
+    from api.models import Dataset, PendingUpload, Publication, SchemaVersion
+
+    problems = []
+    version = SchemaVersion.objects.filter(id=index.SCHEMA_MARKER_ID).values_list('version', flat=True).first()
+    if version != index.SCHEMA_VERSION:
+        problems.append(f'schema marker is {version}, expected {index.SCHEMA_VERSION}')
+    if Dataset.objects.count() != len(DATASETS) or Publication.objects.count() != len(PUBLICATIONS):
+        problems.append('baseline rows lost or sample data added')
+    if Publication.objects.filter(dataset__isnull=True).exists():
+        problems.append('publications not linked to their datasets')
+    if Dataset.objects.filter(fingerprint__isnull=True).exists():
+        problems.append('datasets without a fingerprint')
+    upload = PendingUpload.objects.get(file_name='legacy.csv')
+    if upload.row_count != len(LEGACY_UPLOAD_ROWS) or upload.rows.count() != len(LEGACY_UPLOAD_ROWS):
+        problems.append(f'legacy upload staged {upload.row_count} of {len(LEGACY_UPLOAD_ROWS)} rows')
+    return problems
+
+
+def endpoint_problems():
+    from django.test import Client
+    from api.models import Dataset, PendingUpload
+
+    client = Client()
+    paths = [
+        '/api/datasets',
+        '/api/datasets/search?q=biomarkers',
+        f'/api/datasets/{Dataset.objects.values_list("id", flat=True).first()}/publications',
+        '/api/publications/search?q=genetic',
+        '/api/stats',
+        '/api/management/pending?status=pending',
+        f'/api/management/pending/{PendingUpload.objects.values_list("id", flat=True).first()}',
+    ]
+    return [f'{path}: status {status}' for path in paths if (status := client.get(path).status_code) != 200]
+
+
+def check(stage, problems):
+    for problem in problems:
+        print(f'  FAIL {stage}: {problem}')
+    if problems:
+        sys.exit(f'\nFAILED: {stage}')
+    print(f'ok   {stage}')
+
+
+def main():
+    os.environ.update({'APPROVAL_WORKER': 'external', 'CATALOG_SNAPSHOT_PATH': '', 'RESPONSE_CACHE': 'off'})
+    os.environ.pop('DATABASE_URL', None)
+    os.environ.pop('FORCE_DB_BOOTSTRAP', None)
+    path = os.path.join(tempfile.mkdtemp(), 'check_schema_upgrade.db')
+    build_baseline(path)
+    setup_django(path)
+
+    check('schema after upgrade', schema_problems())
+    check('data after upgrade', data_problems())
+    check('endpoints after upgrade', endpoint_problems())
+
+    # A restart on the upgraded database must be a no-op
+    from api import index
+    index.init_database()
+    check('schema after second bootstrap', schema_problems())
+    check('data after second bootstrap', data_problems())
+    print('\nOK: the baseline database was upgraded to the current schema')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Profile the heaviest endpoints through the request profiler (api/profiling.py)
+
+Seeds a synthetic catalog and stages a pending upload, then sends profiled
+requests (X-Profile header) to search_datasets, get_analytics_overview and
+approve_upload, whose approval job runs inline when profiled. For each
+request it prints the duration, query count, the slowest functions by
+cumulative time and the SQL statements above --slow-query-ms with their
+plans. The .prof and .json files stay in --output-dir for snakeviz or
+``python -m pstats``.
+
+Usage:
+    python benchmarks/profile_endpoints.py --datasets 20000 --rows 20000
+    python benchmarks/profile_endpoints.py --slow-query-ms 1 --functions 25
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from _common import setup_django
+from _catalog import bulk_insert, iter_datasets, iter_publications
+
+
+def seed(datasets, publications, rows):
+    from api import analytics, ingest, links, staging, tags
+    from api.models import Dataset, PendingUpload, Publication
+
+    bulk_insert(Dataset, iter_datasets(datasets))
+    names = list(Dataset.objects.values_list('name', flat=True)[:max(datasets // 4, 1)])
+    bulk_insert(Publication, iter_publications(publications, names))
+    ingest.backfill_fingerprints()
+    tags.tag_datasets(list(Dataset.objects.all()))
+    links.link_publications()
+    analytics.rebuild_snapshot()
+
+    upload = PendingUpload.objects.create(file_name='profile.csv', file_type='csv', file_content='')
+    staging.stage_rows(upload, (
+        {'Dataset Name': d.name, 'Disease Type': d.disease_type, 'Sample Size': d.sample_size,
+         'Modalities': d.modalities, 'Description': d.description}
+        for d in iter_datasets(rows, seed=11)
+    ))
+    return upload
+
+
+def print_report(path, functions):
+    with open(path) as f:
+        report = json.load(f)
+    print(f"\n{report['method']} {report['path']} -> {report['status']} in {report['duration_ms']:.0f} ms, "
+          f"{report['queries']} queries ({report['db_ms']:.0f} ms), {report['rows']} rows")
+    # pstats output: a summary line, "Ordered by", the column header, then one line per function
+    header = next(i for i, line in enumerate(report['functions']) if line.lstrip().startswith('ncalls'))
+    for line in report['functions'][header:header + 1 + functions]:
+        print(f'  {line}')
+    for query in report['slow_queries']:
+        print(f"  {query['ms']:>8.1f} ms  {query['sql'][:110]}")
+        for line in query['plan']:
+            print(f'              {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datasets', type=int, default=20000)
+    parser.add_argument('--publications', type=int, default=40000)
+    parser.add_argument('--rows', type=int, default=20000, help='rows in the upload that is approved')
+    parser.add_argument('--slow-query-ms', type=float, default=5)
+    parser.add_argument('--functions', type=int, default=15, help='functions printed per request')
+    parser.add_argument('--output-dir', default=os.path.join(tempfile.gettempdir(), 'adrd_profiles'))
+    args = parser.parse_args()
+
+    # The profiler reads its settings at import time, i.e. during setup_django
+    token = 'profile-endpoints'
+    os.environ.update({
+        'PROFILE_TOKEN': token,
+        'PROFILE_DIR': args.output_dir,
+        'PROFILE_SLOW_QUERY_MS': str(args.slow_query_ms),
+        'APPROVAL_WORKER': 'external',
+        'CATALOG_SNAPSHOT_PATH': '',
+    })
+    setup_django(os.path.join(tempfile.mkdtemp(), 'profile_endpoints.db'))
+    from django.test import Client
+
+    upload = seed(args.datasets, args.publications, args.rows)
+    print(f"{args.datasets} datasets, {args.publications} publications, upload of {args.rows} rows")
+    client = Client(HTTP_X_PROFILE=token)
+    requests = [
+        ('get', '/api/datasets/search?q=amyloid tau&min_sample_size=100', None),
+        ('get', '/api/analytics/overview', None),
+        ('post', f'/api/management/pending/{upload.id}/approve', json.dumps({'reviewed_by': 'profiler'})),
+    ]
+    for method, path, body in requests:
+        if body is None:
+            response = getattr(client, method)(path)
+        else:
+            response = getattr(client, method)(path, body, content_type='application/json')
+        if 'X-Profile-Id' not in response:
+            raise RuntimeError(f'{path} was not profiled')
+        print_report(os.path.join(args.output_dir, f"{response['X-Profile-Id']}.json"), args.functions)
+    print(f"\nprofiles: {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,8 @@ import {
   IconButton,
   Tabs,
   Tab,
+  TablePagination,
+  LinearProgress,
 } from '@mui/material';
 import {
   CheckCircle,
@@ -32,7 +34,7 @@ import {
   Refresh,
   Preview,
 } from '@mui/icons-material';
-import { apiService } from '../services/api';
+import { apiService, ApprovalJob } from '../services/api';
 import { authService } from '../services/auth';
 import { useNavigate } from 'react-router-dom';
 
@@ -46,13 +48,30 @@ interface PendingUpload {
   reviewed_by: string;
   created_at: string;
   reviewed_at: string | null;
+  row_count?: number;
+}
+
+const UPLOADS_PER_PAGE = 25;
+const JOB_POLL_INTERVAL_MS = 1000;
+
+interface ColumnStat {
+  name: string;
+  filled: number;
+  empty: number;
+  numeric: number;
+  examples: any[];
 }
 
 interface UploadDetail {
   id: number;
   file_name: string;
   file_type: string;
-  file_content: any[];
+  file_content: any[]; // Rows offset..offset+limit of the upload
+  offset?: number;
+  limit?: number;
+  total_rows?: number;
+  column_stats?: ColumnStat[];
+  column_mapping?: Record<string, string | null>;
   uploaded_by: string;
   status: string;
   review_notes: string;
@@ -74,37 +93,21 @@ const ManagementPage: React.FC = () => {
   const [processing, setProcessing] = useState(false);
   const [tabValue, setTabValue] = useState(0);
   const [loadingDetail, setLoadingDetail] = useState(false);
-  const [uploadCounts, setUploadCounts] = useState({ pending: 0, approved: 0, rejected: 0, all: 0 });
+  const [previewPage, setPreviewPage] = useState(0);
+  const [previewRowsPerPage, setPreviewRowsPerPage] = useState(20);
+  const [uploadCounts, setUploadCounts] = useState({ pending: 0, approved: 0, rejected: 0 });
+  const [listPage, setListPage] = useState(0);
+  const [listTotal, setListTotal] = useState(0);
+  const [activeJob, setActiveJob] = useState<ApprovalJob | null>(null);
   const navigate = useNavigate();
 
   const username = authService.getUsername();
 
+  // Tab counts arrive with every listing response
   useEffect(() => {
-    fetchUploads(true); // Force refresh when tab changes
+    fetchUploads(true, 0); // Force refresh when tab changes
   }, [tabValue]);
 
-  // Fetch counts for all tabs on initial load and when tab changes
-  useEffect(() => {
-    const fetchAllCounts = async () => {
-      try {
-        const [pending, approved, rejected] = await Promise.all([
-          apiService.getPendingUploads('pending').catch(() => ({ uploads: [] })),
-          apiService.getPendingUploads('approved').catch(() => ({ uploads: [] })),
-          apiService.getPendingUploads('rejected').catch(() => ({ uploads: [] })),
-        ]);
-        setUploadCounts({
-          pending: pending.uploads?.length || 0,
-          approved: approved.uploads?.length || 0,
-          rejected: rejected.uploads?.length || 0,
-          all: (pending.uploads?.length || 0) + (approved.uploads?.length || 0) + (rejected.uploads?.length || 0),
-        });
-      } catch (err) {
-        console.error('Error fetching upload counts:', err);
-      }
-    };
-    fetchAllCounts();
-  }, [tabValue]); // Re-fetch counts when tab changes
-
   // Auto-refresh when page becomes visible (user switches back to tab)
   useEffect(() => {
     const handleVisibilityChange = () => {
@@ -131,9 +134,10 @@ const ManagementPage: React.FC = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [tabValue]); // Re-setup listeners when tab changes
 
-  const fetchUploads = async (forceRefresh: boolean = false) => {
+  const fetchUploads = async (forceRefresh: boolean = false, page: number = listPage) => {
     try {
       setLoading(true);
+      setListPage(page);
       setError(null);
       let status: string;
       if (tabValue === 0) {
@@ -147,7 +151,7 @@ const ManagementPage: React.FC = () => {
       }
       
       console.log(`Fetching uploads for tab ${tabValue} with status: ${status}`);
-      const data = await apiService.getPendingUploads(status);
+      const data = await apiService.getPendingUploads(status, page + 1, UPLOADS_PER_PAGE);
       console.log(`Fetched ${status} uploads:`, data, `(forceRefresh: ${forceRefresh})`);
       
       // Ensure we have a valid response
@@ -160,14 +164,9 @@ const ManagementPage: React.FC = () => {
       const uploadsList = data.uploads || [];
       console.log(`Setting ${uploadsList.length} uploads for status ${status}. Upload IDs:`, uploadsList.map((u: any) => `${u.id}(${u.status})`));
       setUploads(uploadsList);
-      
-      // Update counts when fetching - only update the current tab's count
-      if (status === 'pending') {
-        setUploadCounts(prev => ({ ...prev, pending: uploadsList.length }));
-      } else if (status === 'approved') {
-        setUploadCounts(prev => ({ ...prev, approved: uploadsList.length }));
-      } else if (status === 'rejected') {
-        setUploadCounts(prev => ({ ...prev, rejected: uploadsList.length }));
+      setListTotal(data.total ?? uploadsList.length);
+      if (data.counts) {
+        setUploadCounts(data.counts);
       }
     } catch (err: any) {
       console.error('Error fetching uploads:', err);
@@ -179,13 +178,15 @@ const ManagementPage: React.FC = () => {
     }
   };
 
-  const handleViewDetail = async (uploadId: number) => {
+  const handleViewDetail = async (uploadId: number, page: number = 0, rowsPerPage: number = previewRowsPerPage) => {
     try {
       setLoadingDetail(true);
       setError(null);
       setDetailDialogOpen(true); // Open dialog first to show loading state
-      console.log('Fetching upload detail for ID:', uploadId);
-      const detail = await apiService.getPendingUploadDetail(uploadId);
+      setPreviewPage(page);
+      setPreviewRowsPerPage(rowsPerPage);
+      console.log('Fetching upload detail for ID:', uploadId, 'page:', page);
+      const detail = await apiService.getPendingUploadDetail(uploadId, page * rowsPerPage, rowsPerPage);
       console.log('Received detail:', detail);
       
       // Ensure file_content is parsed if it's a string
@@ -244,22 +245,8 @@ const ManagementPage: React.FC = () => {
       if (reviewAction === 'approve') {
         const result = await apiService.approveUpload(selectedUpload.id, reviewNotes, username || 'admin');
         if (result.success) {
-          if (result.added_count && result.added_count > 0) {
-            setSuccessMessage(result.message || `Successfully added ${result.added_count} dataset(s) to the database!`);
-          } else {
-            // If no datasets were added, show error instead
-            const errorMsg = result.errors && result.errors.length > 0 
-              ? `Failed to add datasets. Errors: ${result.errors.slice(0, 5).join('; ')}${result.errors.length > 5 ? '...' : ''}`
-              : result.message || 'Failed to add datasets to database. Please check the file format.';
-            setError(errorMsg);
-          }
-          if (result.errors && result.errors.length > 0) {
-            console.warn('Some rows had errors:', result.errors);
-            // Show first few errors in console for debugging
-            result.errors.slice(0, 10).forEach((err: string, idx: number) => {
-              console.warn(`Error ${idx + 1}:`, err);
-            });
-          }
+          // Rows are ingested in the background; follow the job until it finishes
+          pollApprovalJob(result.job_id);
         } else {
           setError(result.message || 'Failed to approve upload');
         }
@@ -275,25 +262,6 @@ const ManagementPage: React.FC = () => {
       // Refresh uploads and counts with force refresh
       await fetchUploads(true);
       
-      // Also refresh all counts with a small delay to ensure database is updated
-      setTimeout(async () => {
-        try {
-          const [pending, approved, rejected] = await Promise.all([
-            apiService.getPendingUploads('pending'),
-            apiService.getPendingUploads('approved'),
-            apiService.getPendingUploads('rejected'),
-          ]);
-          setUploadCounts({
-            pending: pending.uploads?.length || 0,
-            approved: approved.uploads?.length || 0,
-            rejected: rejected.uploads?.length || 0,
-            all: (pending.uploads?.length || 0) + (approved.uploads?.length || 0) + (rejected.uploads?.length || 0),
-          });
-        } catch (err) {
-          console.error('Error refreshing counts:', err);
-        }
-      }, 500);
-      
       // Clear success message after 5 seconds
       setTimeout(() => setSuccessMessage(null), 5000);
     } catch (err: any) {
@@ -303,6 +271,44 @@ const ManagementPage: React.FC = () => {
     }
   };
 
+  const pollApprovalJob = async (jobId: number) => {
+    try {
+      const job = await apiService.getApprovalJob(jobId);
+      setActiveJob(job);
+      if (job.status === 'queued' || job.status === 'running') {
+        setTimeout(() => pollApprovalJob(jobId), JOB_POLL_INTERVAL_MS);
+        return;
+      }
+      setActiveJob(null);
+      if (job.status === 'succeeded' && (job.added_count > 0 || job.updated_count > 0 || job.unchanged_count > 0)) {
+        let message = `Successfully added ${job.added_count} dataset(s) to the database.`;
+        if (job.updated_count > 0) {
+          message += ` ${job.updated_count} row(s) updated existing datasets.`;
+        }
+        if (job.unchanged_count > 0) {
+          message += ` ${job.unchanged_count} row(s) were already in the catalog.`;
+        }
+        if (job.error_count > 0) {
+          message += ` ${job.error_count} row(s) had errors.`;
+          console.warn('Some rows had errors:', job.errors);
+        }
+        setSuccessMessage(message);
+        setTimeout(() => setSuccessMessage(null), 5000);
+      } else if (job.status === 'succeeded') {
+        // If no datasets were added, show error instead
+        setError(job.errors.length > 0
+          ? `Failed to add datasets. Errors: ${job.errors.slice(0, 5).join('; ')}${job.errors.length > 5 ? '...' : ''}`
+          : 'Failed to add datasets to database. Please check the file format.');
+      } else {
+        setError(`Approval failed: ${job.message || 'unknown error'}`);
+      }
+      await fetchUploads(true);
+    } catch (err: any) {
+      setActiveJob(null);
+      setError(err.message || 'Failed to fetch approval progress');
+    }
+  };
+
   const handleLogout = async () => {
     await authService.logout();
     navigate('/');
@@ -396,6 +402,24 @@ const ManagementPage: React.FC = () => {
         </Alert>
       )}
 
+      {activeJob && (
+        <Alert severity="info" sx={{ mb: 2 }}>
+          <Typography variant="body2" sx={{ fontWeight: 600 }}>
+            {activeJob.status === 'queued'
+              ? 'Approval queued...'
+              : `Approving: ${activeJob.processed_rows} of ${activeJob.total_rows} rows`}
+            {activeJob.rows_per_second ? ` · ${Math.round(activeJob.rows_per_second)} rows/sec` : ''}
+            {activeJob.eta_seconds != null ? ` · about ${Math.ceil(activeJob.eta_seconds)}s left` : ''}
+            {activeJob.error_count > 0 ? ` · ${activeJob.error_count} row error(s)` : ''}
+          </Typography>
+          <LinearProgress
+            variant={activeJob.percent == null ? 'indeterminate' : 'determinate'}
+            value={activeJob.percent ?? 0}
+            sx={{ mt: 1, minWidth: 300 }}
+          />
+        </Alert>
+      )}
+
       {successMessage && (
         <Alert 
           severity="success" 
@@ -630,6 +654,16 @@ const ManagementPage: React.FC = () => {
                     ))}
                   </TableBody>
                 </Table>
+                {listTotal > UPLOADS_PER_PAGE && (
+                  <TablePagination
+                    component="div"
+                    count={listTotal}
+                    page={listPage}
+                    rowsPerPage={UPLOADS_PER_PAGE}
+                    rowsPerPageOptions={[UPLOADS_PER_PAGE]}
+                    onPageChange={(_, page) => fetchUploads(true, page)}
+                  />
+                )}
               </TableContainer>
             )}
           </Box>
@@ -770,7 +804,7 @@ const ManagementPage: React.FC = () => {
                     </Typography>
                     <Box sx={{ display: 'flex', gap: 1, flexWrap: 'wrap' }}>
                       <Chip
-                        label={`${selectedUpload.file_content.length} total rows`}
+                        label={`${selectedUpload.total_rows ?? selectedUpload.file_content.length} total rows`}
                         size="small"
                         sx={{
                           background: 'rgba(114, 7, 171, 0.1)',
@@ -799,12 +833,17 @@ const ManagementPage: React.FC = () => {
                         Detected Columns:
                       </Typography>
                       <Box sx={{ display: 'flex', flexWrap: 'wrap', gap: 0.5, mt: 1 }}>
-                        {Object.keys(selectedUpload.file_content[0]).map((col) => (
+                        {(selectedUpload.column_stats && selectedUpload.column_stats.length > 0
+                          ? selectedUpload.column_stats
+                          : Object.keys(selectedUpload.file_content[0]).map((name) => ({ name } as ColumnStat))
+                        ).map((col) => (
                           <Chip
-                            key={col}
-                            label={col}
+                            key={col.name}
+                            label={col.filled !== undefined ? `${col.name} (${col.filled} filled)` : col.name}
+                            title={col.examples?.length ? `e.g. ${col.examples.join(', ')}` : undefined}
                             size="small"
                             variant="outlined"
+                            color={col.filled === 0 ? 'warning' : 'default'}
                             sx={{ fontSize: '0.75rem' }}
                           />
                         ))}
@@ -814,6 +853,27 @@ const ManagementPage: React.FC = () => {
                       </Typography>
                     </Alert>
                   )}
+
+                  {/* Column mapping that approval will use */}
+                  {selectedUpload.column_mapping && Object.keys(selectedUpload.column_mapping).length > 0 && (
+                    <Alert severity="success" sx={{ mb: 2, borderRadius: 2 }}>
+                      <Typography variant="subtitle2" gutterBottom sx={{ fontWeight: 600 }}>
+                        Column Mapping:
+                      </Typography>
+                      <Box sx={{ display: 'flex', flexWrap: 'wrap', gap: 0.5, mt: 1 }}>
+                        {Object.entries(selectedUpload.column_mapping).map(([field, column]) => (
+                          <Chip
+                            key={field}
+                            label={`${field} ← ${column ?? 'not found'}`}
+                            size="small"
+                            variant="outlined"
+                            color={column ? 'success' : 'warning'}
+                            sx={{ fontSize: '0.75rem' }}
+                          />
+                        ))}
+                      </Box>
+                    </Alert>
+                  )}
                   <TableContainer
                     component={Paper}
                     elevation={2}
@@ -853,7 +913,7 @@ const ManagementPage: React.FC = () => {
                         </TableRow>
                       </TableHead>
                       <TableBody>
-                        {selectedUpload.file_content.slice(0, 20).map((row: any, idx: number) => (
+                        {selectedUpload.file_content.map((row: any, idx: number) => (
                           <TableRow
                             key={idx}
                             sx={{
@@ -888,18 +948,16 @@ const ManagementPage: React.FC = () => {
                       </TableBody>
                     </Table>
                   </TableContainer>
-                  {selectedUpload.file_content.length > 20 && (
-                    <Box sx={{ mt: 2, textAlign: 'center' }}>
-                      <Chip
-                        label={`Showing first 20 of ${selectedUpload.file_content.length} rows`}
-                        size="small"
-                        sx={{
-                          background: 'rgba(114, 7, 171, 0.1)',
-                          color: 'primary.main',
-                        }}
-                      />
-                    </Box>
-                  )}
+                  {/* Rows are fetched one page at a time from the staging table */}
+                  <TablePagination
+                    component="div"
+                    count={selectedUpload.total_rows ?? selectedUpload.file_content.length}
+                    page={previewPage}
+                    rowsPerPage={previewRowsPerPage}
+                    rowsPerPageOptions={[20, 50, 100]}
+                    onPageChange={(_, page) => handleViewDetail(selectedUpload.id, page)}
+                    onRowsPerPageChange={(e) => handleViewDetail(selectedUpload.id, 0, parseInt(e.target.value, 10))}
+                  />
                 </Box>
               ) : selectedUpload.file_content ? (
                 <Box sx={{ mt: 3 }}>
@@ -37,6 +37,8 @@ export interface Dataset {
   imaging_types: string;
   modalities: string;
   created_at: string;
+  publications?: Omit<Publication, 'dataset_name' | 'dataset_id' | 'created_at'>[];
+  publication_count?: number;
 }
 
 export interface Publication {
@@ -48,6 +50,7 @@ export interface Publication {
   pmid: string;
   doi: string;
   dataset_name: string;
+  dataset_id: number | null;
   created_at: string;
 }
 
@@ -65,9 +68,34 @@ export interface AnalyticsOverview {
   wgs_availability: Array<{ availability: string; count: number }>;
 }
 
+export type ExportFormat = 'csv' | 'ndjson' | 'arrow' | 'parquet' | 'xlsx';
+
+export type TagMatch = 'any' | 'all';
+
 export interface SearchFilters {
   disease_types: string[];
   modalities: string[];
+  imaging_types: string[];
+}
+
+// Progress of a queued upload approval (GET /management/jobs/<id>)
+export interface ApprovalJob {
+  id: number;
+  upload_id: number;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  total_rows: number;
+  processed_rows: number;
+  percent: number | null;
+  added_count: number;
+  updated_count: number; // Rows that changed an existing dataset (same fingerprint)
+  unchanged_count: number; // Rows identical to a stored dataset
+  error_count: number;
+  errors: string[];
+  column_mapping: Record<string, string | null>;
+  message: string;
+  elapsed_seconds: number | null;
+  rows_per_second: number | null;
+  eta_seconds: number | null;
 }
 
 // API Functions
@@ -82,9 +110,15 @@ export const apiService = {
   getDatasets: async (params?: {
     disease_type?: string;
     modality?: string;
+    modality_match?: TagMatch;
+    imaging_type?: string;
+    imaging_match?: TagMatch;
     search?: string;
+    include?: string; // comma-separated: publications, publication_count
     page?: number;
     per_page?: number;
+    cursor?: string;
+    count?: 'none' | 'approximate' | 'exact';
   }) => {
     const response = await api.get('/datasets', { params });
     return response.data;
@@ -99,10 +133,14 @@ export const apiService = {
     q?: string;
     disease_type?: string;
     modality?: string;
+    modality_match?: TagMatch;
+    imaging_type?: string;
+    imaging_match?: TagMatch;
     min_sample_size?: number;
     max_sample_size?: number;
     data_accessibility?: string;
     wgs_available?: string;
+    include?: string;
   }) => {
     const response = await api.get('/datasets/search', { params });
     return response.data;
@@ -113,8 +151,21 @@ export const apiService = {
     return response.data;
   },
 
-  exportDatasets: async () => {
+  exportDatasets: async (params?: {
+    format?: ExportFormat;
+    q?: string;
+    disease_type?: string;
+    modality?: string;
+    modality_match?: TagMatch;
+    imaging_type?: string;
+    imaging_match?: TagMatch;
+    min_sample_size?: number;
+    max_sample_size?: number;
+    data_accessibility?: string;
+    wgs_available?: string;
+  }) => {
     const response = await api.get('/datasets/export', {
+      params,
       responseType: 'blob',
     });
     return response.data;
@@ -127,11 +178,14 @@ export const apiService = {
 
   // Publications
   getPublications: async (params?: {
+    dataset_id?: number;
     dataset_name?: string;
     title_search?: string;
     year?: number;
     page?: number;
     per_page?: number;
+    cursor?: string;
+    count?: 'none' | 'approximate' | 'exact';
   }) => {
     const response = await api.get('/publications', { params });
     return response.data;
@@ -154,8 +208,17 @@ export const apiService = {
     return response.data;
   },
 
-  exportPublications: async () => {
+  exportPublications: async (params?: {
+    format?: ExportFormat;
+    q?: string;
+    dataset_name?: string;
+    journal?: string;
+    min_year?: number;
+    max_year?: number;
+    author?: string;
+  }) => {
     const response = await api.get('/publications/export', {
+      params,
       responseType: 'blob',
     });
     return response.data;
@@ -179,22 +242,25 @@ export const apiService = {
   },
 
   // Management endpoints
-  getPendingUploads: async (status: string = 'pending') => {
-    const response = await api.get('/management/pending', { params: { status } });
+  // One page of uploads with the given status, plus counts for every status
+  getPendingUploads: async (status: string = 'pending', page: number = 1, perPage: number = 25) => {
+    const response = await api.get('/management/pending', { params: { status, page, per_page: perPage } });
     return response.data;
   },
 
-  getPendingUploadDetail: async (uploadId: number) => {
-    const response = await api.get(`/management/pending/${uploadId}`);
+  // file_content holds one window of staged rows (offset/limit); total_rows is the full count
+  getPendingUploadDetail: async (uploadId: number, offset: number = 0, limit: number = 50) => {
+    const response = await api.get(`/management/pending/${uploadId}`, { params: { offset, limit } });
     return response.data;
   },
 
+  // Queues the approval (HTTP 202); poll getApprovalJob(job_id) for progress
   approveUpload: async (uploadId: number, reviewNotes: string = '', reviewedBy: string = 'admin'): Promise<{
     success: boolean;
     message: string;
-    added_count?: number;
-    error_count?: number;
-    errors?: string[];
+    job_id: number;
+    status: ApprovalJob['status'];
+    total_rows: number;
   }> => {
     const response = await api.post(`/management/pending/${uploadId}/approve`, {
       review_notes: reviewNotes,
@@ -203,6 +269,11 @@ export const apiService = {
     return response.data;
   },
 
+  getApprovalJob: async (jobId: number): Promise<ApprovalJob> => {
+    const response = await api.get(`/management/jobs/${jobId}`);
+    return response.data;
+  },
+
   rejectUpload: async (uploadId: number, reviewNotes: string = '', reviewedBy: string = 'admin') => {
     const response = await api.post(`/management/pending/${uploadId}/reject`, {
       review_notes: reviewNotes,
@@ -213,32 +284,17 @@ export const apiService = {
 
   // File upload
   uploadFile: async (file: File, uploadedBy: string = '') => {
-    return new Promise((resolve, reject) => {
-      const reader = new FileReader();
-      
-      reader.onload = async (e) => {
-        try {
-          const fileContent = e.target?.result as string;
-          const fileExtension = file.name.toLowerCase().split('.').pop() || 'csv';
-          
-          const response = await api.post('/upload', {
-            file_name: file.name,
-            file_content: fileContent,
-            file_type: fileExtension,
-            uploaded_by: uploadedBy,
-          });
-          
-          resolve(response.data);
-        } catch (error) {
-          reject(error);
-        }
-      };
-      
-      reader.onerror = reject;
-      
-      // Read file as data URL (base64)
-      reader.readAsDataURL(file);
+    // Sent as multipart/form-data so the server can stream it to disk
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('file_name', file.name);
+    formData.append('file_type', file.name.toLowerCase().split('.').pop() || 'csv');
+    formData.append('uploaded_by', uploadedBy);
+
+    const response = await api.post('/upload', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
     });
+    return response.data;
   },
 };
 
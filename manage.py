@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+"""
+Django command-line utility for the ADRD Knowledge Graph API
+
+Settings are configured in code by api/index.py (there is no settings
+module), so importing it first gives management commands the same database
+and apps as the web process, e.g.:
+
+    python manage.py run_approval_worker
+"""
+import os
+import sys
+
+# The approval worker runs jobs itself; without this, bootstrapping
+# api.index would also start the in-process thread pool
+if sys.argv[1:2] == ['run_approval_worker']:
+    os.environ['APPROVAL_WORKER'] = 'external'
+
+import api.index  # noqa: F401  (configures settings and initializes the database)
+from django.core.management import execute_from_command_line
+
+if __name__ == '__main__':
+    execute_from_command_line(sys.argv)